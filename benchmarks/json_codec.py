@@ -0,0 +1,74 @@
+""" Compare JSON backends at every call site that goes through ``solo.server.codec.json_codec``.
+
+    $ python benchmarks/json_codec.py --items 100
+"""
+import argparse
+import timeit
+import uuid
+
+from solo.config.app import JsonBackend
+from solo.server.codec import json_codec
+from solo.server.model import _BaseModel
+from solo.server.response import _response_jsonapi
+
+
+def make_resources(n: int):
+    return [{
+        'type': 'users',
+        'id': str(i),
+        'attributes': {
+            'name': f'User {i}',
+            'email': f'user{i}@example.com',
+            'active': i % 2 == 0,
+            'score': i * 1.5,
+            'tags': ['a', 'b', 'c'],
+        },
+    } for i in range(n)]
+
+
+def make_session():
+    return {
+        'created': 1700000000,
+        'session': {'user_id': 42, 'csrft': uuid.uuid4().hex, 'oauth.state': uuid.uuid4().hex},
+    }
+
+
+def call_sites(items: int):
+    resources = make_resources(items)
+    session = make_session()
+    encoded_session = json_codec.dumps(session)
+    attributes = {'attributes': resources[0]['attributes']}
+    modifier = _BaseModel.OUT_MODIFIERS['json']
+    return {
+        'jsonapi renderer': lambda: _response_jsonapi(200, resources),
+        'session encode': lambda: json_codec.dumps(session),
+        'session decode': lambda: json_codec.loads(encoded_session),
+        'model |json': lambda: modifier(attributes),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100, help='resources in a JSON:API document')
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for backend in (JsonBackend.STDLIB, JsonBackend.UJSON, JsonBackend.ORJSON):
+        try:
+            json_codec.use(backend)
+        except ImportError:
+            print(f'{backend.value} is not installed, skipping')
+            continue
+        for site, fn in call_sites(args.items).items():
+            best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+            results[site, backend] = args.number / best
+
+    for (site, backend), ops in results.items():
+        speedup = ops / results[site, JsonBackend.STDLIB]
+        print(f'{site:>17} {backend.value:>7}: {ops:12.0f} ops/s  x{speedup:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+""" Compare throughput of OAuth login callbacks with a shared HTTP client and with a client per login.
+
+Provider endpoints are stubbed with httpx.MockTransport, and every new client pays a simulated
+connection setup cost (DNS, TCP and TLS handshakes) before its first request.
+
+    $ python benchmarks/oauth_login.py --logins 200 --connect-latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from solo.apps.accounts.providers.base_oauth2 import HttpClientSettings
+from solo.apps.accounts.providers.facebook import FacebookProvider
+from solo.server.request import Request
+from solo.vendor.old_session.old_session import Session
+
+
+def facebook_api(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith('/oauth/access_token'):
+        return httpx.Response(200, json={'access_token': 'token'})
+    return httpx.Response(200, json={'id': 42, 'name': 'Alice'})
+
+
+class ConnectingTransport(httpx.AsyncBaseTransport):
+    """ Stub transport that sleeps before the first request, like a new connection pool would.
+    """
+    def __init__(self, connect_latency: float, request_latency: float) -> None:
+        self.connect_latency = connect_latency
+        self.request_latency = request_latency
+        self.stub = httpx.MockTransport(facebook_api)
+        self.connected = False
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.connected:
+            self.connected = True
+            await asyncio.sleep(self.connect_latency)
+        await asyncio.sleep(self.request_latency)
+        return await self.stub.handle_async_request(request)
+
+
+def login_request():
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': [],
+                       'query_string': b'state=st&code=the-code'})
+    session = Session('sid', data={'created': int(time.time()), 'session': {'oauth.state': 'st'}}, new=False)
+    return request, session
+
+
+def make_provider(args) -> FacebookProvider:
+    transport = ConnectingTransport(args.connect_latency, args.request_latency)
+    return FacebookProvider('id', 'secret', ['email'], redirect_uri='http://localhost/cb',
+                            http_settings=HttpClientSettings(transport=transport,
+                                                             max_connections=args.concurrency))
+
+
+async def run_logins(args, shared: bool) -> float:
+    provider = make_provider(args)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def login():
+        async with semaphore:
+            if shared:
+                await provider.callback(*login_request())
+            else:
+                # the behaviour before shared clients: a new client for every login
+                p = make_provider(args)
+                await p.callback(*login_request())
+                await p.aclose()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(args.logins)])
+    elapsed = time.perf_counter() - started
+    await provider.aclose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--connect-latency', type=float, default=0.05,
+                        help='simulated connection setup time of a new client, in seconds')
+    parser.add_argument('--request-latency', type=float, default=0.005,
+                        help='simulated time of a request over an established connection, in seconds')
+    args = parser.parse_args()
+
+    for name, shared in [('client per login', False), ('shared client', True)]:
+        elapsed = asyncio.run(run_logins(args, shared))
+        print(f'{name:>16}: {args.logins / elapsed:8.1f} logins/s')
+
+
+if __name__ == '__main__':
+    main()
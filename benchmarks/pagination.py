@@ -0,0 +1,51 @@
+""" Compare the latency of OFFSET pages and keyset pages at increasing depths.
+
+Queries run against an in-memory SQLite database with an index on the sort key,
+keyset queries are the ones built by solo.services.SQLService.page.
+
+    $ python benchmarks/pagination.py --rows 200000 --size 20
+"""
+import argparse
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy import select
+
+from solo.apps.accounts.model import User
+from solo.services import SQLService
+from solo.services.pagination import decode_cursor, encode_cursor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--size', type=int, default=20)
+    parser.add_argument('--number', type=int, default=50)
+    args = parser.parse_args()
+
+    engine = sa.create_engine('sqlite://')
+    User.__table__.create(engine)
+    with engine.begin() as c:
+        c.execute(User.__table__.insert(), [{'id': i, 'name': f'user {i}'} for i in range(1, args.rows + 1)])
+
+    service = SQLService(None, User)
+    columns = list(service.columns())
+    offset_query = select(*columns).order_by(User.id).offset(sa.bindparam('offset')).limit(sa.bindparam('limit'))
+    keyset_query = service._page_query((User.id,), True, None, None)
+
+    def bench(fn):
+        return min(timeit.repeat(fn, number=args.number, repeat=3)) / args.number * 1e3
+
+    print(f'{"depth":>10} {"offset, ms":>12} {"keyset, ms":>12}')
+    with engine.connect() as c:
+        for depth in [0, args.rows // 100, args.rows // 10, args.rows // 2, args.rows - args.size]:
+            cursor = encode_cursor([depth])
+            offset = bench(lambda: c.execute(offset_query, {'offset': depth, 'limit': args.size + 1}).all())
+            keyset = bench(lambda: c.execute(keyset_query, {
+                'after_0': decode_cursor(cursor, [int])[0], 'limit': args.size + 1,
+            }).all())
+            print(f'{depth:>10} {offset:>12.3f} {keyset:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+""" Compare the cost of turning query results into ORM entities and into lightweight records.
+
+Rows are fetched once from an in-memory SQLite database, then converted and serialized
+with ``as_dict()`` the same ways SQLService.get_many does:
+
+* "entities" - ``entity(**row)`` for every row;
+* "records" - ``Record._make(row)`` of solo.server.model.record_type.
+
+    $ python benchmarks/records.py --rows 10000
+"""
+import argparse
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy import select
+
+from solo.apps.accounts.model import Group
+from solo.server.model import record_type
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = sa.create_engine('sqlite://')
+    Group.__table__.create(engine)
+    with engine.begin() as c:
+        c.execute(Group.__table__.insert(), [
+            {'id': i, 'name': f'group {i}', 'description': 'a group', 'permissions': ['view', 'edit']}
+            for i in range(1, args.rows + 1)
+        ])
+    columns = [getattr(Group, k) for k in Group.__table__.c.keys()]
+    with engine.connect() as c:
+        rows = c.execute(select(*columns)).all()
+    mappings = [row._mapping for row in rows]
+    Record = record_type(Group)
+
+    def bench(name, fn):
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f'  {name:>10}: {best * 1e3:8.2f} ms per {len(rows)} rows')
+
+    print('build:')
+    bench('entities', lambda: [Group(**m) for m in mappings])
+    bench('records', lambda: [Record._make(r) for r in rows])
+    print('build and as_dict():')
+    bench('entities', lambda: [Group(**m).as_dict() for m in mappings])
+    bench('records', lambda: [Record._make(r).as_dict() for r in rows])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+""" Compare route matching of ``routes.Mapper`` with ``solo.server.routing.Router``.
+
+    $ python benchmarks/routing.py --routes 300
+"""
+import argparse
+import random
+import timeit
+
+import routes
+
+from solo.configurator.url import complete_url_rules
+from solo.server.routing import Router
+
+
+def make_patterns(n: int):
+    patterns = []
+    for i in range(n):
+        kind = i % 3
+        if kind == 0:
+            patterns.append((f'/api/v1/resource{i}', {}))
+        elif kind == 1:
+            patterns.append((f'/api/v1/resource{i}/{{itemId}}', {}))
+        else:
+            patterns.append((f'/api/v1/resource{i}/{{itemId}}/children/{{childId:\\d+}}', {}))
+    return patterns
+
+
+def make_paths(patterns, n: int):
+    paths = []
+    for pattern, _ in random.choices(patterns, k=n):
+        paths.append(pattern.replace('{itemId}', 'abc').replace('{childId:\\d+}', '42'))
+    # some misses
+    paths.extend(f'/api/v1/missing{i}' for i in range(n // 10))
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--routes', type=int, default=300)
+    parser.add_argument('--paths', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    patterns = make_patterns(args.routes)
+    paths = make_paths(patterns, args.paths)
+
+    mapper = routes.Mapper()
+    router = Router()
+    for pattern, rules in patterns:
+        mapper.connect(pattern, pattern, requirements=complete_url_rules(rules), controller=pattern)
+        router.add(pattern, rules, pattern)
+
+    for path in paths:
+        assert mapper.match(path) == router.match(path), path
+
+    for name, match in (('routes.Mapper', mapper.match), ('solo Router', router.match)):
+        best = min(timeit.repeat(lambda: [match(p) for p in paths], number=1, repeat=args.repeat))
+        print(f'{name:>14}: {best / len(paths) * 1e6:8.2f} us/match ({args.routes} routes)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+""" Compare size and speed of session serialization formats.
+
+The binary format is pure Python, it's expected to be smaller and slower than JSON.
+
+    $ python benchmarks/session_codec.py
+"""
+import argparse
+import json
+import timeit
+import uuid
+
+from solo.config.app import JsonBackend
+from solo.server.codec import json_codec
+from solo.server.sessions.codec import BinarySessionCodec, JsonSessionCodec
+
+
+SESSIONS = {
+    'small': {
+        'created': 1700000000,
+        'session': {'__user__': 42, 'oauth.state': uuid.uuid4().hex},
+    },
+    'medium': {
+        'created': 1700000000,
+        'session': {
+            '__user__': 42,
+            'csrft': uuid.uuid4().hex,
+            'recent': [{'id': i, 'title': f'Item {i}', 'score': i / 3, 'seen': bool(i % 2)} for i in range(20)],
+        },
+    },
+}
+
+
+class LegacyJsonCodec:
+    """ The format used before session codecs: stdlib json over UTF-8 text.
+    """
+    def encode(self, data):
+        return json.dumps(data).encode('utf-8')
+
+    def decode(self, raw):
+        return json.loads(raw.decode('utf-8'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    backend = json_codec.use(JsonBackend.AUTO)
+    codecs = {
+        'legacy json': LegacyJsonCodec(),
+        f'json ({backend.value})': JsonSessionCodec(),
+        'binary': BinarySessionCodec(),
+    }
+    for name, session in SESSIONS.items():
+        print(f'{name} session:')
+        for codec_name, codec in codecs.items():
+            raw = codec.encode(session)
+            assert codec.decode(raw) == session
+            encode = min(timeit.repeat(lambda: codec.encode(session), number=args.number, repeat=args.repeat))
+            decode = min(timeit.repeat(lambda: codec.decode(raw), number=args.number, repeat=args.repeat))
+            print(f'  {codec_name:>14}: {len(raw):5d} bytes, '
+                  f'encode {encode / args.number * 1e6:6.2f} us, '
+                  f'decode {decode / args.number * 1e6:6.2f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+""" Measure the Python-side overhead of building and compiling SQL statements per query.
+
+Queries run against an in-memory SQLite database, so the numbers are dominated by SQLAlchemy:
+
+* "compile every time" - a new construct per query, with the compiled cache disabled;
+* "new construct" - a new construct per query, its SQL is found in the compiled cache
+  after computing the cache key of the construct;
+* "cached statement" - a statement built once, with values passed as bound parameters,
+  see solo.services.sql.cached_statement.
+
+    $ python benchmarks/sql_statements.py
+"""
+import argparse
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import psycopg
+
+from solo.apps.accounts.model import User, Group, users_groups_association
+
+
+def user_query(user_id):
+    return select(User.id, User.name).where(User.id.in_([user_id])).offset(0).limit(1)
+
+
+def permissions_query(user_id):
+    return (select(Group.permissions)
+            .select_from(users_groups_association.join(Group, users_groups_association.c.group_id == Group.id))
+            .where(users_groups_association.c.user_id == user_id))
+
+
+CACHED_USER_QUERY = (select(User.id, User.name)
+                     .where(User.id.in_(bindparam('values', expanding=True)))
+                     .offset(bindparam('offset'))
+                     .limit(bindparam('limit')))
+
+CACHED_PERMISSIONS_QUERY = permissions_query(bindparam('user_id'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    engine = sa.create_engine('sqlite://')
+    User.__table__.create(engine)
+    Group.__table__.create(engine)
+    users_groups_association.create(engine)
+    with engine.begin() as c:
+        c.execute(User.__table__.insert(), [{'id': i, 'name': f'user {i}'} for i in range(1, 101)])
+
+    uncached = engine.execution_options(compiled_cache=None)
+    pg_dialect = psycopg.dialect()
+
+    def bench(name, fn):
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        print(f'  {name:>20}: {best / args.number * 1e6:7.1f} us/query')
+
+    for title, fresh, cached, params in [
+        ('user by id', lambda: user_query(42), CACHED_USER_QUERY, {'values': [42], 'offset': 0, 'limit': 1}),
+        ('permissions of a user', lambda: permissions_query(42), CACHED_PERMISSIONS_QUERY, {'user_id': 42}),
+    ]:
+        print(f'{title}:')
+        with uncached.connect() as c:
+            bench('compile every time', lambda: c.execute(fresh()).all())
+        with engine.connect() as c:
+            bench('new construct', lambda: c.execute(fresh()).all())
+            bench('cached statement', lambda: c.execute(cached, params).all())
+        bench('postgres compilation', lambda: fresh().compile(dialect=pg_dialect))
+
+
+if __name__ == '__main__':
+    main()
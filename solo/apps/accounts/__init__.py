@@ -1,16 +1,23 @@
 from solo import Configurator
-from .util import get_user
+from .util import get_user, current_user
+from .model import CurrentUser
+from .cache import configure_user_cache
 
 from solo.apps.accounts.providers import enable_provider
+from solo.server.runtime.dependencies import Provider, DependencyScope
 from . import predicate
+from .permissions import configure_permission_cache
 
 
-__all__ = ['get_user']
+__all__ = ['get_user', 'CurrentUser']
 
 
 def includeme(config: Configurator) -> None:
     config.include_api_specs(__name__, 'api/specs.raml')
     config.add_directive(enable_provider)
+    config.add_directive(configure_permission_cache)
+    config.add_directive(configure_user_cache)
+    config.views.add_dependency(CurrentUser, Provider(current_user, scope=DependencyScope.REQUEST, is_async=True))
     config.views.add_view_predicate('permission', predicate.PermissionPredicate,
                                     weighs_more_than='request_method')
     config.views.add_view_predicate('authenticated', predicate.AuthenticatedPredicate,
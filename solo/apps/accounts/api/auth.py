@@ -7,7 +7,7 @@ from solo.server.request import Request
 from solo.server.db.types import SQLEngine
 from solo.server.definitions import HttpMethod
 from solo.server.statuses import Redirect
-from solo.vendor.old_session.old_session import Session
+from solo.vendor.old_session.old_session import LazySession
 
 
 @http_defaults(route_name='/login/{provider}', renderer='json')
@@ -21,11 +21,11 @@ class BackendAuthenticationHandler:
     async def init_authentication(
         self,
         reg: Registry,
-        sess: Session
+        sess: LazySession
     ) -> None:
         provider = reg.settings['solo.apps.accounts'][self.context['provider'].value]
 
-        url = await provider.authborize(sess)
+        url = await provider.authorize(sess)
         raise Redirect(location=url)
 
 
@@ -41,7 +41,7 @@ class BackendAuthenticationCallbackHandler:
         self,
         reg: Registry,
         db: SQLEngine,
-        sess: Session,
+        sess: LazySession,
     ) -> None:
         """
         """
@@ -2,24 +2,30 @@ from typing import Dict, Any
 
 from solo import http_defaults, http_endpoint
 from solo.apps.accounts.service import UserService
-from solo.apps.accounts.model import User, Guest
-from solo.apps.accounts import get_user
+from solo.apps.accounts.model import User, Guest, CurrentUser
 from solo.server.db import SQLEngine
 from solo.server.request import Request
 from solo.server.definitions import HttpMethod
 from solo.server.statuses import Forbidden
+from solo.services.pagination import page_params
 from solo.vendor.old_session.old_session import SessionStore
 
 
-@http_defaults(route_name='/users', permission='users:view', renderer='json')
+@http_defaults(route_name='/users', permission='users:view', renderer='jsonapi')
 class AccountsListHandler:
 
     def __init__(self, request: Request, context: Dict[str, Any]):
         self.request = request
 
     @http_endpoint(request_method=HttpMethod.GET)
-    async def get(self):
-        return {}
+    async def get(self, db: SQLEngine):
+        size, after = page_params(self.request)
+        page = await UserService(db).page(User.id, size, after, records=True)
+        return page._replace(items=[{
+            'id': str(user.id),
+            'type': 'users',
+            'attributes': user.as_dict(),
+        } for user in page.items])
 
 
 @http_defaults(route_name='/users/me', authenticated=True, renderer='json')
@@ -30,12 +36,9 @@ class FrontendAuthenticationHandler:
         self.context = context
 
     @http_endpoint(request_method=HttpMethod.GET)
-    async def authenticate_frontend(self,
-                                    store: SessionStore,
-                                    db: SQLEngine):
+    async def authenticate_frontend(self, user: CurrentUser):
         """
         """
-        user = await get_user(store, db, self.request)
         if user is Guest:
             raise Forbidden()
         return {
@@ -53,9 +56,9 @@ class AccountDetailsHandler:
         self.context = context
 
     @http_endpoint(request_method=HttpMethod.GET)
-    async def get(self):
+    async def get(self, db: SQLEngine):
 
-        user_service = UserService(self.request.app)
+        user_service = UserService(db)
         user = await user_service.get(User.id, self.context['userId'])
         if not user:
             raise Forbidden()
@@ -0,0 +1,58 @@
+""" Process-wide cache of user entities.
+
+Authenticated requests resolve the user stored in their session, the cache lets repeated requests
+of the same user skip the database for ``ttl`` seconds. It's disabled by default, because other
+workers may keep serving stale entities until ``ttl`` expires.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from solo.server.cache import TTLCache
+
+
+log = logging.getLogger(__name__)
+
+
+class UserCache:
+    def __init__(self, maxsize: int = 10000, ttl: float = 0) -> None:
+        self.configure(maxsize=maxsize, ttl=ttl)
+
+    def configure(self, maxsize: int = 10000, ttl: float = 0) -> None:
+        """ Change settings of the cache, the cache is disabled when ``ttl`` is 0.
+        """
+        self._users: Optional[TTLCache[int, Dict[str, Any]]] = TTLCache(maxsize, ttl) if ttl > 0 else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._users is not None
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """ Returns column values of a cached user. Entities themselves are not cached,
+        because handlers may modify them.
+        """
+        users = self._users
+        if users is None:
+            return None
+        return users.get(user_id)
+
+    def put(self, user_id: int, values: Dict[str, Any]) -> None:
+        users = self._users
+        if users is not None:
+            users.put(user_id, values)
+
+    def invalidate(self, user_id: int) -> None:
+        users = self._users
+        if users is not None:
+            users.discard(user_id)
+
+
+user_cache = UserCache()
+""" User cache of the current process, see :func:`configure_user_cache`.
+"""
+
+
+def configure_user_cache(config, maxsize: int = 10000, ttl: float = 5) -> None:
+    """ Configurator directive that enables :data:`user_cache`.
+    """
+    log.debug('Configuring user cache: maxsize=%d, ttl=%s', maxsize, ttl)
+    user_cache.configure(maxsize=maxsize, ttl=ttl)
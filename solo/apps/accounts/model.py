@@ -1,4 +1,4 @@
-from typing import TypeVar, Set, Type
+from typing import TypeVar, FrozenSet, Type, Union
 import sqlalchemy as sa
 from sqlalchemy.dialects.postgresql import JSON
 
@@ -19,7 +19,7 @@ class AuthProvider(SumType):
 class Guest:
     id = 0
     name = 'Guest'
-    _permissions = set()
+    _permissions = frozenset()
 
 
 @register_model(category='users')
@@ -66,11 +66,15 @@ users_groups_association = sa.Table('users_groups', Base.metadata,
 
 UserType = TypeVar('UserType', User, Guest)
 
+CurrentUser = Union[User, Type[Guest]]
+""" Type of view callable arguments that receive the user of the request session, or :class:`Guest`.
+"""
+
 
 class Permissions:
     __slots__ = ('user', 'permissions')
 
-    def __init__(self, user: UserType, permissions: Set[str]):
+    def __init__(self, user: UserType, permissions: FrozenSet[str]):
         self.user = user
         self.permissions = permissions
 
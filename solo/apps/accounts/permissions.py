@@ -0,0 +1,117 @@
+""" Process-wide cache of user permissions.
+
+Permission checks run on every request to a guarded view, so permission sets of users are cached
+by every worker for ``ttl`` seconds, and optionally in Redis, where they are shared by all workers
+for ``shared_ttl`` seconds. Changes of group membership and group permissions made through
+:class:`solo.apps.accounts.service.UserService` invalidate both tiers. Other workers may keep
+serving stale permissions from their own caches until ``ttl`` expires. Groups and memberships
+written by other means, e.g. by bulk writes of ``SQLService(db, Group)``, are not noticed until
+both tiers expire, such writers must call :meth:`PermissionCache.invalidate` themselves.
+
+Permission sets are interned: users with the same groups share one frozenset.
+"""
+import logging
+import sys
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterable, Optional
+
+from solo.server.cache import TTLCache
+from solo.server.codec import json_codec
+
+
+log = logging.getLogger(__name__)
+
+
+PermissionSet = FrozenSet[str]
+
+NO_PERMISSIONS: PermissionSet = frozenset()
+
+DEFAULT_MAXSIZE = 10000
+DEFAULT_TTL = 60
+DEFAULT_SHARED_TTL = 300
+
+
+class PermissionCache:
+    def __init__(self,
+                 maxsize: int = DEFAULT_MAXSIZE,
+                 ttl: float = DEFAULT_TTL,
+                 shared: bool = False,
+                 shared_ttl: int = DEFAULT_SHARED_TTL,
+                 key_prefix: str = 'solo:permissions:') -> None:
+        self.configure(maxsize=maxsize, ttl=ttl, shared=shared, shared_ttl=shared_ttl, key_prefix=key_prefix)
+
+    def configure(self,
+                  maxsize: int = DEFAULT_MAXSIZE,
+                  ttl: float = DEFAULT_TTL,
+                  shared: bool = False,
+                  shared_ttl: int = DEFAULT_SHARED_TTL,
+                  key_prefix: str = 'solo:permissions:') -> None:
+        """ Change settings of the cache, dropping all cached entries of this process.
+        """
+        self._users: TTLCache[int, PermissionSet] = TTLCache(maxsize, ttl)
+        self._interned: Dict[PermissionSet, PermissionSet] = {NO_PERMISSIONS: NO_PERMISSIONS}
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.key_prefix = key_prefix
+
+    def intern(self, permissions: Iterable[str]) -> PermissionSet:
+        permissions = frozenset(sys.intern(p) for p in permissions)
+        return self._interned.setdefault(permissions, permissions)
+
+    def shared_key(self, user_id: int) -> str:
+        return f'{self.key_prefix}{user_id}'
+
+    async def get(self,
+                  user_id: int,
+                  load: Callable[[], Awaitable[Iterable[str]]],
+                  redis=None) -> PermissionSet:
+        """ Returns cached permissions of a user, obtaining them with ``load()`` on a cache miss.
+
+        :param redis: Redis client of the shared tier, it's not used if the tier is disabled.
+        """
+        permissions = self._users.get(user_id)
+        if permissions is not None:
+            return permissions
+
+        use_shared = self.shared and redis is not None
+        if use_shared:
+            raw = await redis.get(self.shared_key(user_id))
+            if raw is not None:
+                permissions = self.intern(json_codec.loads(raw))
+                self._users.put(user_id, permissions)
+                return permissions
+
+        permissions = self.intern(await load())
+        self._users.put(user_id, permissions)
+        if use_shared:
+            await redis.set(self.shared_key(user_id), json_codec.dumps(sorted(permissions)), ex=self.shared_ttl)
+        return permissions
+
+    async def invalidate(self, user_ids: Iterable[int], redis=None) -> None:
+        """ Drop cached permissions of users, it must be called whenever their groups
+        or permissions of their groups change.
+        """
+        user_ids = list(user_ids)
+        log.debug('Invalidating cached permissions of users %s', user_ids)
+        for user_id in user_ids:
+            self._users.discard(user_id)
+        if self.shared and redis is not None and user_ids:
+            await redis.delete(*[self.shared_key(user_id) for user_id in user_ids])
+
+    def clear(self) -> None:
+        self._users.clear()
+
+
+permission_cache = PermissionCache()
+""" Permission cache of the current process, see :func:`configure_permission_cache`.
+"""
+
+
+def configure_permission_cache(config,
+                               maxsize: int = DEFAULT_MAXSIZE,
+                               ttl: float = DEFAULT_TTL,
+                               shared: bool = False,
+                               shared_ttl: int = DEFAULT_SHARED_TTL) -> None:
+    """ Configurator directive that changes settings of :data:`permission_cache`.
+    """
+    log.debug('Configuring permission cache: maxsize=%d, ttl=%s, shared=%s', maxsize, ttl, shared)
+    permission_cache.configure(maxsize=maxsize, ttl=ttl, shared=shared, shared_ttl=shared_ttl)
@@ -4,7 +4,7 @@ from typing import Optional
 from solo.server.statuses import Http4xx
 from solo.server.request import Request
 from solo.server.runtime.dependencies import Runtime
-from .util import get_user
+from .util import current_user
 from .service import UserService
 from .model import Guest
 
@@ -13,6 +13,8 @@ log = logging.getLogger(__name__)
 
 
 class PermissionPredicate:
+    is_async = True
+
     def __init__(self, val, config, raises: Optional[Http4xx] = None):
         log.debug(f'Registered permission predicate: {val}')
         config.available_permissions.add(val)
@@ -25,17 +27,15 @@ class PermissionPredicate:
     phash = text
 
     async def __call__(self, runtime: Runtime, request: Request) -> bool:
-        user_service = UserService(runtime.dbengine)
-        user = await get_user(
-            runtime.session_storage,
-            runtime.dbengine,
-            request
-        )
+        user_service = UserService(runtime.dbengine, runtime.memstore)
+        user = await current_user(runtime, request)
         permissions = await user_service.permissions(user)
         return permissions.allowed(self.val)
 
 
 class AuthenticatedPredicate:
+    is_async = True
+
     def __init__(self, val: bool, config, raises: Optional[Http4xx] = None):
         self.val = val
         self.raises = raises
@@ -45,8 +45,8 @@ class AuthenticatedPredicate:
 
     phash = text
 
-    async def __call__(self, context, request: Request) -> bool:
-        user = await get_user(request)
+    async def __call__(self, runtime: Runtime, request: Request) -> bool:
+        user = await current_user(runtime, request)
         if self.val:
             return user is not Guest
         return user is Guest
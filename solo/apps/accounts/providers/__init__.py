@@ -2,6 +2,7 @@ import logging
 from typing import List
 from solo import Configurator
 from solo.apps.accounts.model import AuthProvider
+from .base_oauth2 import HttpClientSettings
 
 log = logging.getLogger(__name__)
 
@@ -10,7 +11,10 @@ def enable_provider(config: Configurator,
                     name: str,
                     client_id: str,
                     client_secret: str,
-                    scope: List[str]):
+                    scope: List[str],
+                    http_max_connections: int = 20,
+                    http_keepalive_expiry: float = 30.0,
+                    http_timeout: float = 10.0):
     log.debug('Enabling authentication provider: {}'.format(name.upper()))
     provider = AuthProvider.match(name)
     auth_registry = config.registry.settings.setdefault('solo.apps.accounts', {})
@@ -24,4 +28,11 @@ def enable_provider(config: Configurator,
     auth_registry[name] = provider_impl(client_id=client_id,
                                         client_secret=client_secret,
                                         scope=scope,
-                                        redirect_uri=redirect_uri)
+                                        redirect_uri=redirect_uri,
+                                        http_settings=HttpClientSettings(
+                                            max_connections=http_max_connections,
+                                            max_keepalive_connections=http_max_connections,
+                                            keepalive_expiry=http_keepalive_expiry,
+                                            timeout=http_timeout,
+                                        ))
+    config.add_shutdown_hook(auth_registry[name].aclose)
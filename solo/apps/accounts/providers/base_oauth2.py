@@ -1,14 +1,41 @@
 import uuid
-from typing import Optional, Tuple, Sequence
+from typing import Optional, Tuple, Sequence, Any
 from urllib.parse import urlencode
 
+import httpx
+
 from solo.vendor.old_session.old_session import Session
 
-from solo.apps.accounts.exceptions import CSRFError, AuthorizationError
+from solo.apps.accounts.exceptions import CSRFError, AuthorizationError, ProviderServiceError
 from solo.apps.accounts.model import AuthProvider
+from solo.server.codec import json_codec
 from solo.server.request import Request
 
 
+class HttpClientSettings:
+    """ Settings of the HTTP client that a provider uses for its whole lifetime.
+
+    :param max_connections: maximum number of concurrent connections to the provider.
+    :param max_keepalive_connections: maximum number of idle connections kept open.
+    :param keepalive_expiry: seconds an idle connection is kept open.
+    :param timeout: seconds to wait for connecting, reading or writing, or for a connection from the pool.
+    :param transport: custom transport, e.g. :class:`httpx.MockTransport` in tests and benchmarks.
+    """
+    __slots__ = ('max_connections', 'max_keepalive_connections', 'keepalive_expiry', 'timeout', 'transport')
+
+    def __init__(self,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 timeout: float = 10.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.transport = transport
+
+
 class ThirdPartyProfile:
     def __init__(self, id: str, display_name: str, email: Optional[str] = None):
         self.id = id
@@ -27,6 +54,10 @@ class ProfileIntegration:
         self.access_token = access_token
 
 
+def _first(values: Optional[Sequence[str]], default: Optional[str] = None) -> Optional[str]:
+    return values[0] if values else default
+
+
 class OAuth2Provider:
     def __init__(self,
         client_id: str,
@@ -35,7 +66,8 @@ class OAuth2Provider:
         redirect_uri: str,
         authorize_url: str,
         access_token_url: str,
-        profile_url: str
+        profile_url: str,
+        http_settings: Optional[HttpClientSettings] = None
     ):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -45,8 +77,42 @@ class OAuth2Provider:
         self.authorize_url = authorize_url
         self.access_token_url = access_token_url
         self.profile_url = profile_url
-        """ Field name to consult when a provider returns an error response.
+        self.http_settings = http_settings or HttpClientSettings()
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """ HTTP client shared by all logins with the provider. It's created on first use,
+        so that every worker process opens its own connections.
         """
+        http = self._http
+        if http is None:
+            settings = self.http_settings
+            http = self._http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=settings.max_connections,
+                                    max_keepalive_connections=settings.max_keepalive_connections,
+                                    keepalive_expiry=settings.keepalive_expiry),
+                timeout=settings.timeout,
+                transport=settings.transport,
+                headers={'Accept': 'application/json'},
+            )
+        return http
+
+    async def aclose(self) -> None:
+        """ Close connections of the provider, it's called at the application shutdown.
+        """
+        http = self._http
+        if http is not None:
+            self._http = None
+            await http.aclose()
+
+    async def get_json(self, url: str, what: str) -> Any:
+        r = await self.http.get(url)
+        if r.status_code != 200:
+            raise ProviderServiceError(
+                f'Error during {what} retrieval. Status {r.status_code}: {r.text}'
+            )
+        return json_codec.loads(r.content)
 
     async def authorize(self, session: Session) -> str:
         """ Init internal authorization state and return necessary data for performing authorization.
@@ -67,18 +133,19 @@ class OAuth2Provider:
         """
         :return: 2-tuple of (session state, OAuth2 exchangeable code)
         """
+        await session.load()
         session_state = session.pop('oauth.state', None)
-        request_state = request.qs_params.get('state')
+        request_state = _first(request.qs_params.get('state'))
         if not session_state or session_state != request_state:
             raise CSRFError(
                 f'State mismatch. '
                 f'Requested: {request_state}. '
                 f'Actual: {session_state}'
             )
-        code = request.qs_params.get('code')
+        code = _first(request.qs_params.get('code'))
         if not code:
-            reason = request.qs_params.get('error', 'n/a')
-            error_description = request.qs_params.get('error_description', '(no description)')
+            reason = _first(request.qs_params.get('error'), 'n/a')
+            error_description = _first(request.qs_params.get('error_description'), '(no description)')
             raise AuthorizationError(
                 f"Authorization code was not provided. Reason: {reason} {error_description}",
                 reason=reason, provider=self
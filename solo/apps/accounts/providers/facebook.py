@@ -1,13 +1,10 @@
-import json
 import logging
 from typing import List, Optional
 
-from httpx import AsyncClient
-
 from solo.server.request import Request
 from solo.apps.accounts.model import AuthProvider
-from solo.apps.accounts.exceptions import ProviderServiceError
-from .base_oauth2 import OAuth2Provider, ThirdPartyProfile, ProfileIntegration
+from solo.vendor.old_session.old_session import Session
+from .base_oauth2 import OAuth2Provider, ThirdPartyProfile, ProfileIntegration, HttpClientSettings
 
 
 log = logging.getLogger(__name__)
@@ -21,7 +18,12 @@ class FacebookProvider(OAuth2Provider):
     * API reference: https://developers.facebook.com/docs/facebook-login/manually-build-a-login-flow
 
     """
-    def __init__(self, client_id: str, client_secret: str, scope: List[str], redirect_uri: Optional[str] = None):
+    def __init__(self,
+                 client_id: str,
+                 client_secret: str,
+                 scope: List[str],
+                 redirect_uri: Optional[str] = None,
+                 http_settings: Optional[HttpClientSettings] = None):
         """
         :param redirect_uri: The redirect_uri parameter is optional. If left out, GitHub will redirect users to the
                              callback URL configured in the OAuth Application settings.
@@ -30,44 +32,28 @@ class FacebookProvider(OAuth2Provider):
                                                redirect_uri=redirect_uri,
                                                authorize_url='https://www.facebook.com/dialog/oauth',
                                                access_token_url='https://graph.facebook.com/v2.6/oauth/access_token',
-                                               profile_url='https://graph.facebook.com/v2.6/me')
-
+                                               profile_url='https://graph.facebook.com/v2.6/me',
+                                               http_settings=http_settings)
 
-    async def callback(self, request: Request) -> ProfileIntegration:
-        """ Process github redirect
+    async def callback(self, request: Request, session: Session) -> ProfileIntegration:
+        """ Process facebook redirect
         """
-        session_state, code = await self.validate_callback_exn(request)
+        session_state, code = await self.validate_callback_exn(request, session)
 
         # Now retrieve the access token with the code
         access_url = self.get_access_token_payload(session_state, code)
-        headers = {'Accept': 'application/json'}
-        with AsyncClient() as http:
-            async with http.get(access_url, headers=headers) as r:
-                if r.status_code != 200:
-                    content = r.text
-                    raise ProviderServiceError(
-                        f'Service responded with status {r.status_code}: {content}'
-                    )
-                else:
-                    content = json.loads(r.text)
-                access_token = content['access_token']
+        content = await self.get_json(access_url, 'access token')
+        access_token = content['access_token']
 
-                # Retrieve profile data
-                profile_url = self.get_profile_payload(access_token=access_token)
-                async with http.get(profile_url, headers=headers) as profile_r:
-                    if profile_r.status_code != 200:
-                        content = profile_r.text
-                        raise ProviderServiceError(
-                            f'Error during profile retrieval. Status {profile_r.status}: {content}'
-                        )
-                    else:
-                        profile_data = json.loads(profile_r.text)
+        # Retrieve profile data
+        profile_url = self.get_profile_payload(access_token=access_token)
+        profile_data = await self.get_json(profile_url, 'profile')
 
-                    profile = ThirdPartyProfile(id=str(profile_data['id']),
-                                                display_name=profile_data['name'],
-                                                # email might be non-verified
-                                                email=profile_data.get('email'))
+        profile = ThirdPartyProfile(id=str(profile_data['id']),
+                                    display_name=profile_data['name'],
+                                    # email might be non-verified
+                                    email=profile_data.get('email'))
 
-                    return ProfileIntegration(provider=AuthProvider.FACEBOOK,
-                                              access_token=access_token,
-                                              profile=profile)
+        return ProfileIntegration(provider=AuthProvider.FACEBOOK,
+                                  access_token=access_token,
+                                  profile=profile)
@@ -1,15 +1,19 @@
 import logging
-from typing import Optional, Dict
+from typing import Optional, Set, Iterable, List
 
 from solo.vendor.old_session.old_session import get_session
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, func, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from solo.apps.accounts.model import Auth, User, UserType, Guest, Group, users_groups_association, Permissions
+from solo.apps.accounts.cache import UserCache, user_cache
+from solo.apps.accounts.permissions import PermissionCache, permission_cache, NO_PERMISSIONS
 from solo.apps.accounts.providers.base_oauth2 import ProfileIntegration
 
 from solo.server.request import Request
 from solo.server.db.types import SQLEngine
-from solo.services import SQLService
+from solo.services import SQLService, cached_statement
+from solo.services.sql import DEFAULT_WRITE_BATCH_SIZE
 
 
 log = logging.getLogger(__name__)
@@ -18,34 +22,95 @@ USER_KEY = '__user__'
 
 
 class UserService(SQLService):
-    def __init__(self, db: SQLEngine):
+    def __init__(self,
+                 db: SQLEngine,
+                 redis=None,
+                 cache: PermissionCache = permission_cache,
+                 users_cache: UserCache = user_cache):
         super(UserService, self).__init__(db, User)
-        self._permissions: Dict[int, Permissions] = {}
+        self.redis = redis
+        self.permission_cache = cache
+        self.user_cache = users_cache
+
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        """ Returns a user, skipping the database if the user cache is enabled and holds the user.
+        """
+        values = self.user_cache.get(user_id)
+        if values is not None:
+            return User(**values)
+        user = await self.get(User.id, user_id)
+        if user is not None:
+            self.user_cache.put(user_id, user.as_dict())
+        return user
+
+    async def save(self, instance: User) -> User:
+        user = await super(UserService, self).save(instance)
+        self.user_cache.invalidate(user.id)
+        return user
+
+    async def save_many(self, instances: Iterable[User], batch_size: int = DEFAULT_WRITE_BATCH_SIZE) -> List[User]:
+        users = await super(UserService, self).save_many(instances, batch_size)
+        for user in users:
+            self.user_cache.invalidate(user.id)
+        return users
 
     async def permissions(self, user: UserType) -> Permissions:
         if user is Guest:
-            return Permissions(Guest, set())
-        try:
-            permissions = self._permissions[user.id]
-        except KeyError:
-            query = (select(self.columns([Group.permissions], entity=Group))
-                    .select_from(users_groups_association.join(
-                        Group,
-                        users_groups_association.c.group_id == Group.id
-                    ))
-                    .where(users_groups_association.c.user_id == user.id))
-
-            async with self.engine.acquire() as c:
-                csr = await c.execute(query)
-                groups = await csr.fetchall()
-                permissions = set()
-                map(lambda x: permissions.add(x['permissions']), groups)
-
-            permissions = Permissions(user, permissions)
-            self._permissions[user.id] = permissions
-
+            return Permissions(Guest, NO_PERMISSIONS)
+        user_id = user.id
+        permissions = await self.permission_cache.get(
+            user_id,
+            lambda: self._load_permissions(user_id),
+            redis=self.redis
+        )
+        return Permissions(user, permissions)
+
+    async def _load_permissions(self, user_id: int) -> Set[str]:
+        query = cached_statement('accounts.permissions', lambda: (
+            select(Group.permissions)
+            .select_from(users_groups_association.join(
+                Group,
+                users_groups_association.c.group_id == Group.id
+            ))
+            .where(users_groups_association.c.user_id == bindparam('user_id'))
+        ))
+        async with self.engine.connect() as c:
+            result = await c.execute(query, {'user_id': user_id})
+            permissions = set()
+            for group_permissions in result.scalars():
+                permissions.update(group_permissions)
         return permissions
 
+    # Permission changes
+    # ------------------
+
+    async def add_to_group(self, user_id: int, group_id: int) -> None:
+        query = (pg_insert(users_groups_association)
+                 .values(user_id=user_id, group_id=group_id)
+                 .on_conflict_do_nothing())
+        async with self.engine.begin() as c:
+            await c.execute(query)
+        await self.permission_cache.invalidate([user_id], redis=self.redis)
+
+    async def remove_from_group(self, user_id: int, group_id: int) -> None:
+        query = (users_groups_association.delete()
+                 .where(users_groups_association.c.user_id == user_id)
+                 .where(users_groups_association.c.group_id == group_id))
+        async with self.engine.begin() as c:
+            await c.execute(query)
+        await self.permission_cache.invalidate([user_id], redis=self.redis)
+
+    async def set_group_permissions(self, group_id: int, permissions: Iterable[str]) -> None:
+        query = (Group.__table__.update()
+                 .values(permissions=sorted(set(permissions)))
+                 .where(Group.id == group_id))
+        members = (select(users_groups_association.c.user_id)
+                   .where(users_groups_association.c.group_id == group_id))
+        async with self.engine.begin() as c:
+            await c.execute(query)
+            user_ids = (await c.execute(members)).scalars().all()
+        await self.permission_cache.invalidate(user_ids, redis=self.redis)
+
 
 class AuthService(SQLService):
 
@@ -64,43 +129,80 @@ class AuthService(SQLService):
             user_id = session[USER_KEY]
         except KeyError:
             return None
-        user = await self.user_service.get(User.id, user_id)
-        return user
+        return await self.user_service.get_by_id(user_id)
 
     async def user_from_integration(self, integration: ProfileIntegration) -> User:
         """ Returns either an existing user associated with a given 3rd-party integration, or a newly created one.
+        The access token of the integration is updated in the same statement.
 
         :param integration: integration credentials retrieved after successful OAuth authentication.
         :return: User entity
         """
-        query = (select(self.columns(entity=User))
-                .select_from(Auth.__table__.join(
-                    User,
-                    Auth.user_id == User.id
-                ))
-                .where(Auth.provider == integration.provider)
-                .where(Auth.provider_uid == integration.profile.id))
-
-        async with self.engine.acquire() as c:
-            csr = await c.execute(query)
-            user = await csr.fetchone()
-            if user is None:
-                log.debug('Creating a new user account from {provider} integration'.format(provider=integration.provider.value))
-                user = User(name=integration.profile.display_name)
-                user = await self.user_service.save(user)
-                # Insert auth entry
-                auth = Auth(provider=integration.provider,
-                            provider_uid=integration.profile.id,
-                            access_token=integration.access_token,
-                            user_id=user.id)
-                await self.save(auth)
-            else:
-                user = User(**dict(user))
-                # Update access token
-                query = (self.t.update()
-                        .values(access_token=integration.access_token)
-                        .where(Auth.provider == integration.provider)
-                        .where(Auth.provider_uid == integration.profile.id))
-                _csr_ = await c.execute(query)
-
-            return user
+        query = cached_statement('accounts.login', self._login_query)
+        params = {
+            'provider': integration.provider,
+            'provider_uid': integration.profile.id,
+            'access_token': integration.access_token,
+            'name': integration.profile.display_name,
+        }
+        for _ in range(2):
+            async with self.engine.connect() as c:
+                trans = await c.begin()
+                row = (await c.execute(query, params)).first()
+                if row is None:
+                    # A concurrent first login with the same integration has created the account,
+                    # roll back the user created by this statement and log in as that account.
+                    await trans.rollback()
+                    continue
+                await trans.commit()
+                return User(**row._asdict())
+        raise RuntimeError(f'Could not log in with {integration.provider.value} integration {integration.profile.id}')
+
+    @staticmethod
+    def _login_query():
+        """ Builds a statement that upserts the auth entry of an integration, creating a new user
+        if the integration is unknown, and selects the associated user::
+
+            WITH new_user AS (
+                INSERT INTO users (name) SELECT :name WHERE NOT EXISTS (<auth entry>) RETURNING users.*
+            ), upserted AS (
+                INSERT INTO auth (...) VALUES (..., coalesce((SELECT id FROM new_user), (<auth entry>)))
+                ON CONFLICT ON CONSTRAINT uniq_provider_provider_uid DO UPDATE SET access_token = ...
+                RETURNING auth.user_id
+            )
+            SELECT new_user.* FROM new_user WHERE id = (SELECT user_id FROM upserted)
+            UNION ALL
+            SELECT users.* FROM users JOIN upserted ON users.id = upserted.user_id
+
+        Rows inserted by a statement are not visible to its own SELECT, so a new user is selected
+        from ``new_user``, and an existing one from ``users``. If a concurrent transaction inserts
+        the same auth entry first, the result is empty.
+        """
+        users = User.__table__
+        auth = Auth.__table__
+        existing = (select(auth.c.user_id)
+                    .where(auth.c.provider == bindparam('provider'))
+                    .where(auth.c.provider_uid == bindparam('provider_uid')))
+
+        new_user = (users.insert()
+                    .from_select(['name'], select(bindparam('name', type_=users.c.name.type))
+                                           .where(~existing.exists()))
+                    .returning(*users.c)
+                    .cte('new_user'))
+
+        upsert = pg_insert(auth).values(
+            provider=bindparam('provider'),
+            provider_uid=bindparam('provider_uid'),
+            access_token=bindparam('access_token'),
+            user_id=func.coalesce(select(new_user.c.id).scalar_subquery(), existing.scalar_subquery()),
+        )
+        upserted = (upsert
+                    .on_conflict_do_update(constraint='uniq_provider_provider_uid',
+                                           set_={'access_token': upsert.excluded.access_token})
+                    .returning(auth.c.user_id)
+                    .cte('upserted'))
+
+        return union_all(
+            select(*new_user.c).where(new_user.c.id == select(upserted.c.user_id).scalar_subquery()),
+            select(*users.c).select_from(users.join(upserted, users.c.id == upserted.c.user_id)),
+        )
@@ -1,22 +1,40 @@
+import asyncio
+
 from solo.server.db.types import SQLEngine
 from solo.server.request import Request
+from solo.server.runtime.dependencies import Runtime
 from solo.apps.accounts.model import UserType
 from solo.apps.accounts.service import AuthService
-from solo.apps.accounts.service import USER_KEY
 from solo.vendor.old_session.old_session import SessionStore
 from .model import Guest
 
 
+# Request state key of the current user, it holds a future, so that
+# predicates and dependencies resolved concurrently share a single lookup
+CURRENT_USER_KEY = 'solo_current_user'
+
+
+async def _resolve_user(db: SQLEngine, request: Request) -> UserType:
+    auth_service = AuthService(db)
+    user = await auth_service.session_user(request)
+    return user or Guest
+
+
 async def get_user(store: SessionStore, db: SQLEngine, request: Request) -> UserType:
-    try:
-        user = request[USER_KEY]
-    except KeyError:
-        auth_service = AuthService(db)
-        user = await auth_service.session_user(request)
-        user = user or Guest
-        request[USER_KEY] = user
-    return user
+    """ Returns the user of the request session, or :class:`Guest`.
+    The user is resolved at most once per request.
+    """
+    user = request.get(CURRENT_USER_KEY)
+    if user is None:
+        user = request[CURRENT_USER_KEY] = asyncio.ensure_future(_resolve_user(db, request))
+    return await user
+
+
+def current_user(runtime: Runtime, request: Request):
+    """ Provider of :data:`solo.apps.accounts.model.CurrentUser` dependencies.
+    """
+    return get_user(runtime.session_storage, runtime.dbengine, request)
 
 
 async def allowed(user: UserType, permission: str) -> bool:
-    permissions = await user.permissions()
\ No newline at end of file
+    permissions = await user.permissions()
@@ -4,6 +4,7 @@ from asyncio import AbstractEventLoop
 import logging
 
 from solo.config.app import Config, EventLoopType
+from solo.server.codec import json_codec
 
 
 log = logging.getLogger(__name__)
@@ -11,6 +12,7 @@ log = logging.getLogger(__name__)
 
 def configure_io(solo_cfg: Config) -> AbstractEventLoop:
     decide_event_loop_policy(solo_cfg)
+    decide_json_codec(solo_cfg)
     loop = asyncio.get_event_loop()
     loop.set_debug(solo_cfg.debug)
     return loop
@@ -24,3 +26,10 @@ def decide_event_loop_policy(solo_cfg: Config) -> None:
         import uvloop
         asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     return
+
+
+def decide_json_codec(solo_cfg: Config) -> None:
+    """ Select JSON implementation used by renderers, sessions and models.
+    """
+    backend = json_codec.use(solo_cfg.server.json_backend)
+    log.debug('Using %s JSON codec', backend.value)
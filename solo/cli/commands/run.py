@@ -5,12 +5,15 @@ import logging
 import sys
 
 from solo.server.startup import application_entrypoint
-from solo.asyncio import configure_io
+from solo.asyncio import configure_io, decide_json_codec
 from solo.config.app import Config
+from solo.server.workers import run_workers
 
 
 def setup(subparsers: argparse._SubParsersAction):
     sub = subparsers.add_parser('run', help='Run solo application')
+    sub.add_argument('--workers', type=int, default=None,
+                     help='number of worker processes (default: server.workers from the config).')
     sub.set_defaults(func=entrypoint_cli_run)
     return sub
 
@@ -20,6 +23,12 @@ def entrypoint_cli_run(args: argparse.Namespace,
     """ Run project instance.
     """
     log = logging.getLogger('solo')
+    workers = args.workers or solo_cfg.server.workers
+    if workers > 1:
+        # Workers create their own event loops after forking
+        decide_json_codec(solo_cfg)
+        sys.exit(run_workers(solo_cfg, workers))
+
     loop = configure_io(solo_cfg)
 
     with application_entrypoint(loop, solo_cfg) as app_manager:
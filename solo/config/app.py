@@ -1,6 +1,6 @@
 from enum import Enum
 
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 from pyrsistent import pmap, pvector
 from pyrsistent.typing import PVector, PMap
@@ -13,10 +13,75 @@ class AppConfig(NamedTuple):
     setup: PVector[PMap] = pvector([])
 
 
+class SessionBackend(Enum):
+    # solo.vendor.old_session.old_session.SessionStore
+    REDIS = 'redis'
+    # solo.server.sessions.cookie.CookieSessionStore
+    COOKIE = 'cookie'
+
+
+class SessionCodecType(Enum):
+    # solo.server.sessions.codec.JsonSessionCodec
+    JSON = 'json'
+    # solo.server.sessions.codec.BinarySessionCodec
+    BINARY = 'binary'
+
+
 class Session(NamedTuple):
     cookie_name: str
     cookie_secure: bool
     cookie_httponly: bool
+    max_age: Optional[int] = None
+    """ Session lifetime in seconds, it is prolonged on every request that accesses the session.
+    Sessions don't expire when it's not set.
+    """
+    cache_size: int = 0
+    """ Number of decoded sessions cached by every worker, the cache is disabled when it's 0.
+    Workers drop cached sessions written by others on messages received over Redis pub/sub.
+    """
+    cache_ttl: float = 60
+    """ Seconds a session stays cached, it bounds staleness if invalidation messages are lost.
+    """
+    # redis/cookie
+    backend: SessionBackend = SessionBackend.REDIS
+    secret: str = ''
+    """ Secret used to sign and encrypt cookie sessions.
+    """
+    encrypt: bool = False
+    """ Encrypt cookie sessions, requires the ``cryptography`` package.
+    """
+    max_cookie_size: int = 3800
+    """ Cookie sessions that don't fit into this size are kept in Redis.
+    """
+    # json/binary, both read sessions written by the other one
+    codec: SessionCodecType = SessionCodecType.JSON
+    """ Binary sessions are smaller, but slower to encode and decode than JSON ones,
+    so JSON stays the default. Binary sessions can't contain values that JSON can't store.
+    """
+
+
+class CSRFPolicyType(Enum):
+    # solo.server.csrf.SessionCSRFStoragePolicy
+    SESSION = 'session'
+    # solo.server.csrf.HMACCSRFStoragePolicy
+    HMAC = 'hmac'
+
+
+class CSRF(NamedTuple):
+    # session/hmac
+    policy: CSRFPolicyType = CSRFPolicyType.SESSION
+    secret: str = ''
+    """ Secret used to sign HMAC tokens.
+    """
+    max_age: int = 12 * 3600
+    """ Lifetime of HMAC tokens in seconds.
+    """
+    cookie_name: str = 'csrf'
+    """ Cookie with the client id that HMAC tokens are bound to.
+    """
+    trusted_origins: PVector[str] = pvector([])
+    """ Origins trusted by ``check_csrf_origin`` in addition to the host of a request.
+    """
 
 
 class Redis(NamedTuple):
@@ -35,6 +100,14 @@ class Postgresql(NamedTuple):
     port: int = 5432
     min_connections: int = 1
     max_connections: int = 10
+    prepare_threshold: Optional[int] = 5
+    """ Number of executions of the same query on a connection after which psycopg prepares it
+    on the server, 0 prepares all queries, and queries are never prepared when it's not set.
+    Must not be set when connecting through PgBouncer in transaction pooling mode.
+    """
+    statement_cache_size: int = 500
+    """ Number of compiled SQL statements that SQLAlchemy caches.
+    """
 
 
 class EventLoopType(Enum):
@@ -42,6 +115,21 @@ class EventLoopType(Enum):
     UVLOOP = 'uvloop'
 
 
+class RouterType(Enum):
+    # solo.server.routing.Router
+    RADIX = 'radix'
+    # routes.Mapper
+    MAPPER = 'mapper'
+
+
+class JsonBackend(Enum):
+    # the fastest installed backend, see solo.server.codec
+    AUTO = 'auto'
+    ORJSON = 'orjson'
+    UJSON = 'ujson'
+    STDLIB = 'stdlib'
+
+
 class Server(NamedTuple):
     public_uri: str = 'http://127.0.0.1:8000'
     host: str = '127.0.0.1'
@@ -50,6 +138,23 @@ class Server(NamedTuple):
     keep_alive_timeout: int = 30
     # asyncio/uvloop
     event_loop: EventLoopType = EventLoopType.ASYNCIO
+    # radix/mapper
+    router: RouterType = RouterType.MAPPER
+    """ The radix router matches faster, but it prefers static segments over parameters
+    regardless of the registration order, and regex parameters can't span several segments,
+    see :mod:`solo.server.routing`.
+    """
+    max_body_size: int = 10 * 1024 * 1024
+    """ Maximum size of a request body in bytes. Larger bodies are rejected with HTTP 413.
+    """
+    # auto/orjson/ujson/stdlib
+    json_backend: JsonBackend = JsonBackend.AUTO
+    workers: int = 1
+    """ Number of worker processes forked by ``solo run``, can be overridden with ``--workers``.
+    """
+    backlog: int = 2048
+    """ Maximum number of pending connections of a listening socket.
+    """
 
 
 class Testing(NamedTuple):
@@ -66,6 +171,7 @@ class Config(NamedTuple):
     debug: bool = True
     postgresql: Postgresql = Postgresql()
     redis: Redis = Redis()
+    csrf: CSRF = CSRF()
     testing: Testing = Testing()
 
 
@@ -4,7 +4,7 @@
 import inspect
 import logging
 import pkgutil
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Callable, Awaitable
 from types import ModuleType
 
 import ramlfications as raml
@@ -12,8 +12,8 @@ import venusian
 from pyrsistent import pmap, pvector
 
 from solo.server.app import App
-from solo.server.csrf import SessionCSRFStoragePolicy
-from ..config.app import Config, AppConfig
+from solo.server.csrf import SessionCSRFStoragePolicy, HMACCSRFStoragePolicy, CSRFStoragePolicy
+from ..config.app import Config, AppConfig, CSRFPolicyType
 from .util import maybe_dotted
 from .config.rendering import BUILTIN_RENDERERS
 from .config.rendering import RenderingConfigurator
@@ -25,6 +25,7 @@ from .registry import Registry
 from .path import caller_package
 from .view import http_defaults
 from solo.server.definitions import PredicatedHandler
+from solo.server.routing import Router
 from .view import http_endpoint
 from .url import normalize_route_pattern, complete_route_pattern, complete_url_rules
 
@@ -34,6 +35,18 @@ __all__ = ['http_endpoint', 'http_defaults', 'Configurator']
 log = logging.getLogger(__name__)
 
 
+def make_csrf_policy(config: Config) -> CSRFStoragePolicy:
+    csrf = config.csrf
+    if csrf.policy is CSRFPolicyType.HMAC:
+        if not csrf.secret:
+            raise ConfigurationError('HMAC CSRF policy requires csrf.secret to be set.')
+        return HMACCSRFStoragePolicy(csrf.secret,
+                                     max_age=csrf.max_age,
+                                     cookie_name=csrf.cookie_name,
+                                     secure=config.session.cookie_secure)
+    return SessionCSRFStoragePolicy()
+
+
 class Configurator:
     venusian = venusian
     inspect = inspect
@@ -50,12 +63,15 @@ class Configurator:
             route_prefix = ''
         self.app = app
         self.registry = Registry(config=config,
-                                 csrf_policy=SessionCSRFStoragePolicy())
+                                 csrf_policy=make_csrf_policy(config),
+                                 settings={},
+                                 shutdown_hooks=[])
         self.router = router_configurator(app.url_gen, route_prefix)
         self.views = views_configurator(app)
         self.rendering = rendering_configurator(app)
         self.sums = sum_types_configurator()
         self._directives = pmap({})
+        self._compiled_router = Router()
         self.setup_configurator()
 
     def include(self, callable, route_prefix: Optional[str] = None) -> None:
@@ -94,6 +110,12 @@ class Configurator:
         self.router.change_namespace(old_namespace)
         self.router.change_route_prefix(old_route_prefix)
 
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[None]]) -> None:
+        """ Register a coroutine function that releases resources of an application,
+        e.g. closes its network connections, when the application stops serving requests.
+        """
+        self.registry.shutdown_hooks.append(hook)
+
     def include_api_specs(self, pkg_name: str, path: str) -> None:
         log.debug(f'Including API specs: {pkg_name}:{path}')
         data: bytes = pkgutil.get_data(pkg_name, path)
@@ -151,6 +173,7 @@ class Configurator:
                 requirements=requirements,
                 controller=handler
             )
+            self._compiled_router.add(route.pattern, route.rules, handler)
         return webapp
 
     def setup_configurator(self) -> None:
@@ -192,4 +215,5 @@ class Configurator:
         return m
 
     def complete(self) -> Tuple[App, Registry]:
+        self.app = self.app._replace(router=self._compiled_router)
         return self.app, self.registry
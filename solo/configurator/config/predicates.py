@@ -8,6 +8,8 @@ from .util import as_sorted_tuple
 
 
 class RequestMethodPredicate:
+    is_async = False
+
     def __init__(self, val: Tuple[HttpMethod, ...], config, raises: Optional[Http4xx] = None):
         """ Predicates are constructed at ``solo.configurator.config.util.PredicateList.make()``
 
@@ -26,5 +28,5 @@ class RequestMethodPredicate:
 
     phash = text
 
-    async def __call__(self, runtime: Runtime, request: Request) -> bool:
+    def __call__(self, runtime: Runtime, request: Request) -> bool:
         return request.method in self.val
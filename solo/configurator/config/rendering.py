@@ -1,39 +1,44 @@
-import json
 from typing import Dict, Any
 
 from solo.server.app import App
 from solo.server.request import Request
-from solo.server.response import _response_jsonapi, response_json, Response
+from solo.server.response import _response_jsonapi, response_json, response_text, Response, content_type_header
+from solo.services.pagination import Page, next_page_link
 
 
-json_encode = json.dumps
+class BaseRendererFactory:
+    content_type = 'application/octet-stream'
+    charset = None
 
-
-class JsonApiRendererFactory:
     def __init__(self, name: str):
         self.name = name
+        # Encoded once per renderer rather than once per response
+        self.headers = content_type_header(self.content_type, self.charset)
+
+
+class JsonApiRendererFactory(BaseRendererFactory):
+    content_type = 'application/vnd.api+json'
 
     def __call__(self, request: Request, view_response: Dict[str, Any]) -> Response:
-        return _response_jsonapi(200, view_response)
+        if isinstance(view_response, Page):
+            return _response_jsonapi(200, view_response.items, self.headers,
+                                     links={'next': next_page_link(request, view_response)})
+        return _response_jsonapi(200, view_response, self.headers)
 
 
-class JsonRendererFactory:
-    def __init__(self, name: str):
-        self.name = name
+class JsonRendererFactory(BaseRendererFactory):
+    content_type = 'application/json'
 
     def __call__(self, request: Request, view_response: Dict[str, Any]) -> Response:
-        return response_json(200, view_response)
+        return response_json(200, view_response, self.headers)
 
 
-class StringRendererFactory:
-    def __init__(self, name: str):
-        self.name = name
+class StringRendererFactory(BaseRendererFactory):
+    content_type = 'text/plain'
+    charset = 'utf-8'
 
     def __call__(self, request: Request, view_response: Any) -> Response:
-        return Response(text=str(view_response),
-                        content_type='text/plain',
-                        charset='utf-8',
-                        status=200)
+        return response_text(200, str(view_response), self.headers)
 
 
 BUILTIN_RENDERERS = {
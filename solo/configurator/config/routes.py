@@ -81,14 +81,25 @@ class RoutesConfigurator:
 
 
 class ViewMeta:
-    __slots__ = ['route_name', 'view', 'attr', 'renderer', 'predicates']
+    __slots__ = ['route_name', 'view', 'attr', 'renderer', 'request_methods', 'predicates', 'check',
+                 'async_predicates', 'dispatch']
 
-    def __init__(self, route_name: str, view, attr: Optional[str], renderer: str, predicates):
+    def __init__(self, route_name: str, view, attr: Optional[str], renderer: str, request_methods, predicates,
+                 check, async_predicates, dispatch):
         self.route_name = route_name
         self.view = view
         self.attr = attr
         self.renderer = renderer
+        # Request methods are checked by a method index of solo.server.definitions.PredicatedHandler,
+        # therefore they are not a part of view predicates. None means any method.
+        self.request_methods = request_methods
         self.predicates = predicates
+        # All pure predicates fused into a single synchronous check, or None.
+        # It runs before any of async_predicates is awaited.
+        self.check = check
+        self.async_predicates = async_predicates
+        # solo.server.runtime.dependencies.DispatchPlan
+        self.dispatch = dispatch
 
 
 class Route(NamedTuple):
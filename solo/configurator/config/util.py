@@ -1,5 +1,6 @@
+import inspect
 from hashlib import md5
-from typing import Iterable, TypeVar, Tuple
+from typing import Iterable, TypeVar, Tuple, Optional, Callable, Any, Sequence
 
 from ..registry import predvalseq
 from ..compat import (
@@ -60,11 +61,45 @@ class not_(object):
         self.value = value
 
 
+def predicate_is_async(predicate) -> bool:
+    """ Predicates declare whether they need to be awaited with the ``is_async`` attribute.
+    Predicates that don't declare it are inspected.
+    """
+    is_async = getattr(predicate, 'is_async', None)
+    if is_async is None:
+        is_async = inspect.iscoroutinefunction(predicate.__call__)
+    return is_async
+
+
+def compile_predicates(predicates: Sequence[Any]) -> Tuple[Optional[Callable[[Any, Any], bool]], Tuple[Any, ...]]:
+    """ Split predicates into a single synchronous check fused from all pure predicates,
+    and a tuple of predicates that must be awaited. The relative order of predicates within
+    both groups is preserved.
+
+    :return: 2-tuple of (pure check or None, async predicates)
+    """
+    pure = tuple(p for p in predicates if not predicate_is_async(p))
+    awaitable = tuple(p for p in predicates if predicate_is_async(p))
+    if not pure:
+        return None, awaitable
+    if len(pure) == 1:
+        return pure[0], awaitable
+
+    def check(runtime, request) -> bool:
+        for predicate in pure:
+            if not predicate(runtime, request):
+                return False
+        return True
+
+    return check, awaitable
+
+
 class Notted(object):
     """ This class is a copy of ``pyramid.config.util.Notted``
     """
     def __init__(self, predicate):
         self.predicate = predicate
+        self.is_async = predicate_is_async(predicate)
 
     def _notted_text(self, val):
         # if the underlying predicate doesnt return a value, it's not really
@@ -80,8 +115,16 @@ class Notted(object):
     def phash(self):
         return self._notted_text(self.predicate.phash())
 
-    def __call__(self, context, request):
-        result = self.predicate(context, request)
+    def __call__(self, runtime, request):
+        result = self.predicate(runtime, request)
+        if self.is_async:
+            return self._notted_async(result)
+        return self._notted_result(result)
+
+    async def _notted_async(self, result):
+        return self._notted_result(await result)
+
+    def _notted_result(self, result):
         phash = self.phash()
         if phash:
             result = not result
@@ -1,11 +1,12 @@
 import inspect
-from typing import Optional
+from typing import Optional, Any
 
 from solo.server.definitions import HttpMethod
+from solo.server.runtime.dependencies import compile_dispatch_plan, DEPENDENCIES, Provider
 from . import predicates as default_predicates
 from ..util import viewdefaults
 from .routes import ViewMeta
-from .util import PredicateList
+from .util import PredicateList, compile_predicates
 from ..exceptions import ConfigurationError
 from solo.server.app import App
 
@@ -16,6 +17,7 @@ class ViewsConfigurator:
         self.app = app
         self.available_permissions = set()
         self.predicates = PredicateList()
+        self.dependencies = DEPENDENCIES
 
     @viewdefaults
     def add_view(self,
@@ -94,19 +96,33 @@ class ViewsConfigurator:
             )
         predlist = self.get_predlist('view')
         _weight_, preds, _phash_ = predlist.make(self, **pvals)
+        request_methods = None
+        for pred in preds:
+            if isinstance(pred, default_predicates.RequestMethodPredicate):
+                request_methods = pred.val
+        preds = [p for p in preds if not isinstance(p, default_predicates.RequestMethodPredicate)]
+        check, async_preds = compile_predicates(preds)
 
         # Renderers
         # -------------------------------------
         if renderer is None:
             renderer = 'string'
 
+        # Dispatch plan
+        # -------------------------------------
+        dispatch = compile_dispatch_plan(view, attr, self.dependencies)
+
         # Done
         # -------------------------------------
         view_item = ViewMeta(route_name=route_name,
                              view=view,
                              attr=attr,
                              renderer=renderer,
-                             predicates=preds)
+                             request_methods=request_methods,
+                             predicates=preds,
+                             check=check,
+                             async_predicates=async_preds,
+                             dispatch=dispatch)
         return view_item
 
     def get_predlist(self, name: str):
@@ -140,6 +156,12 @@ class ViewsConfigurator:
             weighs_less_than=weighs_less_than
             )
 
+    def add_dependency(self, dep_type: Any, provider: Provider) -> None:
+        """ Register a provider of view callable arguments annotated with ``dep_type``.
+        It applies to views that are added after the call.
+        """
+        self.dependencies = self.dependencies.set(dep_type, provider)
+
     def add_default_view_predicates(self):
         p = default_predicates
         for name, factory in (
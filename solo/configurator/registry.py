@@ -1,7 +1,7 @@
-from typing import NamedTuple, Dict, Any
+from typing import NamedTuple, Dict, Any, List, Callable, Awaitable
 
 from ..config.app import Config
-from ..server.csrf import SessionCSRFStoragePolicy
+from ..server.csrf import CSRFStoragePolicy
 
 
 class predvalseq(tuple):
@@ -13,5 +13,8 @@ class predvalseq(tuple):
 
 class Registry(NamedTuple):
     config: Config
-    csrf_policy: SessionCSRFStoragePolicy
-    settings: Dict[str, Any] = {}
\ No newline at end of file
+    csrf_policy: CSRFStoragePolicy
+    settings: Dict[str, Any] = {}
+    shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+    """ Coroutine functions awaited when the application stops serving requests.
+    """
\ No newline at end of file
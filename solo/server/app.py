@@ -1,10 +1,11 @@
 import logging
-from typing import NamedTuple, Awaitable
+from typing import NamedTuple, Awaitable, Optional
 
 import routes
 from redis import asyncio as aioredis
 
 from solo.server.db import SQLEngine
+from solo.server.routing import Router
 from solo.types import IO
 
 logger = logging.getLogger(__name__)
@@ -13,5 +14,7 @@ logger = logging.getLogger(__name__)
 class App(NamedTuple):
     route_map: routes.Mapper
     url_gen: routes.URLGenerator
-    db_engine: SQLEngine
-    memstore: IO[aioredis.Redis]
+    # pools are not created in the supervisor of forked workers
+    db_engine: Optional[SQLEngine]
+    memstore: Optional[IO[aioredis.Redis]]
+    router: Optional[Router] = None
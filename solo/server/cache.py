@@ -0,0 +1,79 @@
+""" In-process caches shared by the server components.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class LRUCache(Generic[K, V]):
+    """ A size-bounded mapping that evicts the least recently used entries.
+    """
+    __slots__ = ('maxsize', '_data', 'hits', 'misses')
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError('Cache size must be positive.')
+        self.maxsize = maxsize
+        self._data: 'OrderedDict[K, V]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def discard(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TTLCache(LRUCache[K, V]):
+    """ An LRU cache whose entries also expire ``ttl`` seconds after they were put.
+    Expired entries are dropped when they are looked up, or evicted as the least recently used ones.
+    """
+    __slots__ = ('ttl', '_timer')
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic) -> None:
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._timer = timer
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry: Optional[Tuple[float, V]] = super().get(key)
+        if entry is None:
+            return default
+        if entry[0] < self._timer():
+            del self._data[key]
+            # the lookup was counted as a hit
+            self.hits -= 1
+            self.misses += 1
+            return default
+        return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        super().put(key, (self._timer() + self.ttl, value))
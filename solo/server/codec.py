@@ -0,0 +1,67 @@
+""" JSON codec shared by renderers, sessions, models and request parsers.
+
+The codec is selected once at startup with :meth:`JsonCodec.use`, call sites
+always go through :data:`json_codec` so that they pick up the selected backend:
+
+* ``orjson`` and ``ujson`` are used when they are installed;
+* the standard library :mod:`json` is the fallback.
+"""
+import json
+from typing import Any, Callable, Union
+
+from solo.config.app import JsonBackend
+
+
+class JsonCodec:
+    """ Encodes values to UTF-8 JSON bytes and decodes JSON from bytes or strings.
+    """
+    __slots__ = ('backend', 'dumps', 'loads')
+
+    def __init__(self) -> None:
+        self.backend = JsonBackend.STDLIB
+        self.dumps: Callable[[Any], bytes] = _stdlib_dumps
+        self.loads: Callable[[Union[bytes, str]], Any] = json.loads
+
+    def dumps_str(self, data: Any) -> str:
+        return self.dumps(data).decode('utf-8')
+
+    def use(self, backend: JsonBackend = JsonBackend.AUTO) -> JsonBackend:
+        """ Switch the codec to a given backend. ``AUTO`` picks the fastest installed one.
+
+        :raise ImportError: if the requested backend is not installed.
+        """
+        if backend is JsonBackend.AUTO:
+            for candidate in (JsonBackend.ORJSON, JsonBackend.UJSON):
+                try:
+                    return self.use(candidate)
+                except ImportError:
+                    continue
+            return self.use(JsonBackend.STDLIB)
+
+        if backend is JsonBackend.ORJSON:
+            import orjson
+            option = orjson.OPT_NON_STR_KEYS
+            self.dumps = lambda data: orjson.dumps(data, option=option)
+            self.loads = orjson.loads
+
+        elif backend is JsonBackend.UJSON:
+            import ujson
+            self.dumps = lambda data: ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+            self.loads = ujson.loads
+
+        else:
+            self.dumps = _stdlib_dumps
+            self.loads = json.loads
+
+        self.backend = backend
+        return backend
+
+    def __repr__(self) -> str:
+        return f'<JsonCodec {self.backend.value}>'
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return json.dumps(data).encode('utf-8')
+
+
+json_codec = JsonCodec()
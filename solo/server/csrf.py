@@ -1,9 +1,30 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import secrets
+import time
 import uuid
-from urllib.parse import  urlparse
+from http.cookies import SimpleCookie
+from typing import Optional, Sequence, Union
+from urllib.parse import urlparse
 
+from solo.server.request import Request
+from solo.server.response import RawHeaders
+from solo.server.statuses import BadCSRFToken, BadCSRFOrigin
 from solo.vendor.old_session.old_session import get_session
 
 
+# Request state keys
+# ------------------
+# solo.configurator.registry.Registry that serves the request, set by the HTTP handler
+REGISTRY_KEY = 'solo_registry'
+# Set-Cookie headers that the HTTP handler adds to the response
+CSRF_COOKIE_KEY = 'solo_csrf_cookie'
+# client id of HMACCSRFStoragePolicy issued during the request
+CSRF_CLIENT_KEY = 'solo_csrf_client'
+
+
 class SessionCSRFStoragePolicy:
     """ Taken from
     https://github.com/Pylons/pyramid/blob/3ee04cc62205b10eb9041b0df5e156936765202f/pyramid/csrf.py#L57
@@ -46,101 +67,198 @@ class SessionCSRFStoragePolicy:
         return expected_token == supplied_token
 
 
-def get_csrf_token(request):
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class HMACCSRFStoragePolicy:
+    """ A CSRF storage policy that keeps nothing on the server.
+
+    Tokens have the form ``<expiration time>.<signature>``, where the signature is
+    an HMAC-SHA256 of the expiration time and of a random client id, keyed with a server secret.
+    The client id is issued in a separate cookie on the first call of :meth:`get_csrf_token`,
+    so a token is valid only for the browser that received it ("signed double-submit cookie").
+    Issuing and verifying tokens never touches the session store.
+
+    The client id isn't derived from the session id, because new sessions don't have ids until
+    they are saved, and ids of cookie sessions change with every write.
+
+    ``secret``
+
+        Server secret, tokens are invalidated when it changes.
+
+    ``max_age``
+
+        Lifetime of tokens in seconds.
+
+    """
+    def __init__(self,
+                 secret: str, *,
+                 max_age: int = 12 * 3600,
+                 cookie_name: str = 'csrf',
+                 secure: bool = False,
+                 path: str = '/') -> None:
+        if not secret:
+            raise ValueError('HMAC CSRF tokens require a secret.')
+        self._key = hmac.new(secret.encode('utf-8'), b'solo.csrf', hashlib.sha256).digest()
+        self.max_age = max_age
+        self.cookie_name = cookie_name
+        self._secure = secure
+        self._path = path
+
+    def _sign(self, client_id: str, expires: str) -> bytes:
+        return hmac.new(self._key, f'{client_id}.{expires}'.encode('ascii'), hashlib.sha256).digest()
+
+    def _make_token(self, client_id: str) -> str:
+        expires = format(int(time.time()) + self.max_age, 'x')
+        return expires + '.' + _b64encode(self._sign(client_id, expires))
+
+    def _client_id(self, request: Request) -> Optional[str]:
+        client_id = request.get(CSRF_CLIENT_KEY)
+        if client_id is not None:
+            return client_id
+        cookie_header = request.headers.get('cookie')
+        if not cookie_header:
+            return None
+        cookie = SimpleCookie(cookie_header).get(self.cookie_name)
+        # Issued client ids are ASCII, other values can't be signed and are treated as missing
+        if cookie is None or not cookie.value or not cookie.value.isascii():
+            return None
+        return cookie.value
+
+    def cookie_headers(self, client_id: str) -> RawHeaders:
+        cookie = SimpleCookie()
+        cookie[self.cookie_name] = client_id
+        morsel = cookie[self.cookie_name]
+        morsel['path'] = self._path
+        morsel['httponly'] = True
+        morsel['samesite'] = 'Lax'
+        if self._secure:
+            morsel['secure'] = True
+        return ((b'set-cookie', morsel.OutputString().encode('latin-1')),)
+
+    async def new_csrf_token(self, request: Request) -> str:
+        """ Issues a new client id and returns a token for it. Tokens issued earlier
+        to the same client become invalid. """
+        client_id = secrets.token_urlsafe(16)
+        request[CSRF_CLIENT_KEY] = client_id
+        request[CSRF_COOKIE_KEY] = self.cookie_headers(client_id)
+        return self._make_token(client_id)
+
+    async def get_csrf_token(self, request: Request) -> str:
+        """ Returns a fresh token for the client, issuing a client id if needed. """
+        client_id = self._client_id(request)
+        if client_id is None:
+            return await self.new_csrf_token(request)
+        return self._make_token(client_id)
+
+    async def check_csrf_token(self, request: Request, supplied_token: str) -> bool:
+        """ Returns ``True`` if the ``supplied_token`` is valid."""
+        client_id = self._client_id(request)
+        if client_id is None:
+            return False
+        expires, _, signature = supplied_token.partition('.')
+        try:
+            if int(expires, 16) < time.time():
+                return False
+            return hmac.compare_digest(self._sign(client_id, expires), _b64decode(signature))
+        except (binascii.Error, ValueError):
+            return False
+
+
+CSRFStoragePolicy = Union[SessionCSRFStoragePolicy, HMACCSRFStoragePolicy]
+
+
+def _get_policy(request: Request) -> CSRFStoragePolicy:
+    return request[REGISTRY_KEY].csrf_policy
+
+
+async def get_csrf_token(request: Request) -> str:
     """ Taken from
     https://github.com/Pylons/pyramid/blob/3ee04cc62205b10eb9041b0df5e156936765202f/pyramid/csrf.py#L159
 
     Get the currently active CSRF token for the request passed, generating
     a new one using ``new_csrf_token(request)`` if one does not exist. This
     calls the equivalent method in the chosen CSRF protection implementation.
-
-    .. versionadded :: 1.9
-
     """
-    registry = request.registry
-    csrf = registry.getUtility(ICSRFStoragePolicy)
-    return csrf.get_csrf_token(request)
+    return await _get_policy(request).get_csrf_token(request)
 
 
-def new_csrf_token(request):
+async def new_csrf_token(request: Request) -> str:
     """ Taken from
     https://github.com/Pylons/pyramid/blob/3ee04cc62205b10eb9041b0df5e156936765202f/pyramid/csrf.py#L172
 
     Generate a new CSRF token for the request passed and persist it in an
     implementation defined manner. This calls the equivalent method in the
     chosen CSRF protection implementation.
-
-    .. versionadded :: 1.9
-
     """
-    registry = request.registry
-    csrf = registry.getUtility(ICSRFStoragePolicy)
-    return csrf.new_csrf_token(request)
+    return await _get_policy(request).new_csrf_token(request)
 
 
-def check_csrf_token(request,
-                     token='csrf_token',
-                     header='X-CSRF-Token',
-                     raises=True):
+async def check_csrf_token(request: Request,
+                           token: Optional[str] = 'csrf_token',
+                           header: Optional[str] = 'X-CSRF-Token',
+                           raises: bool = True) -> bool:
     """ Taken from
     https://github.com/Pylons/pyramid/blob/3ee04cc62205b10eb9041b0df5e156936765202f/pyramid/csrf.py#L185
 
-    Check the CSRF token returned by the
-    :class:`pyramid.interfaces.ICSRFStoragePolicy` implementation against the
-    value in ``request.POST.get(token)`` (if a POST request) or
-    ``request.headers.get(header)``. If a ``token`` keyword is not supplied to
-    this function, the string ``csrf_token`` will be used to look up the token
-    in ``request.POST``. If a ``header`` keyword is not supplied to this
-    function, the string ``X-CSRF-Token`` will be used to look up the token in
-    ``request.headers``.
-
-    If the value supplied by post or by header cannot be verified by the
-    :class:`pyramid.interfaces.ICSRFStoragePolicy`, and ``raises`` is
-    ``True``, this function will raise an
-    :exc:`pyramid.exceptions.BadCSRFToken` exception. If the values differ
-    and ``raises`` is ``False``, this function will return ``False``.  If the
-    CSRF check is successful, this function will return ``True``
-    unconditionally.
-
-    See :ref:`auto_csrf_checking` for information about how to secure your
-    application automatically against CSRF attacks.
-
-    .. versionadded:: 1.4a2
-
-    .. versionchanged:: 1.7a1
-       A CSRF token passed in the query string of the request is no longer
-       considered valid. It must be passed in either the request body or
-       a header.
-
-    .. versionchanged:: 1.9
-       Moved from :mod:`pyramid.session` to :mod:`pyramid.csrf` and updated
-       to use the configured :class:`pyramid.interfaces.ICSRFStoragePolicy` to
-       verify the CSRF token.
-
+    Check the CSRF token returned by the configured CSRF policy
+    (:attr:`solo.configurator.registry.Registry.csrf_policy`) against the
+    value of the ``token`` field of an urlencoded request body, or
+    ``request.headers.get(header)``. A token passed in the query string
+    is never considered valid.
+
+    If the supplied value cannot be verified by the policy, and ``raises`` is
+    ``True``, this function will raise a :exc:`solo.server.statuses.BadCSRFToken`
+    exception. If the values differ and ``raises`` is ``False``, this function
+    will return ``False``. If the CSRF check is successful, this function will
+    return ``True`` unconditionally.
     """
     supplied_token = ""
     # We first check the headers for a csrf token, as that is significantly
-    # cheaper than checking the POST body
+    # cheaper than reading the body
     if header is not None:
         supplied_token = request.headers.get(header, "")
 
-    # If this is a POST/PUT/etc request, then we'll check the body to see if it
-    # has a token. We explicitly use request.POST here because CSRF tokens
-    # should never appear in an URL as doing so is a security issue. We also
-    # explicitly check for request.POST here as we do not support sending form
-    # encoded data over anything but a request.POST.
+    # Request.form() is empty unless the body is urlencoded, form encoded data
+    # is accepted with any method that has a body.
     if supplied_token == "" and token is not None:
-        supplied_token = request.POST.get(token, "")
+        supplied_token = (await request.form()).get(token, [""])[0]
 
-    policy = request.registry.getUtility(ICSRFStoragePolicy)
-    if not policy.check_csrf_token(request, text_(supplied_token)):
+    if not await _get_policy(request).check_csrf_token(request, supplied_token):
         if raises:
             raise BadCSRFToken('check_csrf_token(): Invalid token')
         return False
     return True
 
 
-def check_csrf_origin(request, trusted_origins=None, raises=True):
+def is_same_domain(host: str, pattern: str) -> bool:
+    """ Taken from Pyramid's ``pyramid.util.is_same_domain``
+
+    Return ``True`` if the host is either an exact match or a match
+    to the wildcard pattern.
+    Any pattern beginning with a period matches a domain and all of its
+    subdomains. (e.g. ``.example.com`` matches ``example.com`` and
+    ``foo.example.com``). Anything else is an exact string match.
+    """
+    if not pattern:
+        return False
+
+    pattern = pattern.lower()
+    return (
+        pattern[0] == "." and
+        (host.endswith(pattern) or host == pattern[1:]) or
+        pattern == host
+    )
+
+
+def check_csrf_origin(request: Request,
+                      trusted_origins: Optional[Sequence[str]] = None,
+                      raises: bool = True) -> bool:
     """ Taken from
     https://github.com/Pylons/pyramid/blob/3ee04cc62205b10eb9041b0df5e156936765202f/pyramid/csrf.py#L244
 
@@ -149,7 +267,7 @@ def check_csrf_origin(request, trusted_origins=None, raises=True):
 
     If the value supplied by the ``Origin`` or ``Referer`` header isn't one of the
     trusted origins and ``raises`` is ``True``, this function will raise a
-    :exc:`pyramid.exceptions.BadCSRFOrigin` exception, but if ``raises`` is
+    :exc:`solo.server.statuses.BadCSRFOrigin` exception, but if ``raises`` is
     ``False``, this function will return ``False`` instead. If the CSRF origin
     checks are successful this function will return ``True`` unconditionally.
 
@@ -157,16 +275,10 @@ def check_csrf_origin(request, trusted_origins=None, raises=True):
     ports if non-standard like ``['example.com', 'dev.example.com:8080']``) in
     with the ``trusted_origins`` parameter. If ``trusted_origins`` is ``None``
     (the default) this list of additional domains will be pulled from the
-    ``pyramid.csrf_trusted_origins`` setting.
+    ``csrf.trusted_origins`` setting.
 
     Note that this function will do nothing if ``request.scheme`` is not
     ``https``.
-
-    .. versionadded:: 1.7
-
-    .. versionchanged:: 1.9
-       Moved from :mod:`pyramid.session` to :mod:`pyramid.csrf`
-
     """
     def _fail(reason):
         if raises:
@@ -192,9 +304,10 @@ def check_csrf_origin(request, trusted_origins=None, raises=True):
         # we can use strict Referer checking.
 
         # Determine the origin of this request
-        origin = request.headers.get("Origin")
+        headers = request.headers
+        origin = headers.get("origin")
         if origin is None:
-            origin = request.referrer
+            origin = headers.get("referer")
 
         # Fail if we were not able to locate an origin at all
         if not origin:
@@ -202,7 +315,7 @@ def check_csrf_origin(request, trusted_origins=None, raises=True):
 
         # Parse our origin so we we can extract the required information from
         # it.
-        originp = urlparse.urlparse(origin)
+        originp = urlparse(origin)
 
         # Ensure that our Referer is also secure.
         if originp.scheme != "https":
@@ -214,15 +327,14 @@ def check_csrf_origin(request, trusted_origins=None, raises=True):
         # Determine which origins we trust, which by default will include the
         # current origin.
         if trusted_origins is None:
-            trusted_origins = aslist(
-                request.registry.settings.get(
-                    "pyramid.csrf_trusted_origins", [])
-            )
-
-        if request.host_port not in set(["80", "443"]):
-            trusted_origins.append("{0.domain}:{0.host_port}".format(request))
-        else:
-            trusted_origins.append(request.domain)
+            trusted_origins = request[REGISTRY_KEY].config.csrf.trusted_origins
+        trusted_origins = list(trusted_origins)
+
+        # The Host header includes the port only if it's not the default one,
+        # the same way as the Origin header does.
+        host = headers.get("host")
+        if host:
+            trusted_origins.append(host)
 
         # Actually check to see if the request's origin matches any of our
         # trusted origins.
@@ -29,6 +29,8 @@ def setup_database(config: Config) -> AsyncEngine:
         url=url,
         pool_size=db_conf.min_connections,
         max_overflow=db_conf.max_connections,
+        query_cache_size=db_conf.statement_cache_size,
+        connect_args={'prepare_threshold': db_conf.prepare_threshold},
         echo=config.debug
     )
     return engine
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import NamedTuple, Dict, List, Mapping
+from typing import NamedTuple, Dict, List, Mapping, Tuple, Optional
 
 from pyrsistent.typing import PMap
 
@@ -11,11 +11,19 @@ class HttpMethod(Enum):
     HEAD = 'head'
     GET = 'get'
     POST = 'post'
+    PUT = 'put'
+    PATCH = 'patch'
+    DELETE = 'delete'
+    OPTIONS = 'options'
 
     def __lt__(self, other: 'HttpMethod') -> bool:
         return self.value.__lt__(other.value)
 
 
+# ASGI scope contains upper-case method names
+HTTP_METHODS: Mapping[str, HttpMethod] = {m.value.upper(): m for m in HttpMethod}
+
+
 class ScopeType(Enum):
     HTTP_REQUEST = 'http'
 
@@ -42,11 +50,22 @@ class Scope(NamedTuple):
 
 
 class PredicatedHandler:
-    __slots__ = ('rules', 'view_metas')
+    __slots__ = ('rules', 'view_metas', 'views_by_method', 'allow')
 
     def __init__(self, rules: Dict[str, SumType], view_metas: List[ViewMeta]):
         self.view_metas = view_metas
         self.rules = rules
+        views_by_method: Dict[HttpMethod, List[ViewMeta]] = {}
+        for view_item in view_metas:
+            # views without a request method constraint handle any method
+            methods = view_item.request_methods or tuple(HttpMethod)
+            for method in methods:
+                views_by_method.setdefault(method, []).append(view_item)
+        self.views_by_method: Mapping[HttpMethod, Tuple[ViewMeta, ...]] = {
+            k: tuple(v) for k, v in views_by_method.items()
+        }
+        # the value of the Allow header for 405 responses
+        self.allow: bytes = ', '.join(m.value.upper() for m in sorted(self.views_by_method)).encode('ascii')
 
     def __call__(self, **kw):
         return
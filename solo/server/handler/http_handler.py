@@ -1,123 +1,163 @@
 import asyncio
 import logging
-import urllib.parse
-from typing import Mapping, Optional, Dict, Any, Awaitable, Callable
+from typing import Mapping, Optional, Dict, Any, Awaitable, Callable, Union, AsyncIterable
 
 import routes
-from pyrsistent import pmap
-
-from solo.server.response import Response
-from solo.server.statuses import Http4xx, Http3xx, NotFound, Redirect
-from solo.server.definitions import MatchedRoute, PredicatedHandler
-from solo.server.runtime.dependencies import get_handler_deps
-from ..request import Request
-from ..definitions import HttpMethod, ScopeType, ScopeScheme, ScopeServer, Scope
+
+from solo.server.response import Response, StreamingResponse, is_stream, response_text, TEXT_HEADERS, \
+    OCTET_STREAM_HEADERS
+from solo.server.statuses import Http4xx, Http3xx, HttpStatus, NotFound, MethodNotAllowed
+from solo.server.definitions import PredicatedHandler
+from solo.server.routing import Router
+from ..request import Request, ClientDisconnected
+from ..definitions import HTTP_METHODS
 from solo.server.runtime.dependencies import Runtime
+from solo.vendor.old_session.old_session import SESSION_KEY, STORAGE_KEY
+from solo.server.csrf import REGISTRY_KEY, CSRF_COOKIE_KEY
 from ...types import IO
 
 logger = logging.getLogger(__name__)
 
 
+NOT_FOUND = response_text(404, '404 Not Found')
+
+INTERNAL_SERVER_ERROR = response_text(500, 'HTTP 500: Internal Server Error')
+
+
 async def handle_request(
     runtime: Runtime,
-    route_map: routes.Mapper,
+    route_map: Union[Router, routes.Mapper],
     scope: Mapping[str, Any],
     receive: Callable[[], IO],
     send: Callable[[Mapping[str, Any]], IO]
 ) -> None:
-    scope_ = Scope(
-        type=ScopeType(scope['type']),
-        scheme=ScopeScheme(scope['scheme']),
-        root_path=scope['root_path'],
-        server=ScopeServer(host=scope['server'][0],
-                           port=scope['server'][1]),
-        http_version=scope['http_version'],
-        method=HttpMethod(scope['method'].lower()),
-        path=scope['path'],
-        query_string=scope['query_string'],
-        headers=pmap({
-            header_tuple[0].decode('utf-8'): header_tuple[1].decode('utf-8')
-            for header_tuple in scope['headers']
-        })
-    )
-    result: Optional[Dict[str, Any]] = route_map.match(scope_.path)
+    result: Optional[Dict[str, Any]] = route_map.match(scope['path'])
     if result is None:
-        logger.debug(f'No route was matched for the request scope {scope}')
-        await send({
-            'type': 'http.response.start',
-            'status': 404,
-            'headers': [
-                [b'content-type', b'text/plain'],
-            ]
-        })
-        await send({
-            'type': 'http.response.body',
-            'body': b'404 Not Found',
-        })
+        logger.debug('No route was matched for the request scope %s', scope)
+        response = NOT_FOUND
     else:
-        matched_route = MatchedRoute(
-            controller=result.pop('controller'),
-            params=pmap(result),
-        )
+        controller = result.pop('controller')
         request = Request(
-            method=scope_.method,
-            path=scope_.path,
-            url_params=matched_route.params,
-            qs_params=pmap(urllib.parse.parse_qs(
-                scope_.query_string.decode('utf-8'),
-                strict_parsing=True,
-                keep_blank_values=True,
-                max_num_fields=256,
-            )) if scope_.query_string else pmap()
+            scope,
+            method=HTTP_METHODS.get(scope['method']),
+            url_params=result,
+            receive=receive,
+            max_body_size=runtime.registry.config.server.max_body_size,
         )
+        request[STORAGE_KEY] = runtime.session_storage
+        request[REGISTRY_KEY] = runtime.registry
         try:
             response = await call_matched_controller(
-                matched_route.controller,
+                controller,
                 runtime=runtime,
                 request=request
             )
+        except ClientDisconnected:
+            logger.debug('Client disconnected while sending a request body to %s', scope['path'])
+            return
         except (Http4xx, Http3xx) as e:
-            status = e.status
-            response_body = b''
-            content_type = b'text/plain'
-        except Exception as e:
-            status = 500
-            response_body = b'HTTP 500: Internal Server Error'
-            content_type = b'text/plain'
-        else:
-            status = 200
-            response_body = response.text.encode('utf-8')
-            content_type = response.content_type.encode('utf-8')
-
-        await send({
-            'type': 'http.response.start',
-            'status': status,
-            'headers': [
-                [b'content-type', content_type],
-            ]
-        })
-        await send({
-            'type': 'http.response.body',
-            'body': response_body,
-            # indicates end of response stream
-            'more_body': False
-        })
+            response = Response(status=e.status, body=b'', headers=(*TEXT_HEADERS, *e.headers))
+        except Exception:
+            response = INTERNAL_SERVER_ERROR
+
+        session = request.get(SESSION_KEY)
+        if session is not None and response is not INTERNAL_SERVER_ERROR:
+            try:
+                cookie_headers = await runtime.session_storage.save_session(request, session)
+            except Exception as e:
+                logger.exception('Error while saving session for %s: %s', request.path, e)
+                response = INTERNAL_SERVER_ERROR
+            else:
+                if cookie_headers:
+                    response = response._replace(headers=(*response.headers, *cookie_headers))
+
+        csrf_cookie_headers = request.get(CSRF_COOKIE_KEY)
+        if csrf_cookie_headers is not None and response is not INTERNAL_SERVER_ERROR:
+            response = response._replace(headers=(*response.headers, *csrf_cookie_headers))
+
+        if isinstance(response, StreamingResponse):
+            await send({
+                'type': 'http.response.start',
+                'status': response.status,
+                'headers': response.headers,
+            })
+            await send_body_stream(request, response.body, send)
+            return
+
+    await send({
+        'type': 'http.response.start',
+        'status': response.status,
+        'headers': response.headers,
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': response.body,
+        # indicates end of response stream
+        'more_body': False
+    })
+
+
+async def send_body_stream(
+    request: Request,
+    body: AsyncIterable[bytes],
+    send: Callable[[Mapping[str, Any]], IO]
+) -> None:
+    """ Send every chunk of the body as a separate message. ASGI servers suspend ``send()``
+    while the client isn't reading, so chunks are produced no faster than they are consumed.
+    The stream is abandoned as soon as the client disconnects.
+    """
+    if request.can_wait_disconnected:
+        disconnected = asyncio.ensure_future(request.wait_disconnected())
+    else:
+        disconnected = None
+    try:
+        async for chunk in body:
+            if disconnected is not None and disconnected.done():
+                logger.debug('Client disconnected while streaming a response for %s', request.path)
+                return
+            if chunk:
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True
+                })
+    finally:
+        if disconnected is not None:
+            disconnected.cancel()
+        aclose = getattr(body, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+    await send({
+        'type': 'http.response.body',
+        'body': b'',
+        # indicates end of response stream
+        'more_body': False
+    })
 
 
 async def call_matched_controller(
     controller: PredicatedHandler,
     runtime: Runtime,
     request: Request
-) -> Response:
-    for view_item in controller.view_metas:
-        for predicate in view_item.predicates:
+) -> Union[Response, StreamingResponse]:
+    view_metas = controller.views_by_method.get(request.method)
+    if view_metas is None:
+        logger.debug('No views accept %s %s', request.method, request.path)
+        raise MethodNotAllowed(controller.allow)
+
+    for view_item in view_metas:
+        check = view_item.check
+        if check is not None and not check(runtime, request):
+            logger.debug('Predicates %s failed for %s %s', view_item.predicates, request.method, request.path)
+            continue
+        for predicate in view_item.async_predicates:
             if not (await predicate(runtime, request)):
-                logger.debug(f'Predicate {predicate} failed for {request.method} {request.path}')
+                logger.debug('Predicate %s failed for %s %s', predicate, request.method, request.path)
                 break
         else:
             # All predicates match
-            logger.debug(f'{request.method} {request.path} will be handled by {view_item.view}')
-            handler = view_item.view
+            logger.debug('%s %s will be handled by %s', request.method, request.path, view_item.view)
             context = {}
             rules = controller.rules
             for k, v in request.url_params.items():
@@ -125,39 +165,39 @@ async def call_matched_controller(
                     context[k] = controller.rules[k].match(v)
                 else:  # regular value assignment
                     context[k] = v
-            if view_item.attr:
-                # handler is a coroutine method of a class
-                handler = getattr(handler(request, context), view_item.attr)
-                handler_args = ()
-            else:
-                # handler is a simple coroutine
-                handler_args = (request, context)
-
-            coro_deps, handler_deps = get_handler_deps(runtime, handler, request)
-            collected = await asyncio.gather(*[x for x in coro_deps.values()])
-
-            # Here we rely on the fact that the order of collected values corresponds
-            # to the order of coro_deps:
-            # https://docs.python.org/3/library/asyncio-task.html#asyncio.gather
-            collected_deps = dict(zip(coro_deps.keys(), collected))
-
+            plan = view_item.dispatch
+            handler = plan.handler
+            handler_deps = await plan.collect(runtime, request)
             try:
-                response_call = handler(*handler_args, **handler_deps, **collected_deps)
-                if asyncio.iscoroutine(response_call):
+                if plan.is_method:
+                    # handler is a coroutine method of a class
+                    response_call = handler(view_item.view(request, context), **handler_deps)
+                else:
+                    # handler is a simple coroutine
+                    response_call = handler(request, context, **handler_deps)
+                # async views wrapped by sync decorators return coroutines too
+                if plan.is_async or asyncio.iscoroutine(response_call):
                     response = await response_call
                 else:
                     response = response_call
-            except Redirect:
+            except HttpStatus:
                 raise
 
             except Exception as e:
                 logger.exception(f'Error while serving {handler.__module__}.{handler.__name__}: {e}')
 
-            if isinstance(response, Response):
+            if isinstance(response, (Response, StreamingResponse)):
                 # Do not process standard responses
                 return response
             renderer = view_item.renderer
-            return renderer(request, response)
+            if not is_stream(response):
+                response = renderer(request, response)
+                if not is_stream(response):
+                    return response
+            # Handlers and renderers may produce async iterators of bytes
+            return StreamingResponse(status=200,
+                                     body=response,
+                                     headers=getattr(renderer, 'headers', OCTET_STREAM_HEADERS))
 
-    logger.debug(f'All predicates have failed for {request.method} {request.path}')
+    logger.debug('All predicates have failed for %s %s', request.method, request.path)
     raise NotFound()
\ No newline at end of file
@@ -1,8 +1,11 @@
 import logging
 from typing import NamedTuple, Optional, Mapping, Awaitable, Callable, TypeVar, Any
 
+from solo.config.app import RouterType, SessionBackend
 from solo.types import IO
 from solo.vendor.old_session.old_session import SessionStore
+from solo.server.sessions.codec import SESSION_CODECS
+from solo.server.sessions.cookie import CookieSessionStore
 
 from solo.configurator.registry import Registry
 from solo.server.app import App
@@ -24,6 +27,10 @@ class AIOManager:
         self.app = app
         self.config = registry.config
         self.registry = registry
+        if self.config.server.router is RouterType.RADIX and app.router is not None:
+            self.route_map = app.router
+        else:
+            self.route_map = app.route_map
         self.loop = loop
         self.server = None
         self.runtime: Optional[Runtime] = None
@@ -47,12 +54,27 @@ class AIOManager:
         db_engine = self.app.db_engine
         memstore = self.do_io(self.app.memstore)
 
+        session_config = self.config.session
+        session_codec = SESSION_CODECS[session_config.codec]()
         session_storage = SessionStore(
             memstore,
-            cookie_name=self.config.session.cookie_name,
-            secure=self.config.session.cookie_secure,
-            httponly=self.config.session.cookie_httponly
+            cookie_name=session_config.cookie_name,
+            secure=session_config.cookie_secure,
+            httponly=session_config.cookie_httponly,
+            max_age=session_config.max_age,
+            cache_size=session_config.cache_size,
+            cache_ttl=session_config.cache_ttl,
+            encoder=session_codec.encode,
+            decoder=session_codec.decode,
         )
+        if session_config.backend is SessionBackend.COOKIE:
+            # Redis is used only for sessions that don't fit into cookies
+            session_storage = CookieSessionStore(
+                session_storage,
+                secret=session_config.secret,
+                encrypt=session_config.encrypt,
+                max_cookie_size=session_config.max_cookie_size,
+            )
 
         class ServerDescription(NamedTuple):
             host: str
@@ -77,10 +99,18 @@ class AIOManager:
         """ Runs at the server shutdown phase
         """
         log.debug('Exiting application IO context...')
+        for hook in self.registry.shutdown_hooks:
+            try:
+                self.do_io(hook())
+            except Exception as e:
+                log.exception('Error in shutdown hook %s: %s', hook, e)
+
         if self.runtime:
             log.debug('Closing database connections...')
             self.do_io(self.runtime.dbengine.dispose())
 
+            self.do_io(self.runtime.session_storage.close())
+
             # Close memstore pool
             log.debug('Closing memory store connections...')
             self.do_io(self.runtime.memstore.close())
@@ -97,7 +127,7 @@ class AIOManager:
         send: Callable[[Mapping[str, Any]], IO]
     ) -> IO:
         return await handle_request ( runtime   = self.runtime
-                                    , route_map = self.app.route_map
+                                    , route_map = self.route_map
                                     , scope     = scope
                                     , receive   = receive
                                     , send      = send )
\ No newline at end of file
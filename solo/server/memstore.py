@@ -1,4 +1,5 @@
 import asyncio
+from typing import Any, Dict, List, Set, Tuple
 
 from redis import asyncio as aioredis
 
@@ -16,3 +17,53 @@ def init_pool(config: Config) -> IO[aioredis.Redis]:
         max_connections=c.max_connections,
     )
     return pool
+
+
+class PipelinedWriter:
+    """ Batches commands issued within the same event loop tick into a single
+    non-transactional Redis pipeline, i.e. a single network round trip.
+    """
+    __slots__ = ('_redis', '_pending', '_sending')
+
+    def __init__(self, redis: aioredis.Redis) -> None:
+        self._redis = redis
+        self._pending: List[Tuple[str, tuple, Dict[str, Any], asyncio.Future]] = []
+        # The event loop keeps weak references to tasks only
+        self._sending: Set[asyncio.Task] = set()
+
+    def execute(self, command: str, *args: Any, **kwargs: Any) -> IO[Any]:
+        """ Queue a command and return a future of its result.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            # Flush after all callbacks that are ready in this tick have queued their commands
+            loop.call_soon(self._flush)
+        self._pending.append((command, args, kwargs, future))
+        return future
+
+    def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[str, tuple, Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for command, args, kwargs, _future_ in batch:
+                    getattr(pipe, command)(*args, **kwargs)
+                results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (*_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
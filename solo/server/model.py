@@ -1,16 +1,18 @@
-import json
-from typing import Iterable, Dict, Any, Set, Optional
+from collections import namedtuple
+from typing import Iterable, Dict, Any, Set, Optional, Sequence, Tuple, Type
 
 import sqlalchemy as sa
 from sqlalchemy.ext.declarative import declarative_base
 
+from .codec import json_codec
+
 
 class _BaseModel:
     FIELDS = tuple()
     IN_MODIFIERS = {}
     OUT_MODIFIERS = {
         'str': str,
-        'json': json.dumps,
+        'json': json_codec.dumps_str,
     }
     DEFAULT_MODIFIERS = {}
 
@@ -38,3 +40,54 @@ class _BaseModel:
 
 metadata = sa.MetaData()
 Base = declarative_base(metadata=metadata, cls=_BaseModel)
+
+
+class _Record:
+    """ Methods of record types, see :func:`record_type`.
+    """
+    __slots__ = ()
+
+    def as_dict(self, *fields: Iterable[str], exclude: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """ The same as :meth:`_BaseModel.as_dict`.
+        """
+        if not fields:
+            if not exclude:
+                return dict(zip(self._fields, self))
+            return {k: v for k, v in zip(self._fields, self) if k not in exclude}
+
+        rv = {}
+        out_modifiers = self.OUT_MODIFIERS
+        for f in fields:
+            field, *modifiers = f.split('|')
+            field = field.strip()
+            v = getattr(self, field)
+            for m in modifiers:
+                v = out_modifiers[m.strip()](v)
+            rv[field] = v
+        return rv
+
+
+_record_types: Dict[Tuple[Any, Tuple[str, ...]], Type[tuple]] = {}
+
+
+def record_type(entity: Any, fields: Optional[Sequence[str]] = None) -> Type[tuple]:
+    """ Returns a read-only, tuple-backed type of records with the given columns of an entity,
+    or with all of its columns. Records are created from result rows with ``Record._make(row)``,
+    bypassing the instrumentation of declarative models, and have a compatible ``as_dict()``.
+
+    Types are created once per entity and set of columns.
+    """
+    if fields is None:
+        fields = entity.__table__.c.keys()
+    key = (entity, tuple(fields))
+    try:
+        return _record_types[key]
+    except KeyError:
+        pass
+    name = f'{entity.__name__}Record'
+    rtype = type(name, (namedtuple(name, key[1]), _Record), {
+        '__slots__': (),
+        'OUT_MODIFIERS': entity.OUT_MODIFIERS,
+    })
+    _record_types[key] = rtype
+    return rtype
@@ -1,14 +1,339 @@
-from typing import NamedTuple, Any, Mapping
+import asyncio
+import urllib.parse
+from typing import (Any, Mapping, Optional, Iterable, Tuple, Dict, List, Iterator, TypeVar, Union, Callable,
+                    AsyncIterator)
 
 from pyrsistent import pmap
-from pyrsistent.typing import PMap
 
+from .codec import json_codec
 from .definitions import HttpMethod
+from .statuses import BadRequest, RequestEntityTooLarge
+from ..types import IO
 
 
-class Request(NamedTuple):
-    method: HttpMethod = HttpMethod.GET
-    path: str = '/'
-    url_params: Mapping[str, str] = pmap({})
-    qs_params: Mapping[str, str] = pmap({})
-    headers: PMap[str, str] = pmap({})
+T = TypeVar('T')
+
+
+class Headers(Mapping[str, str]):
+    """ Read-only case-insensitive multidict over raw ASGI header pairs.
+
+    The index of header names is built on first access, and header values are decoded
+    only when they are requested.
+    """
+    __slots__ = ('_raw', '_index', '_decoded')
+
+    def __init__(self, raw: Iterable[Tuple[bytes, bytes]] = ()) -> None:
+        self._raw = raw
+        self._index: Optional[Dict[bytes, List[bytes]]] = None
+        self._decoded: Dict[bytes, List[str]] = {}
+
+    def _get_index(self) -> Dict[bytes, List[bytes]]:
+        index = self._index
+        if index is None:
+            index = self._index = {}
+            for name, value in self._raw:
+                # ASGI servers send lower-cased names, but it's not guaranteed for all of them
+                index.setdefault(name.lower(), []).append(value)
+        return index
+
+    def getall(self, name: str, default: T = None) -> Union[List[str], T]:
+        """ Return all values of a header, in the order they were received.
+        """
+        key = name.lower().encode('latin-1')
+        try:
+            return self._decoded[key]
+        except KeyError:
+            pass
+        try:
+            raw_values = self._get_index()[key]
+        except KeyError:
+            return default
+        values = self._decoded[key] = [v.decode('utf-8') for v in raw_values]
+        return values
+
+    def __getitem__(self, name: str) -> str:
+        values = self.getall(name)
+        if values is None:
+            raise KeyError(name)
+        return values[0]
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        return name.lower().encode('latin-1') in self._get_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return (name.decode('latin-1') for name in self._get_index())
+
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    def __repr__(self) -> str:
+        return f'<Headers {list(self.items())!r}>'
+
+
+EMPTY_QS = pmap({})
+
+MAX_NUM_FIELDS = 256
+
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+
+class ClientDisconnected(Exception):
+    """ Raised when a client disconnects before the request body is received.
+    """
+
+
+class Request:
+    """ HTTP request backed by an ASGI connection scope.
+
+    Headers and query string params are parsed on first access. The request also
+    works as a mapping for per-request state, i.e. ``request[key] = value``.
+
+    The body is pulled from the ASGI ``receive`` channel only as fast as a handler consumes it,
+    so the server can apply backpressure to the client. It is buffered only by :meth:`Request.read`
+    and the helpers built on top of it.
+    """
+    __slots__ = ('scope', 'method', 'url_params', 'max_body_size', '_receive', '_headers', '_qs_params', '_state',
+                 '_body', '_body_consumed', '_body_received', '_form')
+
+    def __init__(self,
+                 scope: Mapping[str, Any],
+                 method: Optional[HttpMethod] = None,
+                 url_params: Mapping[str, str] = pmap({}),
+                 receive: Optional[Callable[[], IO[Mapping[str, Any]]]] = None,
+                 max_body_size: int = DEFAULT_MAX_BODY_SIZE) -> None:
+        self.scope = scope
+        self.method = method
+        self.url_params = url_params
+        self.max_body_size = max_body_size
+        self._receive = receive
+        self._headers: Optional[Headers] = None
+        self._qs_params: Optional[Mapping[str, List[str]]] = None
+        self._state: Dict[str, Any] = {}
+        self._body: Optional[bytes] = None
+        self._body_consumed = False
+        self._body_received = False
+        self._form: Optional[Mapping[str, List[str]]] = None
+
+    @property
+    def path(self) -> str:
+        return self.scope['path']
+
+    @property
+    def scheme(self) -> str:
+        return self.scope.get('scheme', 'http')
+
+    @property
+    def query_string(self) -> bytes:
+        return self.scope.get('query_string', b'')
+
+    @property
+    def headers(self) -> Headers:
+        headers = self._headers
+        if headers is None:
+            headers = self._headers = Headers(self.scope.get('headers', ()))
+        return headers
+
+    @property
+    def qs_params(self) -> Mapping[str, List[str]]:
+        params = self._qs_params
+        if params is None:
+            query_string = self.query_string
+            if query_string:
+                params = pmap(urllib.parse.parse_qs(
+                    query_string.decode('utf-8'),
+                    strict_parsing=True,
+                    keep_blank_values=True,
+                    max_num_fields=MAX_NUM_FIELDS,
+                ))
+            else:
+                params = EMPTY_QS
+            self._qs_params = params
+        return params
+
+    @property
+    def content_type(self) -> str:
+        """ Media type of the body, without parameters.
+        """
+        return self.headers.get('content-type', '').split(';', 1)[0].strip().lower()
+
+    # Body
+    # ----
+
+    async def stream(self, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+        """ Iterate over body chunks as they arrive. The body can be streamed only once,
+        unless it has been buffered with :meth:`Request.read` before.
+
+        :param limit: maximum body size in bytes, cannot exceed ``max_body_size``.
+        :raise RequestEntityTooLarge: when the body exceeds the limit.
+        :raise ClientDisconnected: when the client disconnects before sending the whole body.
+        """
+        if self._body is not None:
+            if self._body:
+                yield self._body
+            return
+        if self._body_consumed:
+            raise RuntimeError('Request body has already been consumed.')
+        self._body_consumed = True
+        receive = self._receive
+        if receive is None:
+            self._body_received = True
+            return
+
+        if limit is None or limit > self.max_body_size:
+            limit = self.max_body_size
+        content_length = self.headers.get('content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            raise RequestEntityTooLarge()
+
+        received = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise ClientDisconnected()
+            chunk = message.get('body', b'')
+            if chunk:
+                received += len(chunk)
+                if received > limit:
+                    raise RequestEntityTooLarge()
+                yield chunk
+            if not message.get('more_body', False):
+                self._body_received = True
+                break
+
+    def _expects_body(self) -> bool:
+        headers = self.headers
+        return 'transfer-encoding' in headers or headers.get('content-length', '0') != '0'
+
+    @property
+    def can_wait_disconnected(self) -> bool:
+        """ Whether :meth:`Request.wait_disconnected` can be used without stealing body chunks
+        from a handler that may still be reading them.
+        """
+        return self._body_received or not (self._body_consumed or self._expects_body())
+
+    async def wait_disconnected(self) -> None:
+        """ Wait until the client disconnects. Must be used only if :attr:`Request.can_wait_disconnected`.
+        """
+        if not self._body_received:
+            if not self.can_wait_disconnected:
+                raise RuntimeError('Request body has not been received yet.')
+            # There is no body, mark it as consumed so that the remaining
+            # empty http.request message is skipped below.
+            self._body = b''
+            self._body_consumed = self._body_received = True
+        receive = self._receive
+        if receive is None:
+            await asyncio.get_running_loop().create_future()
+            return
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def read(self, limit: Optional[int] = None) -> bytes:
+        """ Buffer the whole body in memory and return it.
+
+        :param limit: maximum body size in bytes, cannot exceed ``max_body_size``.
+        """
+        if self._body is None:
+            chunks = [chunk async for chunk in self.stream(limit)]
+            self._body = b''.join(chunks)
+        return self._body
+
+    async def json(self, limit: Optional[int] = None) -> Any:
+        """ Read and decode a JSON body.
+        """
+        body = await self.read(limit)
+        try:
+            return json_codec.loads(body)
+        except ValueError as e:
+            raise BadRequest(f'Malformed JSON body: {e}')
+
+    async def iter_json_lines(self, limit: Optional[int] = None) -> AsyncIterator[Any]:
+        """ Incrementally decode a newline-delimited JSON body (NDJSON), one document per line.
+        Only the current line is held in memory.
+        """
+        tail = b''
+        async for chunk in self.stream(limit):
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield self._decode_json_line(line)
+        if tail.strip():
+            yield self._decode_json_line(tail)
+
+    @staticmethod
+    def _decode_json_line(line: bytes) -> Any:
+        try:
+            return json_codec.loads(line)
+        except ValueError as e:
+            raise BadRequest(f'Malformed JSON line: {e}')
+
+    async def iter_form(self, limit: Optional[int] = None) -> AsyncIterator[Tuple[str, str]]:
+        """ Incrementally parse an ``application/x-www-form-urlencoded`` body into (name, value) pairs.
+        Only the current field is held in memory.
+        """
+        tail = b''
+        num_fields = 0
+        async for chunk in self.stream(limit):
+            fields = (tail + chunk).split(b'&')
+            tail = fields.pop()
+            for field in fields:
+                if field:
+                    num_fields += 1
+                    yield self._decode_form_field(field, num_fields)
+        if tail:
+            yield self._decode_form_field(tail, num_fields + 1)
+
+    @staticmethod
+    def _decode_form_field(field: bytes, num_fields: int) -> Tuple[str, str]:
+        if num_fields > MAX_NUM_FIELDS:
+            raise BadRequest('Too many form fields.')
+        name, _, value = field.partition(b'=')
+        try:
+            return (urllib.parse.unquote_plus(name.decode('ascii'), errors='strict'),
+                    urllib.parse.unquote_plus(value.decode('ascii'), errors='strict'))
+        except UnicodeDecodeError as e:
+            raise BadRequest(f'Malformed form field: {e}')
+
+    async def form(self, limit: Optional[int] = None) -> Mapping[str, List[str]]:
+        """ Return params of an ``application/x-www-form-urlencoded`` body,
+        or an empty mapping for other content types. The body is buffered,
+        so it can still be read with :meth:`Request.read` afterwards.
+        """
+        form = self._form
+        if form is None:
+            if self.content_type != FORM_CONTENT_TYPE:
+                form = EMPTY_QS
+            else:
+                await self.read(limit)
+                params: Dict[str, List[str]] = {}
+                async for name, value in self.iter_form(limit):
+                    params.setdefault(name, []).append(value)
+                form = pmap(params)
+            self._form = form
+        return form
+
+    # Per-request state
+    # -----------------
+
+    def __getitem__(self, key: str) -> Any:
+        return self._state[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._state[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._state[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._state
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._state.get(key, default)
+
+    def __repr__(self) -> str:
+        return f'<Request {self.method} {self.path}>'
@@ -1,20 +1,115 @@
-import json
-from typing import Optional, Any, List, Dict, TypeVar, NamedTuple
+from typing import Optional, Any, List, Dict, TypeVar, NamedTuple, AsyncIterable, AsyncIterator, Tuple
+
+from .codec import json_codec
 
 
 JsonApiPayload = TypeVar('JsonApiPayload', Dict[str, Any],
                                            List[Dict[str, Any]])
 
-encode_json = json.dumps
+RawHeaders = Tuple[Tuple[bytes, bytes], ...]
+
+
+def encode_json(data: Any) -> bytes:
+    return json_codec.dumps(data)
+
+
+def content_type_header(content_type: str, charset: Optional[str] = None) -> RawHeaders:
+    """ Pre-encode a content-type header, so that it is not encoded again for every response.
+    """
+    if charset:
+        content_type = f'{content_type}; charset={charset}'
+    return ((b'content-type', content_type.encode('latin-1')),)
+
+
+JSON_HEADERS = content_type_header('application/json')
+JSONAPI_HEADERS = content_type_header('application/vnd.api+json')
+TEXT_HEADERS = content_type_header('text/plain', 'utf-8')
+OCTET_STREAM_HEADERS = content_type_header('application/octet-stream')
+NDJSON_HEADERS = content_type_header('application/x-ndjson')
+
+# Encoded records are accumulated up to this size before they are sent as a single chunk
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class Response(NamedTuple):
     status: int
-    text: str
-    content_type: str
-    charset: str
+    body: bytes
+    headers: RawHeaders = ()
+
+
+class StreamingResponse(NamedTuple):
+    """ A response whose body is sent to the client chunk by chunk, as soon as
+    the chunks are produced by the ``body`` iterator.
+    """
+    status: int
+    body: AsyncIterable[bytes]
+    headers: RawHeaders = ()
+
+
+def is_stream(value: Any) -> bool:
+    return hasattr(value, '__aiter__')
+
+
+def stream(body: AsyncIterable[bytes],
+           headers: RawHeaders = OCTET_STREAM_HEADERS,
+           status: int = 200) -> StreamingResponse:
+    return StreamingResponse(status=status,
+                             body=body,
+                             headers=headers)
 
 
+def _json_record(record: Any) -> Any:
+    """ Entities and records of :mod:`solo.server.model` are encoded as dicts of their columns.
+    """
+    as_dict = getattr(record, 'as_dict', None)
+    return record if as_dict is None else as_dict()
+
+
+async def encode_ndjson(records: AsyncIterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """ Encode records as newline-delimited JSON, one record per line.
+    """
+    dumps = json_codec.dumps
+    buf = bytearray()
+    async for record in records:
+        buf += dumps(_json_record(record))
+        buf += b'\n'
+        if len(buf) >= chunk_size:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+async def encode_json_array(records: AsyncIterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """ Encode records as a JSON array, without holding all of them in memory.
+    """
+    dumps = json_codec.dumps
+    buf = bytearray(b'[')
+    separator = b''
+    async for record in records:
+        buf += separator
+        buf += dumps(_json_record(record))
+        separator = b','
+        if len(buf) >= chunk_size:
+            yield bytes(buf)
+            buf.clear()
+    buf += b']'
+    yield bytes(buf)
+
+
+def stream_ndjson(records: AsyncIterable[Any], status: int = 200) -> StreamingResponse:
+    """ Stream JSON-serializable records, entities or records of :mod:`solo.server.model`,
+    e.g. rows of :meth:`solo.services.SQLService.stream`, as newline-delimited JSON.
+    """
+    return stream(encode_ndjson(records), NDJSON_HEADERS, status)
+
+
+def stream_json(records: AsyncIterable[Any], status: int = 200) -> StreamingResponse:
+    """ Stream JSON-serializable records, entities or records of :mod:`solo.server.model`
+    as a JSON array.
+    """
+    return stream(encode_json_array(records), JSON_HEADERS, status)
+
 
 def ok(data: Optional[JsonApiPayload] = None) -> Response:
     if data is None:
@@ -22,26 +117,36 @@ def ok(data: Optional[JsonApiPayload] = None) -> Response:
     return _response_jsonapi(200, data)
 
 
-def _response_jsonapi(status: int, data: JsonApiPayload) -> Response:
+def _response_jsonapi(status: int,
+                      data: JsonApiPayload,
+                      headers: RawHeaders = JSONAPI_HEADERS,
+                      links: Optional[Dict[str, Optional[str]]] = None) -> Response:
     """ Generate a final response in JSON API format:
 
     * http://jsonapi.org/format/#document-top-level
     * http://jsonapi.org/format/#document-resource-identifier-objects
+    * http://jsonapi.org/format/#fetching-pagination
     """
     data = {
         'data': data,
         'jsonapi': {'version': '1.0'}
     }
+    if links is not None:
+        data['links'] = links
     return Response(status=status,
-                    text=encode_json(data),
-                    content_type='application/vnd.api+json',
-                    charset='utf-8')
+                    body=json_codec.dumps(data),
+                    headers=headers)
 
 
-def response_json(status: int, data: JsonApiPayload) -> Response:
+def response_json(status: int, data: JsonApiPayload, headers: RawHeaders = JSON_HEADERS) -> Response:
     """ Generate a simple JSON response format:
     """
     return Response(status=status,
-                    text=encode_json(data),
-                    content_type='application/json',
-                    charset='utf-8')
+                    body=json_codec.dumps(data),
+                    headers=headers)
+
+
+def response_text(status: int, text: str, headers: RawHeaders = TEXT_HEADERS) -> Response:
+    return Response(status=status,
+                    body=text.encode('utf-8'),
+                    headers=headers)
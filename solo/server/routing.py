@@ -0,0 +1,226 @@
+""" Native URL router compiled from the routes registered by the configurator.
+
+Routes are split into path segments and merged into a segment trie:
+
+* static segments are resolved with a single dictionary lookup;
+* segments constrained by a SumType (``{provider:<AuthProvider>}``) are resolved
+  with a dictionary lookup over the sum type's values;
+* segments with ``{name}`` or ``{name:regex}`` parts are matched with a matcher
+  compiled once at configuration time.
+
+When several children of a node match the same segment, they are tried in
+the order listed above, so ``/users/me`` wins over ``/users/{userId}``
+regardless of the registration order. Regex parts are matched within a single
+path segment; routes that rely on a regex spanning several segments should use
+:attr:`solo.config.app.RouterType.MAPPER`.
+"""
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple, Union
+
+from solo.configurator.config.sums import SumTypeMetaclass
+from solo.configurator.url import extract_pattern
+
+
+DEFAULT_PARAM_RULE = '[^/]+'
+DEFAULT_EMBEDDED_PARAM_RULE = '[^/]+?'
+
+
+# A part of a path segment: either a static string, or a pair of (param name, rule)
+SegmentPart = Union[str, Tuple[str, Any]]
+
+
+class _ParamMatcher:
+    """ Matches a path segment that consists of a single ``{name}`` or ``{name:regex}`` part.
+    """
+    __slots__ = ('name', 'regex')
+
+    def __init__(self, name: str, rule: Optional[str]) -> None:
+        self.name = name
+        self.regex = None if rule in (None, DEFAULT_PARAM_RULE) else re.compile(rule)
+
+    def __call__(self, segment: str) -> Optional[Dict[str, str]]:
+        if not segment:
+            return None
+        if self.regex is not None and self.regex.fullmatch(segment) is None:
+            return None
+        return {self.name: segment}
+
+
+class _EmbeddedParamsMatcher:
+    """ Matches a path segment that mixes static text and params, i.e. ``{name}.json``.
+    """
+    __slots__ = ('regex',)
+
+    def __init__(self, parts: Sequence[SegmentPart]) -> None:
+        buf = []
+        for part in parts:
+            if isinstance(part, str):
+                buf.append(re.escape(part))
+                continue
+            name, rule = part
+            if isinstance(rule, SumTypeMetaclass):
+                rule = '|'.join(re.escape(str(v)) for v in rule.values())
+            elif rule is None:
+                rule = DEFAULT_EMBEDDED_PARAM_RULE
+            buf.append(f'(?P<{name}>{rule})')
+        self.regex = re.compile(''.join(buf))
+
+    def __call__(self, segment: str) -> Optional[Dict[str, str]]:
+        m = self.regex.fullmatch(segment)
+        if m is None:
+            return None
+        return m.groupdict()
+
+
+class _Node:
+    __slots__ = ('static', 'sums', 'dynamic', 'dynamic_keys', 'controller')
+
+    def __init__(self) -> None:
+        self.static: Dict[str, _Node] = {}
+        # (param name, sum type, sum type values, child node)
+        self.sums: List[Tuple[str, Any, Set[str], _Node]] = []
+        self.dynamic: List[Tuple[Any, _Node]] = []
+        self.dynamic_keys: Dict[Any, _Node] = {}
+        self.controller: Any = None
+
+    def match(self, segments: Sequence[str], idx: int, params: Dict[str, str]) -> Any:
+        if idx == len(segments):
+            return self.controller
+
+        segment = segments[idx]
+        child = self.static.get(segment)
+        if child is not None:
+            rv = child.match(segments, idx + 1, params)
+            if rv is not None:
+                return rv
+
+        for name, _sum_type_, values, child in self.sums:
+            if segment in values:
+                rv = child.match(segments, idx + 1, params)
+                if rv is not None:
+                    params[name] = segment
+                    return rv
+
+        for matcher, child in self.dynamic:
+            captured = matcher(segment)
+            if captured is not None:
+                rv = child.match(segments, idx + 1, params)
+                if rv is not None:
+                    params.update(captured)
+                    return rv
+        return None
+
+
+class Router:
+    """ A segment trie that matches request paths against registered routes.
+
+    :meth:`Router.match` returns results in the same shape as ``routes.Mapper.match()``,
+    i.e. a dictionary of matched params with the route controller under the ``controller`` key.
+    """
+    def __init__(self) -> None:
+        self.root = _Node()
+
+    def add(self, pattern: str, rules: Mapping[str, Any], controller: Any) -> None:
+        node = self.root
+        for segment in split_pattern(pattern):
+            parts = parse_segment(segment, rules)
+            node = self._add_segment(node, parts)
+
+        if node.controller is None:
+            # The first registered route wins, similar to routes.Mapper
+            node.controller = controller
+
+    def match(self, path: str) -> Optional[Dict[str, Any]]:
+        segments = split_path(path)
+        if segments is None:
+            return None
+        params: Dict[str, Any] = {}
+        controller = self.root.match(segments, 0, params)
+        if controller is None:
+            return None
+        params['controller'] = controller
+        return params
+
+    @staticmethod
+    def _add_segment(node: _Node, parts: Sequence[SegmentPart]) -> _Node:
+        if len(parts) == 1 and isinstance(parts[0], str):
+            return node.static.setdefault(parts[0], _Node())
+
+        if len(parts) == 1:
+            name, rule = parts[0]
+            if isinstance(rule, SumTypeMetaclass):
+                for sum_name, sum_type, _values_, child in node.sums:
+                    if sum_name == name and sum_type is rule:
+                        return child
+                child = _Node()
+                node.sums.append((name, rule, {str(v) for v in rule.values()}, child))
+                return child
+            key = ('param', name, rule)
+            matcher_factory = lambda: _ParamMatcher(name, rule)
+        else:
+            key = ('embedded', tuple((p if isinstance(p, str) else (p[0], str(p[1]))) for p in parts))
+            matcher_factory = lambda: _EmbeddedParamsMatcher(parts)
+
+        try:
+            return node.dynamic_keys[key]
+        except KeyError:
+            child = node.dynamic_keys[key] = _Node()
+            node.dynamic.append((matcher_factory(), child))
+            return child
+
+
+def split_path(path: str) -> Optional[List[str]]:
+    if not path.startswith('/'):
+        return None
+    if path == '/':
+        return []
+    return path[1:].split('/')
+
+
+def split_pattern(pattern: str) -> List[str]:
+    """ Similar to :func:`split_path`, but doesn't split on slashes inside ``{name:regex}`` parts.
+    """
+    if pattern == '/':
+        return []
+    segments = []
+    buf = []
+    depth = 0
+    for char in pattern.lstrip('/'):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif char == '/' and not depth:
+            segments.append(''.join(buf))
+            buf = []
+            continue
+        buf.append(char)
+    segments.append(''.join(buf))
+    return segments
+
+
+def parse_segment(segment: str, rules: Mapping[str, Any]) -> List[SegmentPart]:
+    """ Split a pattern segment like ``{name:regex}.json`` into static and param parts.
+    """
+    parts: List[SegmentPart] = []
+    buf = []
+    while segment:
+        result = extract_pattern(segment)
+        if result:
+            extracted, segment = result
+            if buf:
+                parts.append(''.join(buf))
+                buf = []
+            # Remove braces from the extracted result "{name[:rule]}"
+            extracted = extracted[1:-1]
+            if ':' in extracted:
+                name, rule = extracted.split(':', 1)
+            else:
+                name, rule = extracted, rules.get(extracted)
+            parts.append((name, rule))
+            continue
+        buf.append(segment[0])
+        segment = segment[1:]
+    if buf or not parts:
+        parts.append(''.join(buf))
+    return parts
@@ -1,47 +1,177 @@
 import asyncio
-from typing import Callable, Mapping, Any, get_type_hints, NamedTuple, Type, TypeVar, Awaitable, Tuple
+import inspect
+from enum import Enum
+from typing import Callable, Mapping, Any, get_type_hints, NamedTuple, Type, TypeVar, Tuple, Optional, Dict
 
 from pyrsistent import pmap
 
+from solo.configurator.exceptions import ConfigurationError
 from solo.configurator.registry import Registry
 from solo.server.db.types import SQLEngine
 from solo.server.request import Request
-from solo.types import IO
-from solo.vendor.old_session.old_session import Session, SessionStore
+from solo.vendor.old_session.old_session import Session, LazySession, SessionStore
 
 
 class Runtime(NamedTuple):
     registry: Registry
     dbengine: SQLEngine
     memstore: Any
+    # SessionStore or CookieSessionStore
     session_storage: SessionStore
 
 
-def get_handler_deps(
-    runtime: Runtime,
-    handler: Callable,
-    request: Request,
-) -> Tuple[Mapping[str, IO], Mapping[str, Any]]:
-    """ Returns a tuple of awaitable coroutine dependencies and rest dependencies.
+class DependencyScope(Enum):
+    # the value is the same for every request served by a runtime
+    RUNTIME = 'runtime'
+    # the value is computed for every request
+    REQUEST = 'request'
+
+
+class Provider(NamedTuple):
+    """ Describes how a handler dependency is obtained.
+
+    ``get`` accepts a runtime for :attr:`DependencyScope.RUNTIME` providers,
+    and a runtime and a request for :attr:`DependencyScope.REQUEST` providers.
+    """
+    get: Callable[..., Any]
+    scope: DependencyScope = DependencyScope.RUNTIME
+    is_async: bool = False
+
+
+class BoundDispatchPlan(NamedTuple):
+    constants: Mapping[str, Any]
+    request_scoped: Tuple[Tuple[str, Callable[[Runtime, Request], Any]], ...]
+    awaitable: Tuple[Tuple[str, Callable[[Runtime, Request], Any]], ...]
+
+
+class DispatchPlan:
+    """ Dependencies of a view callable, resolved once at scan time.
     """
+    __slots__ = ('handler', 'is_method', 'is_async', 'constants', 'request_scoped', 'awaitable', '_bound')
+
+    def __init__(self,
+                 handler: Callable,
+                 is_method: bool,
+                 is_async: bool,
+                 constants: Tuple[Tuple[str, Callable[[Runtime], Any]], ...],
+                 request_scoped: Tuple[Tuple[str, Callable[[Runtime, Request], Any]], ...],
+                 awaitable: Tuple[Tuple[str, Callable[[Runtime, Request], Any]], ...]) -> None:
+        self.handler = handler
+        self.is_method = is_method
+        self.is_async = is_async
+        self.constants = constants
+        self.request_scoped = request_scoped
+        self.awaitable = awaitable
+        self._bound: Optional[Tuple[Runtime, BoundDispatchPlan]] = None
+
+    def bind(self, runtime: Runtime) -> BoundDispatchPlan:
+        """ Returns the plan with runtime-scoped dependencies resolved for a given runtime.
+        """
+        bound = self._bound
+        if bound is not None and bound[0] is runtime:
+            return bound[1]
+        plan = BoundDispatchPlan(
+            constants=pmap({name: get(runtime) for name, get in self.constants}),
+            request_scoped=self.request_scoped,
+            awaitable=self.awaitable,
+        )
+        self._bound = (runtime, plan)
+        return plan
+
+    async def collect(self, runtime: Runtime, request: Request) -> Dict[str, Any]:
+        """ Returns keyword arguments for the view callable.
+        """
+        plan = self.bind(runtime)
+        kwargs = dict(plan.constants)
+        for name, get in plan.request_scoped:
+            kwargs[name] = get(runtime, request)
+
+        awaitable = plan.awaitable
+        if len(awaitable) == 1:
+            name, get = awaitable[0]
+            kwargs[name] = await get(runtime, request)
+        elif awaitable:
+            collected = await asyncio.gather(*[get(runtime, request) for _, get in awaitable])
+            # Here we rely on the fact that the order of collected values corresponds
+            # to the order of awaitables:
+            # https://docs.python.org/3/library/asyncio-task.html#asyncio.gather
+            for (name, _), value in zip(awaitable, collected):
+                kwargs[name] = value
+        return kwargs
+
+
+def compile_dispatch_plan(view: Callable,
+                          attr: Optional[str],
+                          dependencies: Optional[Mapping[Any, Provider]] = None) -> DispatchPlan:
+    """ Introspect a view callable and build its dispatch plan.
+
+    :param view: a view function, or a class whose ``attr`` method handles requests.
+    :param attr: name of the view method, if ``view`` is a class.
+    :param dependencies: providers of dependencies by their types, defaults to :data:`DEPENDENCIES`.
+    """
+    if dependencies is None:
+        dependencies = DEPENDENCIES
+
+    if attr:
+        # handler is a coroutine method of a class, and the first positional argument is ``self``
+        handler = getattr(view, attr)
+        skip_positional = 1
+    else:
+        # handler is a simple callable that accepts (request, context)
+        handler = view
+        skip_positional = 2
+
     hints = get_type_hints(handler)
-    hints.pop('return', None)
-    iter_hints = (x for x in hints.items() if x[0] != 'return')
-    rv = {True: {}, False:{}}
-    for arg_name, dep_type in iter_hints:
-        dependency_getter = DEPENDENCIES[dep_type]
-        dep = dependency_getter(runtime)
-        if callable(dep):
-            dep = dep(request)
-        rv[asyncio.iscoroutine(dep)][arg_name] = dep
-    return pmap(rv[True]), pmap(rv[False])
+    params = list(inspect.signature(handler).parameters.values())
+    constants = []
+    request_scoped = []
+    awaitable = []
+    for param in params[skip_positional:]:
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        try:
+            dep_type = hints[param.name]
+        except KeyError:
+            if param.default is not param.empty:
+                continue
+            raise ConfigurationError(
+                f'Argument "{param.name}" of {handler.__module__}.{handler.__qualname__} '
+                f'must have a type hint of a known dependency.'
+            )
+        try:
+            provider = dependencies[dep_type]
+        except KeyError:
+            raise ConfigurationError(
+                f'Argument "{param.name}" of {handler.__module__}.{handler.__qualname__} '
+                f'has an unknown dependency type {dep_type}.'
+            )
+        if provider.scope is DependencyScope.RUNTIME:
+            constants.append((param.name, provider.get))
+        elif provider.is_async:
+            awaitable.append((param.name, provider.get))
+        else:
+            request_scoped.append((param.name, provider.get))
+
+    return DispatchPlan(
+        handler=handler,
+        is_method=bool(attr),
+        is_async=inspect.iscoroutinefunction(handler),
+        constants=tuple(constants),
+        request_scoped=tuple(request_scoped),
+        awaitable=tuple(awaitable),
+    )
 
 
 T = TypeVar('T')
 
-DEPENDENCIES: Mapping[Type[T], Callable[[Runtime], T]] = pmap({
-    Registry: lambda runtime: runtime.registry,
-    SQLEngine: lambda runtime: runtime.db_engine,
-    Session: lambda runtime: lambda request: runtime.session_storage.load_session(request),
-    SessionStore: lambda runtime: runtime.session_storage,
+DEPENDENCIES: Mapping[Type[T], Provider] = pmap({
+    Registry: Provider(lambda runtime: runtime.registry),
+    SQLEngine: Provider(lambda runtime: runtime.dbengine),
+    Session: Provider(lambda runtime, request: runtime.session_storage.load_session(request),
+                      scope=DependencyScope.REQUEST,
+                      is_async=True),
+    # fetched on first read, handlers that only write to the session skip the round trip
+    LazySession: Provider(lambda runtime, request: runtime.session_storage.lazy_session(request),
+                          scope=DependencyScope.REQUEST),
+    SessionStore: Provider(lambda runtime: runtime.session_storage),
 })
@@ -1,3 +1,4 @@
 from .session import Session, update_session
+from .cookie import CookieSessionStore
 
-__all__ = ('Session', 'update_session')
\ No newline at end of file
+__all__ = ('Session', 'update_session', 'CookieSessionStore')
\ No newline at end of file
@@ -0,0 +1,217 @@
+""" Serialization formats of stored sessions.
+
+Sessions are stored as ``{'created': <timestamp>, 'session': {...}}`` mappings, or as an empty mapping.
+Both codecs decode payloads produced by the other one, so switching the codec of a running
+deployment doesn't invalidate existing sessions.
+
+The binary codec trades speed for size: its payloads are 15-30% smaller than JSON, which saves
+Redis memory and keeps more sessions within cookies, but it is implemented in pure Python
+and encodes and decodes several times slower than JSON, see ``benchmarks/session_codec.py``.
+JSON is the codec to use when speed matters.
+
+Binary format, version 1::
+
+    magic (1 byte) | version (1 byte) | created (uint32) | session (a dict value)
+
+where every value is a type tag followed by its data:
+
+* ``None``, ``False``, ``True`` - the tag only;
+* ``int`` - int32 or int64, other integers are stored as decimal strings with 8- or 32-bit lengths;
+* ``float`` - float64;
+* ``str`` - length (uint8 or uint32) and UTF-8 data;
+* ``list``/``tuple`` and ``dict`` with string keys - number of items (uint32) and items.
+
+Values that JSON can't represent, e.g. ``bytes``, are rejected, so that sessions
+can always be read after switching back to the JSON codec.
+"""
+import struct
+from typing import Any, Callable, Dict, List, Tuple
+
+from solo.config.app import SessionCodecType
+from solo.server.codec import json_codec
+
+
+MAGIC = 0xB5
+VERSION = 1
+HEADER = struct.Struct('>BBI')
+
+# Type tags
+NONE = 0
+FALSE = 1
+TRUE = 2
+INT32 = 3
+INT64 = 4
+BIGINT = 5
+FLOAT = 6
+STR8 = 7
+STR32 = 8
+LIST = 9
+DICT = 10
+BIGINT32 = 11
+
+_U32 = struct.Struct('>I')
+_I32 = struct.Struct('>i')
+_I64 = struct.Struct('>q')
+_F64 = struct.Struct('>d')
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+class JsonSessionCodec:
+    """ Sessions are stored as JSON documents, encoded with :data:`solo.server.codec.json_codec`.
+    """
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        return json_codec.dumps(data)
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        if raw[:1] == b'\xb5':
+            return _decode_binary(raw)
+        return json_codec.loads(raw)
+
+
+class BinarySessionCodec:
+    """ Compact binary encoding of sessions, it's smaller but slower than JSON,
+    see the module description for details.
+    """
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        if not data:
+            return bytes((MAGIC, VERSION))
+        buf = bytearray(HEADER.pack(MAGIC, VERSION, data['created']))
+        _encode_value(buf, data['session'])
+        return bytes(buf)
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        if raw[:1] != b'\xb5':
+            # sessions stored before the binary format was enabled
+            return json_codec.loads(raw)
+        return _decode_binary(raw)
+
+
+def _encode_value(buf: bytearray, value: Any) -> None:
+    # Checks are ordered by the frequency of types in sessions
+    if value.__class__ is str:
+        data = value.encode('utf-8')
+        size = len(data)
+        if size < 256:
+            buf.append(STR8)
+            buf.append(size)
+        else:
+            buf.append(STR32)
+            buf += _U32.pack(size)
+        buf += data
+    elif value is None:
+        buf.append(NONE)
+    elif value is True:
+        buf.append(TRUE)
+    elif value is False:
+        buf.append(FALSE)
+    elif isinstance(value, int):
+        if INT32_MIN <= value <= INT32_MAX:
+            buf.append(INT32)
+            buf += _I32.pack(value)
+        elif INT64_MIN <= value <= INT64_MAX:
+            buf.append(INT64)
+            buf += _I64.pack(value)
+        else:
+            data = str(value).encode('ascii')
+            size = len(data)
+            if size < 256:
+                buf.append(BIGINT)
+                buf.append(size)
+            else:
+                buf.append(BIGINT32)
+                buf += _U32.pack(size)
+            buf += data
+    elif isinstance(value, float):
+        buf.append(FLOAT)
+        buf += _F64.pack(value)
+    elif isinstance(value, dict):
+        buf.append(DICT)
+        buf += _U32.pack(len(value))
+        for k, v in value.items():
+            if k.__class__ is not str:
+                raise TypeError(f'Session keys must be strings, got {k!r}')
+            _encode_value(buf, k)
+            _encode_value(buf, v)
+    elif isinstance(value, (list, tuple)):
+        buf.append(LIST)
+        buf += _U32.pack(len(value))
+        for v in value:
+            _encode_value(buf, v)
+    elif isinstance(value, str):
+        _encode_value(buf, str(value))
+    else:
+        raise TypeError(f'Object of type {type(value).__name__} cannot be stored in a session')
+
+
+def _decode_binary(raw: bytes) -> Dict[str, Any]:
+    if len(raw) == 2:
+        if raw[1] != VERSION:
+            raise ValueError(f'Unsupported session format version {raw[1]}')
+        return {}
+    try:
+        _magic_, version, created = HEADER.unpack_from(raw)
+        if version != VERSION:
+            raise ValueError(f'Unsupported session format version {version}')
+        session, pos = _decode_value(raw, HEADER.size)
+    except (struct.error, IndexError, UnicodeDecodeError, TypeError) as e:
+        # TypeError is raised by keys of unhashable types
+        raise ValueError(f'Malformed session payload: {e}')
+    if pos != len(raw):
+        raise ValueError('Malformed session payload: trailing data')
+    return {'created': created, 'session': session}
+
+
+def _decode_value(raw: bytes, pos: int) -> Tuple[Any, int]:
+    tag = raw[pos]
+    pos += 1
+    if tag == STR8:
+        end = pos + 1 + raw[pos]
+        return raw[pos + 1:end].decode('utf-8'), end
+    if tag == INT32:
+        return _I32.unpack_from(raw, pos)[0], pos + 4
+    if tag == DICT:
+        count = _U32.unpack_from(raw, pos)[0]
+        pos += 4
+        rv = {}
+        for _ in range(count):
+            key, pos = _decode_value(raw, pos)
+            rv[key], pos = _decode_value(raw, pos)
+        return rv, pos
+    if tag == NONE:
+        return None, pos
+    if tag == TRUE:
+        return True, pos
+    if tag == FALSE:
+        return False, pos
+    if tag == LIST:
+        count = _U32.unpack_from(raw, pos)[0]
+        pos += 4
+        items: List[Any] = []
+        for _ in range(count):
+            item, pos = _decode_value(raw, pos)
+            items.append(item)
+        return items, pos
+    if tag == STR32:
+        size = _U32.unpack_from(raw, pos)[0]
+        pos += 4
+        return raw[pos:pos + size].decode('utf-8'), pos + size
+    if tag == INT64:
+        return _I64.unpack_from(raw, pos)[0], pos + 8
+    if tag == FLOAT:
+        return _F64.unpack_from(raw, pos)[0], pos + 8
+    if tag == BIGINT:
+        end = pos + 1 + raw[pos]
+        return int(raw[pos + 1:end]), end
+    if tag == BIGINT32:
+        size = _U32.unpack_from(raw, pos)[0]
+        pos += 4
+        return int(raw[pos:pos + size]), pos + size
+    raise ValueError(f'Unknown type tag {tag}')
+
+
+SESSION_CODECS: Dict[SessionCodecType, Callable[[], Any]] = {
+    SessionCodecType.JSON: JsonSessionCodec,
+    SessionCodecType.BINARY: BinarySessionCodec,
+}
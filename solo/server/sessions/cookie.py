@@ -0,0 +1,193 @@
+""" Stateless session backend that keeps session data in the session cookie.
+
+Cookie values have one of the following forms:
+
+* ``s.<payload>.<signature>`` - a payload signed with HMAC-SHA256;
+* ``e.<nonce+ciphertext>`` - a payload encrypted with AES-GCM, which also authenticates it;
+* ``r.<session id>`` - a reference to a session that didn't fit into the cookie,
+  and is kept in Redis by :class:`solo.vendor.old_session.old_session.SessionStore`.
+
+Encryption requires the optional ``cryptography`` package.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import time
+from typing import Optional, Dict, Tuple, Type
+
+from solo.configurator.exceptions import ConfigurationError
+from solo.server.request import Request
+from solo.server.response import RawHeaders
+from solo.vendor.old_session.old_session import LazySession, SessionStore, SESSION_KEY, Session
+
+
+SIGNED = 's.'
+ENCRYPTED = 'e.'
+REDIS_REF = 'r.'
+
+NONCE_SIZE = 12
+
+# Browsers accept at least 4096 bytes per cookie, including its name and attributes
+DEFAULT_MAX_COOKIE_SIZE = 3800
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _derive_key(secret: bytes, purpose: bytes) -> bytes:
+    return hmac.new(secret, b'solo.session.' + purpose, hashlib.sha256).digest()
+
+
+class CookieSessionStore:
+    """ Session store with the same interface as :class:`SessionStore`, that keeps
+    session data in a signed (and optionally encrypted) cookie.
+
+    Sessions whose payload exceeds ``max_cookie_size`` are saved to the ``fallback`` Redis store,
+    and the cookie keeps a reference to them.
+    """
+    def __init__(self,
+                 fallback: SessionStore, *,
+                 secret: str,
+                 encrypt: bool = False,
+                 max_cookie_size: int = DEFAULT_MAX_COOKIE_SIZE):
+        if not secret:
+            raise ConfigurationError('Cookie sessions require a secret.')
+        self._fallback = fallback
+        secret_bytes = secret.encode('utf-8')
+        self._signing_key = _derive_key(secret_bytes, b'sign')
+        self._cipher = None
+        self._decryption_errors: Tuple[Type[Exception], ...] = ()
+        if encrypt:
+            try:
+                from cryptography.exceptions import InvalidTag
+                from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+            except ImportError:
+                raise ConfigurationError('Encrypted cookie sessions require the "cryptography" package.')
+            self._cipher = AESGCM(_derive_key(secret_bytes, b'encrypt'))
+            self._decryption_errors = (InvalidTag,)
+        self._max_cookie_size = max_cookie_size
+
+    @property
+    def cookie_name(self):
+        return self._fallback.cookie_name
+
+    @property
+    def max_age(self):
+        return self._fallback.max_age
+
+    @property
+    def cookie_params(self):
+        return self._fallback.cookie_params
+
+    async def close(self) -> None:
+        await self._fallback.close()
+
+    async def new_session(self) -> Session:
+        return LazySession(self, None, max_age=self.max_age)
+
+    def lazy_session(self, request: Request) -> LazySession:
+        session = request.get(SESSION_KEY)
+        if session is None:
+            cookie = self._fallback.load_cookie(request)
+            session = request[SESSION_KEY] = LazySession(self, cookie, max_age=self.max_age)
+        return session
+
+    async def load_session(self, request: Request) -> Session:
+        return await self.lazy_session(request).load()
+
+    async def fetch(self, identity: str) -> Optional[Dict]:
+        if identity.startswith(REDIS_REF):
+            return await self._fallback.fetch(identity[len(REDIS_REF):])
+        payload = self.unseal(identity)
+        if payload is None:
+            return None
+        try:
+            data = self._fallback._decoder(payload)
+        except ValueError:
+            return None
+        # Cookies can be replayed after they expire in the browser, their age is checked
+        # against the time they were last sealed at, see save_session()
+        max_age = self.max_age
+        if max_age is not None and data and int(time.time()) - data.get('created', 0) > max_age:
+            return None
+        return data
+
+    async def save_session(self, request: Request, session: LazySession) -> RawHeaders:
+        """ Return Set-Cookie headers with the updated session.
+        Redis is involved only for sessions that don't fit into the cookie.
+        """
+        fallback = self._fallback
+        max_age = session.max_age
+        identity = session.identity
+        redis_key = identity[len(REDIS_REF):] if identity and identity.startswith(REDIS_REF) else None
+        if not session._changed:
+            if session.loaded and not session.new and max_age is not None:
+                if redis_key is not None:
+                    await fallback.touch(redis_key, max_age)
+                    return fallback.cookie_headers(identity, max_age=max_age)
+                if not session.empty:
+                    # Prolong the session by sealing it with a new timestamp
+                    session._created = int(time.time())
+                    cookie = self.seal(fallback._encoder(fallback._get_session_data(session)))
+                    return fallback.cookie_headers(cookie, max_age=max_age)
+            return ()
+
+        await session.load()
+        identity = session.identity
+        if session.empty:
+            if identity is None:
+                return ()
+            if redis_key is not None:
+                await fallback.remove(redis_key)
+            return fallback.cookie_headers('', max_age=max_age)
+
+        session_data = fallback._get_session_data(session)
+        cookie = self.seal(fallback._encoder(session_data))
+        if len(cookie) > self._max_cookie_size:
+            # Keep the same Redis session if it exists already
+            if redis_key is None:
+                redis_key = fallback._key_factory()
+            await fallback.store(redis_key, session_data, max_age)
+            cookie = REDIS_REF + redis_key
+        elif redis_key is not None:
+            # The session shrank and moved back into the cookie
+            await fallback.remove(redis_key)
+        session._changed = False
+        return fallback.cookie_headers(cookie, max_age=max_age)
+
+    def seal(self, payload: bytes) -> str:
+        cipher = self._cipher
+        if cipher is not None:
+            nonce = os.urandom(NONCE_SIZE)
+            return ENCRYPTED + _b64encode(nonce + cipher.encrypt(nonce, payload, None))
+        signature = hmac.new(self._signing_key, payload, hashlib.sha256).digest()
+        return SIGNED + _b64encode(payload) + '.' + _b64encode(signature)
+
+    def unseal(self, cookie: str) -> Optional[bytes]:
+        """ Return the payload of a cookie, or None if it's malformed or tampered with.
+        """
+        try:
+            if cookie.startswith(SIGNED):
+                payload, _, signature = cookie[len(SIGNED):].partition('.')
+                payload = _b64decode(payload)
+                expected = hmac.new(self._signing_key, payload, hashlib.sha256).digest()
+                if hmac.compare_digest(expected, _b64decode(signature)):
+                    return payload
+                return None
+
+            if cookie.startswith(ENCRYPTED) and self._cipher is not None:
+                sealed = _b64decode(cookie[len(ENCRYPTED):])
+                try:
+                    return self._cipher.decrypt(sealed[:NONCE_SIZE], sealed[NONCE_SIZE:], None)
+                except self._decryption_errors:
+                    return None
+        except (binascii.Error, ValueError):
+            return None
+        return None
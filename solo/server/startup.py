@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from typing import Tuple
 
 import routes
 from pyrsistent import pvector
@@ -10,6 +11,7 @@ from solo.server import db
 from solo.server import memstore
 from solo.config.app import Config
 from solo.server.app import App
+from solo.configurator.registry import Registry
 
 log = logging.getLogger(__name__)
 
@@ -18,13 +20,30 @@ def application_entrypoint(loop: asyncio.AbstractEventLoop,
                           config: Config) -> AIOManager:
     """ This is where our web application starts from a config provided through CLI.
     """
-    # Setup database connection pool
-    # ------------------------------
-    dbengine = db.setup_database(config)
+    app, registry = configure_app(config)
+    log.debug(f'Serving on http://{config.server.host}:{config.server.port}')
+    return AIOManager ( loop     = loop
+                      , app      = app
+                      , registry = registry )
+
+
+def configure_app(config: Config, with_pools: bool = True) -> Tuple[App, Registry]:
+    """ Scan user apps and build the routing state. Doesn't perform any IO,
+    so the result can be shared by forked workers.
+
+    :param with_pools: create connection pools of the app, forked workers create
+                       their own ones with :func:`with_new_pools`.
+    """
+    dbengine = None
+    memstore_pool = None
+    if with_pools:
+        # Setup database connection pool
+        # ------------------------------
+        dbengine = db.setup_database(config)
 
-    # Setup memory store
-    # ------------------
-    memstore_pool = memstore.init_pool(config)
+        # Setup memory store
+        # ------------------
+        memstore_pool = memstore.init_pool(config)
     url_gen = routes.URLGenerator(
         routes.Mapper(),
         {'SERVER_NAME': config.server.host,
@@ -45,8 +64,13 @@ def application_entrypoint(loop: asyncio.AbstractEventLoop,
             package=user_app,
             ignore=pvector(['.__pycache__', f'{user_app.name}.migrations'])
         )
-    app, registry = configurator.complete()
-    log.debug(f'Serving on http://{config.server.host}:{config.server.port}')
-    return AIOManager ( loop     = loop
-                      , app      = app
-                      , registry = registry )
+    return configurator.complete()
+
+
+def with_new_pools(app: App, config: Config) -> App:
+    """ Replace connection pools of an app, i.e. in a forked worker process.
+    """
+    return app._replace(
+        db_engine=db.setup_database(config),
+        memstore=memstore.init_pool(config),
+    )
@@ -1,11 +1,30 @@
+from typing import Sequence, Tuple
+
+
 class HttpStatus(Exception):
-    pass
+    headers: Sequence[Tuple[bytes, bytes]] = ()
 
 
 class Http4xx(HttpStatus):
     status: int = 400
 
 
+class BadRequest(Http4xx):
+    status = 400
+
+
+class BadCSRFToken(BadRequest):
+    """ The CSRF token of a request is missing or invalid. """
+
+
+class BadCSRFOrigin(BadRequest):
+    """ The Origin or Referer of a request doesn't match any trusted origin. """
+
+
+class InvalidCursor(BadRequest):
+    """ A pagination cursor is malformed or belongs to a different listing. """
+
+
 class NotFound(Http4xx):
     status = 404
 
@@ -14,6 +33,17 @@ class Forbidden(Http4xx):
     status = 403
 
 
+class MethodNotAllowed(Http4xx):
+    status = 405
+
+    def __init__(self, allow: bytes):
+        self.headers = ((b'allow', allow),)
+
+
+class RequestEntityTooLarge(Http4xx):
+    status = 413
+
+
 class Http3xx(HttpStatus):
     status: int = 302
 
@@ -21,3 +51,4 @@ class Http3xx(HttpStatus):
 class Redirect(Http3xx):
     def __init__(self, location: str):
         self.location = location
+        self.headers = ((b'location', location.encode('utf-8')),)
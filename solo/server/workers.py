@@ -0,0 +1,180 @@
+""" Pre-fork process model for ``solo run --workers N``.
+
+The supervisor configures the application once (scanning, routing, API specs),
+freezes the resulting objects with :func:`gc.freeze` so that they stay shared
+copy-on-write, and then forks the workers. Every worker binds its own listening
+socket with ``SO_REUSEPORT``, so the kernel balances incoming connections between
+workers, and opens its own database and Redis pools on its own event loop of
+the configured ``server.event_loop`` type.
+
+Crashed workers are restarted. SIGINT and SIGTERM sent to the supervisor are
+forwarded to the workers as SIGTERM for a graceful shutdown.
+"""
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, Optional, Tuple
+
+import uvicorn
+
+from solo.asyncio import decide_event_loop_policy
+from solo.config.app import Config
+from solo.configurator.registry import Registry
+from solo.server.app import App
+from solo.server.io_manager import AIOManager
+from solo.server.startup import configure_app, with_new_pools
+
+log = logging.getLogger(__name__)
+
+
+# Workers that exit sooner than that after start are restarted with a delay
+MIN_WORKER_UPTIME = 1.0
+
+RESTART_DELAY = 1.0
+
+STOP_SIGNALS = {signal.SIGINT, signal.SIGTERM}
+
+
+def bind_socket(config: Config, reuse_port: bool) -> socket.socket:
+    host = config.server.host
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, config.server.port))
+    sock.listen(config.server.backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class Supervisor:
+    def __init__(self, config: Config, workers: int) -> None:
+        self.config = config
+        self.workers = workers
+        self.reuse_port = hasattr(socket, 'SO_REUSEPORT')
+        # Without SO_REUSEPORT workers accept connections from a single socket bound before forking
+        self.shared_socket: Optional[socket.socket] = None
+        self.app: Optional[App] = None
+        self.registry: Optional[Registry] = None
+        # pid -> (worker number, start time)
+        self.children: Dict[int, Tuple[int, float]] = {}
+        self.should_exit = False
+
+    def run(self) -> int:
+        log.info('Configuring application for %d workers...', self.workers)
+        # Pools are created by workers, on their own event loops
+        self.app, self.registry = configure_app(self.config, with_pools=False)
+        if not self.reuse_port:
+            log.warning('SO_REUSEPORT is not supported, workers will share a single socket')
+            self.shared_socket = bind_socket(self.config, reuse_port=False)
+
+        # Objects created so far are never released, move them out of the reach of the GC,
+        # so that collections in workers don't touch (and copy) the shared memory pages.
+        gc.freeze()
+
+        signal.signal(signal.SIGINT, self.handle_exit)
+        signal.signal(signal.SIGTERM, self.handle_exit)
+
+        for num in range(self.workers):
+            self.spawn(num)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            num, started = self.children.pop(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if self.should_exit:
+                log.info('Worker %d [%d] exited with code %d', num, pid, code)
+                continue
+            log.error('Worker %d [%d] died unexpectedly with code %d, restarting...', num, pid, code)
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(RESTART_DELAY)
+            if not self.should_exit:
+                self.spawn(num)
+
+        log.info('All workers have stopped.')
+        return 0
+
+    def spawn(self, num: int) -> None:
+        # Signals that arrive before the worker installs its handlers would be handled
+        # by the supervisor's handler in the worker and lost, and the supervisor has to know
+        # the worker before it forwards signals
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        pid = os.fork()
+        if pid:
+            self.children[pid] = (num, time.monotonic())
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+            log.info('Started worker %d [%d]', num, pid)
+            return
+
+        # Worker process
+        # --------------
+        code = 1
+        try:
+            # Terminal signals should reach the supervisor only, it forwards them once.
+            os.setpgid(0, 0)
+            # uvicorn shuts down gracefully and then re-raises the signal with the original handler,
+            # exit through SystemExit so that connection pools are closed by the IO manager
+            signal.signal(signal.SIGINT, _stop_worker)
+            signal.signal(signal.SIGTERM, _stop_worker)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+            run_worker(self.config, self.app, self.registry, self.shared_socket, self.reuse_port)
+            code = 0
+        except SystemExit as e:
+            code = e.code or 0
+        except BaseException:
+            log.exception('Worker %d has crashed', num)
+        finally:
+            logging.shutdown()
+            os._exit(code)
+
+    def handle_exit(self, signum, frame) -> None:
+        if self.should_exit:
+            return
+        log.info('Received %s, stopping workers...', signal.Signals(signum).name)
+        self.should_exit = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+
+def _stop_worker(signum, frame) -> None:
+    raise SystemExit(0)
+
+
+def run_worker(config: Config,
+               app: App,
+               registry: Registry,
+               shared_socket: Optional[socket.socket],
+               reuse_port: bool) -> None:
+    """ Serve requests in a forked process, on its own event loop and connection pools.
+    """
+    sock = shared_socket if shared_socket is not None else bind_socket(config, reuse_port)
+    decide_event_loop_policy(config)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.set_debug(config.debug)
+    app = with_new_pools(app, config)
+    with AIOManager(loop, app, registry) as app_manager:
+        server = uvicorn.Server(uvicorn.Config(
+            app_manager,
+            log_config=dict(config.logging),
+            log_level='debug' if config.debug else 'info',
+            timeout_keep_alive=config.server.keep_alive_timeout,
+            lifespan='off',
+        ))
+        loop.run_until_complete(server.serve(sockets=[sock]))
+    loop.close()
+
+
+def run_workers(config: Config, workers: int) -> int:
+    return Supervisor(config, workers).run()
@@ -1,3 +1,4 @@
-from .sql import SQLService
+from .pagination import Page
+from .sql import SQLService, cached_statement
 
-__all__ = ['SQLService']
+__all__ = ['SQLService', 'Page', 'cached_statement']
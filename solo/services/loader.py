@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import weakref
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from ..server.db.types import SQLEngine
+from ..server.request import Request
+
+log = logging.getLogger(__name__)
+
+
+# Maximum number of keys in a single IN (...) query
+MAX_BATCH_SIZE = 1000
+
+# Request state key of the identity map, see request_identity_map()
+IDENTITY_MAP_KEY = 'solo_identity_map'
+
+
+class BatchLoader:
+    """ Coalesces lookups of rows by the same column, issued within the same event loop tick,
+    into a single ``SELECT ... WHERE column IN (...)`` query.
+
+    Concurrent lookups of the same key share one future. A key that matches several rows
+    resolves to one of them, and a key without rows resolves to ``None``.
+    """
+    __slots__ = ('_engine', '_column', '_query', '_coerce', '_pending', '_fetching')
+
+    def __init__(self, engine: SQLEngine, column: InstrumentedAttribute, columns: List[InstrumentedAttribute]) -> None:
+        self._engine = engine
+        self._column = column
+        self._query = select(*columns).where(column.in_(bindparam('keys', expanding=True)))
+        try:
+            self._coerce = column.type.python_type
+        except NotImplementedError:
+            self._coerce = None
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        # The event loop keeps weak references to tasks only
+        self._fetching: Set[asyncio.Task] = set()
+
+    def coerce(self, key: Any) -> Hashable:
+        """ Converts a key to the Python type of the column, e.g. URL parameters to integers.
+
+        :raise ValueError: if the key can't be converted.
+        """
+        coerce = self._coerce
+        if coerce is not None and key.__class__ is not coerce:
+            try:
+                key = coerce(key)
+            except TypeError as e:
+                raise ValueError(str(e))
+        return key
+
+    def load(self, key: Any) -> 'asyncio.Future[Optional[Mapping[str, Any]]]':
+        """ Returns a future of the row whose column matches the key.
+        Keys that can't be converted to the type of the column match no rows.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            key = self.coerce(key)
+        except ValueError:
+            future = loop.create_future()
+            future.set_result(None)
+            return future
+        future = self._pending.get(key)
+        if future is None:
+            if not self._pending:
+                # Dispatch after all callbacks that are ready in this tick have queued their keys
+                loop.call_soon(self._dispatch)
+            future = self._pending[key] = loop.create_future()
+        # Cancellation of one caller must not cancel the lookup of others
+        return asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._fetch(batch))
+        self._fetching.add(task)
+        task.add_done_callback(self._fetching.discard)
+
+    async def _fetch(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        keys = list(batch)
+        column = self._column
+        found: Dict[Hashable, Mapping[str, Any]] = {}
+        try:
+            async with self._engine.connect() as c:
+                for start in range(0, len(keys), MAX_BATCH_SIZE):
+                    result = await c.execute(self._query, {'keys': keys[start:start + MAX_BATCH_SIZE]})
+                    for row in result.mappings():
+                        found.setdefault(row[column.key], row)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        log.debug('Loaded %d of %d keys by %s', len(found), len(keys), column)
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+# Loaders of an engine by entity and column. Engines are replaced in forked workers,
+# so loaders never outlive the engines and event loops they are bound to.
+_loaders: 'weakref.WeakKeyDictionary[SQLEngine, Dict[Tuple[Any, str], BatchLoader]]' = weakref.WeakKeyDictionary()
+
+
+def get_loader(engine: SQLEngine,
+               entity: Any,
+               column: InstrumentedAttribute,
+               columns: Callable[[], Iterable[InstrumentedAttribute]]) -> BatchLoader:
+    """ Returns the loader of entities by a column, ``columns()`` returns columns of the loaded rows.
+    """
+    try:
+        engine_loaders = _loaders[engine]
+    except KeyError:
+        engine_loaders = _loaders[engine] = {}
+    key = (entity, column.key)
+    loader = engine_loaders.get(key)
+    if loader is None:
+        loader = engine_loaders[key] = BatchLoader(engine, column, list(columns()))
+    return loader
+
+
+def request_identity_map(request: Request) -> Dict[Tuple[Any, str, Any], Any]:
+    """ Returns the identity map of a request. Services that share it return the same entity
+    instance for repeated lookups of the same key within the request.
+    """
+    identity_map = request.get(IDENTITY_MAP_KEY)
+    if identity_map is None:
+        identity_map = request[IDENTITY_MAP_KEY] = {}
+    return identity_map
@@ -0,0 +1,120 @@
+""" Keyset pagination, see :meth:`solo.services.SQLService.page`.
+
+A page ends with a cursor, an opaque token of the sort key values of its last row.
+The next page is selected with ``WHERE (keys) > (cursor values) ORDER BY keys LIMIT size``,
+which an index on the keys answers by seeking to the first row of the page, so the cost
+of a page doesn't depend on its depth the way it does with OFFSET.
+
+Listings follow the cursor pagination of JSON:API with ``page[size]`` and ``page[after]``
+query parameters, and the ``jsonapi`` renderer adds ``links.next`` to :class:`Page` responses.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import urllib.parse
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..server.codec import json_codec
+from ..server.request import Request
+from ..server.statuses import BadRequest, InvalidCursor
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+PAGE_SIZE_PARAM = 'page[size]'
+PAGE_AFTER_PARAM = 'page[after]'
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    """ Cursor of the next page, or ``None`` if this page is the last one.
+    """
+
+
+# Sort key values that JSON codecs don't represent the same way are stored as strings,
+# and converted back by the Python types of key columns
+_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    uuid.UUID: str,
+    decimal.Decimal: str,
+}
+
+_DECODERS: Dict[type, Callable[[str], Any]] = {
+    datetime.datetime: datetime.datetime.fromisoformat,
+    datetime.date: datetime.date.fromisoformat,
+    datetime.time: datetime.time.fromisoformat,
+    uuid.UUID: uuid.UUID,
+    decimal.Decimal: decimal.Decimal,
+}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    values = [v if v.__class__ not in _ENCODERS else _ENCODERS[v.__class__](v) for v in values]
+    return base64.urlsafe_b64encode(json_codec.dumps(values)).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token: str, types: Sequence[Optional[type]]) -> List[Any]:
+    """ Returns sort key values of a cursor.
+
+    :param types: Python types of the sort keys, values of unknown (``None``) types are not checked.
+    :raise InvalidCursor: if the token isn't a cursor of sort keys of the given types.
+    """
+    try:
+        values = json_codec.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        raise InvalidCursor()
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor()
+    return [_decode_value(v, t) for v, t in zip(values, types)]
+
+
+def _decode_value(value: Any, python_type: Optional[type]) -> Any:
+    if python_type is None:
+        return value
+    decode = _DECODERS.get(python_type)
+    if decode is not None:
+        if value.__class__ is not str:
+            raise InvalidCursor()
+        try:
+            return decode(value)
+        except (ValueError, ArithmeticError):
+            raise InvalidCursor()
+    if python_type is float and value.__class__ in (int, float):
+        return float(value)
+    if value.__class__ is not python_type:
+        raise InvalidCursor()
+    return value
+
+
+def page_params(request: Request,
+                default_size: int = DEFAULT_PAGE_SIZE,
+                max_size: int = MAX_PAGE_SIZE) -> Tuple[int, Optional[str]]:
+    """ Returns the size and the cursor of a requested page.
+    """
+    params = request.qs_params
+    size = default_size
+    if PAGE_SIZE_PARAM in params:
+        try:
+            size = int(params[PAGE_SIZE_PARAM][0])
+        except ValueError:
+            raise BadRequest()
+        if not 0 < size <= max_size:
+            raise BadRequest()
+    after = params.get(PAGE_AFTER_PARAM)
+    return size, after[0] if after else None
+
+
+def next_page_link(request: Request, page: Page) -> Optional[str]:
+    """ Returns the URL of the page after a given one, with other query parameters of the request.
+    """
+    if page.next_cursor is None:
+        return None
+    params = {k: v for k, v in request.qs_params.items() if k != PAGE_AFTER_PARAM}
+    params[PAGE_AFTER_PARAM] = [page.next_cursor]
+    return f'{request.path}?{urllib.parse.urlencode(params, doseq=True)}'
@@ -1,62 +1,330 @@
 import logging
-from typing import List, Iterable, Set, Optional
+from typing import List, Iterable, Set, Optional, Dict, Tuple, Any, Hashable, Callable, AsyncIterator, Union, Sequence
+from typing import AsyncIterable
 
-from sqlalchemy import Table, select
+from psycopg import sql
+from psycopg.types.json import Json
+from sqlalchemy import Table, JSON, select, bindparam, tuple_
 from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.sql import Executable
 
 from ..server.db.types import SQLEngine
-from ..server.model import Base
+from ..server.model import Base, record_type
+from .loader import get_loader
+from .pagination import Page, encode_cursor, decode_cursor
 
 log = logging.getLogger(__name__)
 
 
+DEFAULT_STREAM_BATCH_SIZE = 1000
+
+# Number of rows written by save_many() and copy_in() in one transaction
+DEFAULT_WRITE_BATCH_SIZE = 1000
+
+_statements: Dict[Hashable, Executable] = {}
+
+
+def cached_statement(key: Hashable, build: Callable[[], Executable]) -> Executable:
+    """ Return a statement built once per process for the key.
+
+    Values of cached statements must be passed as bound parameters at execution time.
+    Reusing statement objects saves building the constructs and computing their cache keys,
+    and SQLAlchemy finds their compiled SQL in the compiled cache of an engine. The SQL text
+    is then the same for every execution, so psycopg prepares it on the server
+    after ``postgresql.prepare_threshold`` executions on a connection.
+    """
+    try:
+        return _statements[key]
+    except KeyError:
+        statement = _statements[key] = build()
+        return statement
+
+
+def _python_type(column: InstrumentedAttribute) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
 class SQLService:
 
-    def __init__(self, db: SQLEngine, entity: Base, table: Optional[Table] = None):
+    def __init__(self,
+                 db: SQLEngine,
+                 entity: Base,
+                 table: Optional[Table] = None,
+                 identity_map: Optional[Dict[Tuple[Any, str, Any], Base]] = None):
+        """
+        :param identity_map: entities loaded by :meth:`get`, e.g. :func:`solo.services.loader.request_identity_map`.
+                             Repeated lookups of the same key return the same instance without queries.
+        """
         self.engine = db
         if table is None:
             table = entity.__table__
         self.t = table
         self.e = entity
+        self.identity_map = identity_map
 
     async def get(self, search_field: InstrumentedAttribute,
                         search_value: str) -> Optional[Base]:
-        rv = await self.get_many(search_field, [search_value], limit=1)
-        if rv:
-            return rv[0]
-        return None
+        """ Return a record matched by the value. Concurrent lookups by the same field
+        are batched into a single query by :class:`solo.services.loader.BatchLoader`.
+        """
+        loader = get_loader(self.engine, self.e, search_field, self.columns)
+        try:
+            key = loader.coerce(search_value)
+        except ValueError:
+            # e.g. a non-numeric id from a URL
+            return None
+        identity_map = self.identity_map
+        if identity_map is not None:
+            identity = (self.e, search_field.key, key)
+            try:
+                return identity_map[identity]
+            except KeyError:
+                pass
+        row = await loader.load(key)
+        instance = None if row is None else self.e(**row)
+        if identity_map is not None:
+            identity_map[identity] = instance
+        return instance
 
     async def get_many(self,
                        search_field: InstrumentedAttribute,
                        search_value: List[str],
                        limit: Optional[int] = None,
-                       offset: int = 0) -> List[Base]:
+                       offset: int = 0,
+                       fields: Optional[Sequence[InstrumentedAttribute]] = None,
+                       records: bool = False) -> List[Union[Base, tuple]]:
         """ Return a collection of matched records up to the specified limit.
+
+        :param fields: columns to select, all columns by default.
+        :param records: return read-only records of :func:`solo.server.model.record_type`
+                        instead of entities, which is several times faster for large results.
         """
-        query = (select(self.columns())
-                       .where(search_field.in_(search_value))
-                       .offset(offset))
-        if limit:
-            query = query.limit(limit)
-        async with self.engine.acquire() as c:
-            csr = await c.execute(query)
-            result = await csr.fetchall()
+        limited = bool(limit)
+        fields_key = tuple(f.key for f in fields) if fields else None
+        query = cached_statement(('get_many', self.e, search_field, limited, fields_key),
+                                 lambda: self._get_many_query(search_field, limited, fields))
+        params = {'values': list(search_value), 'offset': offset}
+        if limited:
+            params['limit'] = limit
+        async with self.engine.connect() as c:
+            result = await c.execute(query, params)
+            if records:
+                make = record_type(self.e, fields_key)._make
+                return [make(row) for row in result]
             entity = self.e
-            return [entity(**record) for record in result]
+            return [entity(**record) for record in result.mappings()]
+
+    def _get_many_query(self,
+                        search_field: InstrumentedAttribute,
+                        limited: bool,
+                        fields: Optional[Sequence[InstrumentedAttribute]] = None) -> Executable:
+        query = (select(*self.columns(fields))
+                 .where(search_field.in_(bindparam('values', expanding=True)))
+                 .offset(bindparam('offset')))
+        if limited:
+            query = query.limit(bindparam('limit'))
+        return query
+
+    async def page(self,
+                   order_by: Union[InstrumentedAttribute, Sequence[InstrumentedAttribute]],
+                   size: int,
+                   after: Optional[str] = None,
+                   search_field: Optional[InstrumentedAttribute] = None,
+                   search_value: Optional[List[str]] = None,
+                   fields: Optional[Sequence[InstrumentedAttribute]] = None,
+                   records: bool = False) -> Page:
+        """ Return a page of records that follow the ``after`` cursor in the order of unique
+        sort keys, see :mod:`solo.services.pagination`. Sort keys should be covered by an index,
+        e.g. ``order_by=(Entity.created, Entity.id)``, then every page takes the same time to fetch.
+
+        :param search_value: values of ``search_field`` to match, ``None`` matches no rows.
+        :param fields: columns to select, sort keys are always selected.
+        :param records: return records instead of entities, see :meth:`get_many`.
+        :raise InvalidCursor: if the cursor doesn't match the sort keys.
+        """
+        keys = (order_by,) if isinstance(order_by, InstrumentedAttribute) else tuple(order_by)
+        if fields:
+            selected = {f.key for f in fields}
+            fields = list(fields) + [k for k in keys if k.key not in selected]
+        else:
+            fields = None
+        fields_key = None if fields is None else tuple(f.key for f in fields)
+        seek = after is not None
+        query = cached_statement(
+            ('page', self.e, tuple(k.key for k in keys), seek, search_field, fields_key),
+            lambda: self._page_query(keys, seek, search_field, fields)
+        )
+        # One more row tells whether there is a next page
+        params = {'limit': size + 1}
+        if seek:
+            types = [_python_type(k) for k in keys]
+            params.update((f'after_{i}', v) for i, v in enumerate(decode_cursor(after, types)))
+        if search_field is not None:
+            params['values'] = list(search_value or ())
+        async with self.engine.connect() as c:
+            result = await c.execute(query, params)
+            rows = result.all()
+
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            last = rows[-1]._mapping
+            next_cursor = encode_cursor([last[k.key] for k in keys])
+        if records:
+            make = record_type(self.e, fields_key)._make
+            items = [make(row) for row in rows]
+        else:
+            entity = self.e
+            items = [entity(**row._mapping) for row in rows]
+        return Page(items, next_cursor)
+
+    def _page_query(self,
+                    keys: Sequence[InstrumentedAttribute],
+                    seek: bool,
+                    search_field: Optional[InstrumentedAttribute],
+                    fields: Optional[Sequence[InstrumentedAttribute]]) -> Executable:
+        query = select(*self.columns(fields))
+        if search_field is not None:
+            query = query.where(search_field.in_(bindparam('values', expanding=True)))
+        if seek:
+            bounds = [bindparam(f'after_{i}', type_=k.type) for i, k in enumerate(keys)]
+            if len(keys) == 1:
+                query = query.where(keys[0] > bounds[0])
+            else:
+                # A row value comparison, so that Postgres seeks a composite index on the keys
+                query = query.where(tuple_(*keys) > tuple_(*bounds))
+        return query.order_by(*keys).limit(bindparam('limit'))
+
+    async def stream(self,
+                     search_field: Optional[InstrumentedAttribute] = None,
+                     search_value: Optional[List[str]] = None,
+                     batch_size: int = DEFAULT_STREAM_BATCH_SIZE,
+                     entities: bool = False) -> AsyncIterator[Union[Dict[str, Any], Base]]:
+        """ Iterate over records matched by the values, or over all records if ``search_field``
+        is not specified.
+
+        Rows are read from a server-side cursor ``batch_size`` rows at a time, so memory use
+        doesn't depend on the number of records. The iterator holds a database connection
+        until it's exhausted or closed.
+
+        :param entities: yield entities instead of dicts of column values. Both can be passed
+                         to :func:`solo.server.response.stream_ndjson` directly.
+        """
+        query = cached_statement(('stream', self.e, search_field), lambda: self._stream_query(search_field))
+        params = {} if search_field is None else {'values': list(search_value or ())}
+        entity = self.e
+        async with self.engine.connect() as c:
+            async with c.stream(query, params, execution_options={'yield_per': batch_size}) as result:
+                async for rows in result.mappings().partitions():
+                    for row in rows:
+                        yield entity(**row) if entities else dict(row)
+
+    def _stream_query(self, search_field: Optional[InstrumentedAttribute]) -> Executable:
+        query = select(*self.columns())
+        if search_field is not None:
+            query = query.where(search_field.in_(bindparam('values', expanding=True)))
+        return query
 
     async def save(self, instance: Base) -> Base:
-        columns = instance.__table__.c
+        table = instance.__table__
         values = instance.as_dict(exclude={'id'})
+        # Columns to insert or update are taken from the keys of parameters
         if instance.id is None:
-            query = self.t.insert().values(**values).returning(columns.id)
+            query = cached_statement(('insert', table), lambda: table.insert().returning(table.c.id))
         else:
-            query = self.t.update().values(**values).where(columns.id == instance.id).returning(columns.id)
-        async with self.engine.acquire() as c:
-            csr = await c.execute(query)
-            instance_id = await csr.scalar()
-            instance.id = instance_id
+            query = cached_statement(('update', table),
+                                     lambda: table.update().where(table.c.id == bindparam('pk')).returning(table.c.id))
+            values['pk'] = instance.id
+        async with self.engine.begin() as c:
+            result = await c.execute(query, values)
+            instance.id = result.scalar()
             return instance
 
+    async def save_many(self, instances: Iterable[Base], batch_size: int = DEFAULT_WRITE_BATCH_SIZE) -> List[Base]:
+        """ Save instances ``batch_size`` at a time, each batch in its own transaction.
+
+        New instances of a batch are inserted with a single multi-row ``INSERT ... RETURNING id``,
+        and existing ones are updated with one executemany. Batches committed before a failure
+        stay committed.
+        """
+        table = self.t
+        insert = cached_statement(('insert_many', table),
+                                  lambda: table.insert().returning(table.c.id, sort_by_parameter_order=True))
+        update = cached_statement(('update_many', table),
+                                  lambda: table.update().where(table.c.id == bindparam('pk')))
+        instances = list(instances)
+        for start in range(0, len(instances), batch_size):
+            batch = instances[start:start + batch_size]
+            new = [i for i in batch if i.id is None]
+            existing = [i for i in batch if i.id is not None]
+            async with self.engine.begin() as c:
+                if new:
+                    result = await c.execute(insert, [i.as_dict(exclude={'id'}) for i in new],
+                                             execution_options={'insertmanyvalues_page_size': batch_size})
+                    for instance, pk in zip(new, result.scalars()):
+                        instance.id = pk
+                if existing:
+                    await c.execute(update, [dict(i.as_dict(exclude={'id'}), pk=i.id) for i in existing])
+            log.debug('Saved %d new and %d existing rows of %s', len(new), len(existing), table.name)
+        return instances
+
+    async def copy_in(self,
+                      instances: AsyncIterable[Base],
+                      batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+                      fields: Optional[Sequence[str]] = None) -> int:
+        """ Write instances with PostgreSQL ``COPY ... FROM STDIN``, committing every ``batch_size`` rows.
+        It's the fastest way to load large amounts of rows, but ids of new rows aren't returned
+        and conflicting rows fail the whole batch. Returns the number of written rows.
+        ``COPY`` only inserts rows, so it can't make entities cached by services stale.
+
+        :param fields: names of columns to write, all columns except ``id`` by default.
+        """
+        table = self.t
+        if fields is None:
+            fields = [k for k in table.c.keys() if k != 'id']
+        statement = sql.SQL('COPY {} ({}) FROM STDIN').format(
+            sql.Identifier(*filter(None, [table.schema, table.name])),
+            sql.SQL(', ').join(sql.Identifier(table.c[f].name) for f in fields),
+        )
+        converters = [self._copy_converter(table.c[f]) for f in fields]
+
+        total = 0
+        batch: List[Base] = []
+        async with self.engine.connect() as c:
+            async for instance in instances:
+                batch.append(instance)
+                if len(batch) >= batch_size:
+                    total += await self._copy_batch(c, statement, fields, converters, batch)
+                    batch = []
+            if batch:
+                total += await self._copy_batch(c, statement, fields, converters, batch)
+        return total
+
+    async def _copy_batch(self, c, statement: sql.Composed, fields: Sequence[str],
+                          converters: List[Optional[Callable[[Any], Any]]], batch: List[Base]) -> int:
+        async with c.begin():
+            raw = await c.get_raw_connection()
+            async with raw.driver_connection.cursor() as cursor:
+                async with cursor.copy(statement) as copy:
+                    for instance in batch:
+                        row = [getattr(instance, f) for f in fields]
+                        for i, convert in enumerate(converters):
+                            if convert is not None and row[i] is not None:
+                                row[i] = convert(row[i])
+                        await copy.write_row(row)
+        log.debug('Copied %d rows into %s', len(batch), self.t.name)
+        return len(batch)
+
+    def _copy_converter(self, column) -> Optional[Callable[[Any], Any]]:
+        """ Values of COPY bypass SQLAlchemy, so they're converted the way it binds parameters.
+        """
+        if isinstance(column.type, JSON):
+            return Json
+        return column.type.bind_processor(self.engine.dialect)
+
     def columns(self,
                 fields: Optional[List[InstrumentedAttribute]] = None,
                 exclude: Optional[Set[InstrumentedAttribute]] = None,
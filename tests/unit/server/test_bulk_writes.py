@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import sqlalchemy as sa
+from psycopg.types.json import Json
+from sqlalchemy.dialects.postgresql.psycopg import PGDialect_psycopg
+
+from solo.apps.accounts.cache import UserCache
+from solo.apps.accounts.model import Auth, AuthProvider, Group, User
+from solo.apps.accounts.service import UserService
+from solo.services import SQLService
+
+
+class SyncEngine:
+    """ Runs statements of SQLService on a synchronous SQLite engine. """
+    def __init__(self, engine):
+        self.engine = engine
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def connect(self):
+        with self.engine.connect() as c:
+            yield SyncConnection(c)
+
+    @asynccontextmanager
+    async def begin(self):
+        with self.engine.begin() as c:
+            self.transactions += 1
+            yield SyncConnection(c)
+
+
+class SyncConnection:
+    def __init__(self, c):
+        self.c = c
+
+    async def execute(self, query, params=None, execution_options=None):
+        return self.c.execute(query, params, execution_options=execution_options or {})
+
+
+def test_instances_are_saved_in_batches():
+    engine = sa.create_engine('sqlite://')
+    User.__table__.create(engine)
+    db = SyncEngine(engine)
+    service = SQLService(db, User)
+
+    async def scenario():
+        users = await service.save_many([User(name=f'user {i}') for i in range(5)], batch_size=2)
+        assert [u.id for u in users] == [1, 2, 3, 4, 5]
+        assert db.transactions == 3
+
+        users[0].name = 'renamed'
+        await service.save_many([users[0], User(name='user 5')])
+        assert db.transactions == 4
+
+    asyncio.run(scenario())
+    with engine.connect() as c:
+        assert c.execute(sa.select(User.id, User.name).order_by(User.id)).all()[0] == (1, 'renamed')
+        assert c.execute(sa.select(sa.func.count()).select_from(User.__table__)).scalar() == 6
+
+
+def test_saved_users_are_evicted_from_user_cache():
+    engine = sa.create_engine('sqlite://')
+    User.__table__.create(engine)
+    cache = UserCache(ttl=60)
+    service = UserService(SyncEngine(engine), users_cache=cache)
+
+    async def scenario():
+        users = await service.save_many([User(name='user')])
+        assert (await service.get_by_id(users[0].id)).name == 'user'
+        assert cache.get(users[0].id) is not None
+
+        users[0].name = 'renamed'
+        await service.save_many(users)
+        assert cache.get(users[0].id) is None
+        assert (await service.get_by_id(users[0].id)).name == 'renamed'
+
+    asyncio.run(scenario())
+
+
+class FakeCopyEngine:
+    """ Records rows written with COPY through the psycopg connection of SQLAlchemy. """
+    dialect = PGDialect_psycopg()
+
+    def __init__(self):
+        self.copies = []
+        self.commits = 0
+
+    @asynccontextmanager
+    async def connect(self):
+        yield self
+
+    @asynccontextmanager
+    async def begin(self):
+        yield
+        self.commits += 1
+
+    async def get_raw_connection(self):
+        return SimpleNamespace(driver_connection=self)
+
+    @asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    @asynccontextmanager
+    async def copy(self, statement):
+        copy = FakeCopy()
+        yield copy
+        self.copies.append((statement.as_string(None), copy.rows))
+
+
+class FakeCopy:
+    def __init__(self):
+        self.rows = []
+
+    async def write_row(self, row):
+        self.rows.append(row)
+
+
+def test_instances_are_copied_in_batches():
+    engine = FakeCopyEngine()
+
+    async def auths():
+        for i in range(3):
+            yield Auth(provider=AuthProvider.GITHUB, provider_uid=str(i), access_token='', user_id=i)
+
+    async def groups():
+        yield Group(name='admins', description='', permissions=['admin'])
+
+    async def scenario():
+        assert await SQLService(engine, Auth).copy_in(auths(), batch_size=2) == 3
+        assert await SQLService(engine, Group).copy_in(groups(), fields=['name', 'permissions']) == 1
+
+    asyncio.run(scenario())
+    assert engine.commits == 3
+    (statement, first), (_, second), (group_statement, [group_row]) = engine.copies
+    assert statement == 'COPY "auth" ("provider", "provider_uid", "access_token", "user_id") FROM STDIN'
+    assert first == [['github', '0', '', 0], ['github', '1', '', 1]]
+    assert second == [['github', '2', '', 2]]
+    assert group_statement == 'COPY "groups" ("name", "permissions") FROM STDIN'
+    assert group_row[0] == 'admins'
+    assert isinstance(group_row[1], Json) and group_row[1].obj == ['admin']
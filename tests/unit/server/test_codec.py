@@ -0,0 +1,25 @@
+import pytest
+
+from solo.config.app import JsonBackend
+from solo.server.codec import JsonCodec
+
+
+@pytest.mark.parametrize('backend', [JsonBackend.STDLIB, JsonBackend.UJSON, JsonBackend.ORJSON])
+def test_backends_are_interchangeable(backend):
+    codec = JsonCodec()
+    try:
+        codec.use(backend)
+    except ImportError:
+        pytest.skip(f'{backend.value} is not installed')
+    data = {'a': [1, 2.5, None, True], 'b': 'юникод/'}
+    encoded = codec.dumps(data)
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == data
+    assert codec.loads(encoded.decode('utf-8')) == data
+    assert codec.dumps_str(data) == encoded.decode('utf-8')
+
+
+def test_auto_falls_back_to_installed_backend():
+    codec = JsonCodec()
+    assert codec.use(JsonBackend.AUTO) is codec.backend
+    assert codec.backend is not JsonBackend.AUTO
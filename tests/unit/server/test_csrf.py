@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+from pyrsistent import pvector
+
+from solo.server.csrf import HMACCSRFStoragePolicy, REGISTRY_KEY, CSRF_COOKIE_KEY, check_csrf_token, \
+    check_csrf_origin, get_csrf_token
+from solo.server.request import Request
+from solo.server.statuses import BadCSRFToken, BadCSRFOrigin
+
+from .test_request import make_scope, make_receive, run
+
+
+def make_request(policy, headers=(), body=None, **kw):
+    headers = list(headers)
+    if body is not None:
+        headers.append((b'content-type', b'application/x-www-form-urlencoded'))
+    request = Request(make_scope(method='POST', headers=headers, **kw),
+                      receive=make_receive(body or b''))
+    registry = SimpleNamespace(csrf_policy=policy,
+                               config=SimpleNamespace(csrf=SimpleNamespace(trusted_origins=pvector([]))))
+    request[REGISTRY_KEY] = registry
+    return request
+
+
+def issue(policy):
+    """ Returns a token and the cookie header that binds it to a client. """
+    request = make_request(policy)
+    token = run(get_csrf_token(request))
+    set_cookie = request[CSRF_COOKIE_KEY][0][1]
+    return token, set_cookie.split(b';')[0]
+
+
+def test_hmac_token_round_trip():
+    policy = HMACCSRFStoragePolicy('secret')
+    token, cookie = issue(policy)
+
+    request = make_request(policy, headers=[(b'cookie', cookie), (b'x-csrf-token', token.encode())])
+    assert run(check_csrf_token(request))
+    # Existing clients get new tokens without new cookies
+    run(get_csrf_token(request))
+    assert CSRF_COOKIE_KEY not in request
+
+    request = make_request(policy, headers=[(b'cookie', cookie)], body=b'csrf_token=' + token.encode())
+    assert run(check_csrf_token(request))
+
+
+def test_hmac_token_is_bound_to_client_and_secret():
+    policy = HMACCSRFStoragePolicy('secret')
+    token, cookie = issue(policy)
+    _, other_cookie = issue(policy)
+
+    for p, c in [(policy, other_cookie), (HMACCSRFStoragePolicy('other'), cookie)]:
+        request = make_request(p, headers=[(b'cookie', c), (b'x-csrf-token', token.encode())])
+        assert not run(check_csrf_token(request, raises=False))
+
+    request = make_request(policy, headers=[(b'x-csrf-token', token.encode())])
+    with pytest.raises(BadCSRFToken):
+        run(check_csrf_token(request))
+
+    request = make_request(policy, headers=[(b'cookie', cookie), (b'x-csrf-token', b'1.garbage')])
+    assert not run(check_csrf_token(request, raises=False))
+
+
+def test_hmac_token_expires():
+    policy = HMACCSRFStoragePolicy('secret', max_age=-1)
+    token, cookie = issue(policy)
+    request = make_request(policy, headers=[(b'cookie', cookie), (b'x-csrf-token', token.encode())])
+    assert not run(check_csrf_token(request, raises=False))
+
+
+def test_check_csrf_origin():
+    policy = HMACCSRFStoragePolicy('secret')
+    host = [(b'host', b'example.com')]
+    assert check_csrf_origin(make_request(policy, headers=host))
+
+    request = make_request(policy, headers=[*host, (b'origin', b'https://example.com')], scheme='https')
+    assert check_csrf_origin(request)
+
+    request = make_request(policy, headers=[*host, (b'referer', b'https://evil.com/')], scheme='https')
+    with pytest.raises(BadCSRFOrigin):
+        check_csrf_origin(request)
+    assert check_csrf_origin(request, trusted_origins=['.evil.com'])
+
+
+def test_hmac_client_id_is_reissued_if_not_ascii():
+    policy = HMACCSRFStoragePolicy('secret')
+    # Quoted cookie values are unescaped to non-ASCII characters
+    cookie = b'csrf="\\303\\274"'
+    request = make_request(policy, headers=[(b'cookie', cookie)])
+    token = run(get_csrf_token(request))
+    assert CSRF_COOKIE_KEY in request
+
+    request = make_request(policy, headers=[(b'cookie', cookie), (b'x-csrf-token', token.encode())])
+    with pytest.raises(BadCSRFToken):
+        run(check_csrf_token(request))
+
+
+def test_body_can_be_read_after_csrf_check():
+    policy = HMACCSRFStoragePolicy('secret')
+    token, cookie = issue(policy)
+    body = b'csrf_token=' + token.encode() + b'&name=value'
+    request = make_request(policy, headers=[(b'cookie', cookie)], body=body)
+    assert run(check_csrf_token(request))
+    assert run(request.read()) == body
+    assert run(request.form())['name'] == ['value']
@@ -0,0 +1,30 @@
+import asyncio
+
+from solo.apps.accounts import util
+from solo.apps.accounts.model import Guest
+from solo.server.request import Request
+
+from .test_request import make_scope
+
+
+def test_current_user_is_resolved_once_per_request(monkeypatch):
+    calls = []
+
+    async def resolve(db, request):
+        calls.append(request)
+        await asyncio.sleep(0)
+        return Guest
+
+    monkeypatch.setattr(util, '_resolve_user', resolve)
+
+    async def scenario():
+        request = Request(make_scope())
+        users = await asyncio.gather(*[util.get_user(None, None, request) for _ in range(3)])
+        assert users == [Guest] * 3
+        assert await util.get_user(None, None, request) is Guest
+        assert len(calls) == 1
+
+        await util.get_user(None, None, Request(make_scope()))
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from solo.configurator.exceptions import ConfigurationError
+from solo.configurator.registry import Registry
+from solo.server.db.types import SQLEngine
+from solo.server.runtime.dependencies import Runtime, compile_dispatch_plan
+from solo.vendor.old_session.old_session import Session, LazySession, SessionStore
+
+from .test_sessions import FakeRedis, make_request
+
+
+class View:
+    def __init__(self, request, context):
+        pass
+
+    async def get(self, reg: Registry, db: SQLEngine, lazy: LazySession, session: Session, page=1):
+        return reg, db, lazy, session
+
+
+def make_runtime():
+    store = SessionStore(FakeRedis(), cookie_name='sid')
+    store._redis.data['sid_abc'] = b'{"created": %d, "session": {"a": 1}}' % time.time()
+    return Runtime(registry='registry', dbengine='engine', memstore=None, session_storage=store)
+
+
+def test_plans_resolve_dependencies_by_scope():
+    plan = compile_dispatch_plan(View, 'get')
+    assert (plan.is_method, plan.is_async) == (True, True)
+    assert [name for name, _ in plan.constants] == ['reg', 'db']
+    assert [name for name, _ in plan.request_scoped] == ['lazy']
+    assert [name for name, _ in plan.awaitable] == ['session']
+
+    runtime = make_runtime()
+    bound = plan.bind(runtime)
+    assert plan.bind(runtime) is bound
+    assert plan.bind(make_runtime()) is not bound
+
+    async def collect():
+        request = make_request(runtime.session_storage, 'abc')
+        kwargs = await plan.collect(runtime, request)
+        # both session dependencies are the same request-scoped session
+        assert kwargs['lazy'] is kwargs['session']
+        assert kwargs['session']['a'] == 1
+        return kwargs
+
+    kwargs = asyncio.run(collect())
+    assert (kwargs['reg'], kwargs['db']) == ('registry', 'engine')
+    assert 'page' not in kwargs
+
+
+def test_function_views_skip_request_and_context():
+    def view(request, context, reg: Registry):
+        return reg
+
+    plan = compile_dispatch_plan(view, None)
+    assert (plan.is_method, plan.is_async) == (False, False)
+    assert asyncio.run(plan.collect(make_runtime(), None)) == {'reg': 'registry'}
+
+
+def test_unknown_dependencies_are_configuration_errors():
+    async def unknown(request, context, value: dict):
+        pass
+
+    async def untyped(request, context, value):
+        pass
+
+    for view in (unknown, untyped):
+        with pytest.raises(ConfigurationError):
+            compile_dispatch_plan(view, None)
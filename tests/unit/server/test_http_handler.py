@@ -0,0 +1,177 @@
+import asyncio
+import functools
+from types import SimpleNamespace
+
+from solo.configurator.config.rendering import StringRendererFactory
+from solo.configurator.config.views import ViewsConfigurator
+from solo.server.definitions import HttpMethod, PredicatedHandler
+from solo.server.handler.http_handler import handle_request
+from solo.server.response import TEXT_HEADERS, content_type_header, response_text
+from solo.server.routing import Router
+from solo.server.statuses import Redirect
+
+from .test_request import make_scope, make_receive
+
+
+class ItemsView:
+    def __init__(self, request, context):
+        self.request = request
+
+    async def list(self):
+        return 'list'
+
+    async def create(self):
+        return 'created'
+
+    async def redirect(self):
+        raise Redirect(location='/items/1')
+
+
+def make_views(*views, **predicates):
+    """ Build view metas the way the configurator does for scanned views. """
+    configurator = ViewsConfigurator(app=None)
+    configurator.add_default_view_predicates()
+    view_metas = []
+    for attr, methods in views:
+        view_item = configurator.add_view(ItemsView, route_name='items', attr=attr,
+                                          request_method=methods, **predicates)
+        view_item.renderer = StringRendererFactory('string')
+        view_metas.append(view_item)
+    return view_metas
+
+
+def make_runtime():
+    config = SimpleNamespace(server=SimpleNamespace(max_body_size=1024))
+    return SimpleNamespace(registry=SimpleNamespace(config=config), session_storage=None)
+
+
+def request(view_metas, method, runtime=None):
+    router = Router()
+    router.add('/items', {}, PredicatedHandler({}, view_metas))
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handle_request(runtime or make_runtime(), router, make_scope(method=method, path='/items'),
+                               make_receive(), send))
+    start, body = sent
+    return start['status'], dict(start['headers']), body['body']
+
+
+def test_views_are_dispatched_by_method():
+    view_metas = make_views(('list', (HttpMethod.GET,)), ('create', (HttpMethod.POST,)))
+    assert request(view_metas, 'GET')[::2] == (200, b'list')
+    assert request(view_metas, 'POST')[::2] == (200, b'created')
+    # GET implies HEAD
+    assert request(view_metas, 'HEAD')[0] == 200
+
+
+def test_unsupported_methods_get_405_with_allow():
+    view_metas = make_views(('list', (HttpMethod.GET,)))
+    for method in ('POST', 'OPTIONS', 'DELETE'):
+        status, headers, body = request(view_metas, method)
+        assert (status, headers[b'allow'], body) == (405, b'GET, HEAD', b'')
+
+    view_metas = make_views(('list', (HttpMethod.GET,)), ('create', (HttpMethod.POST,)))
+    assert request(view_metas, 'PUT')[1][b'allow'] == b'GET, HEAD, POST'
+
+
+class HeaderPredicate:
+    """ Pure predicate that checks a request header. """
+    def __init__(self, val, config):
+        self.val = val
+
+    def text(self):
+        return f'header = {self.val}'
+
+    phash = text
+
+    def __call__(self, runtime, request):
+        runtime.calls.append(self.val)
+        return self.val in request.headers
+
+
+class AsyncFlagPredicate:
+    def __init__(self, val, config):
+        self.val = val
+
+    def text(self):
+        return f'flag = {self.val}'
+
+    phash = text
+
+    async def __call__(self, runtime, request):
+        runtime.calls.append('async')
+        await asyncio.sleep(0)
+        return runtime.flag is self.val
+
+
+def test_pure_predicates_are_fused_and_checked_before_async_ones():
+    configurator = ViewsConfigurator(app=None)
+    configurator.add_default_view_predicates()
+    configurator.add_view_predicate('header', HeaderPredicate)
+    configurator.add_view_predicate('flag', AsyncFlagPredicate)
+    configurator.add_view_predicate('other_header', HeaderPredicate)
+    view_item = configurator.add_view(ItemsView, route_name='items', attr='list', request_method=HttpMethod.GET,
+                                      header='x-a', flag=True, other_header='x-b')
+    view_item.renderer = StringRendererFactory('string')
+
+    assert [type(p) for p in view_item.async_predicates] == [AsyncFlagPredicate]
+    assert view_item.check not in view_item.predicates
+
+    def serve(headers, flag):
+        runtime = make_runtime()
+        runtime.calls = []
+        runtime.flag = flag
+        router = Router()
+        router.add('/items', {}, PredicatedHandler({}, [view_item]))
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = make_scope(path='/items', headers=[(h.encode(), b'1') for h in headers])
+        asyncio.run(handle_request(runtime, router, scope, make_receive(), send))
+        return sent[0]['status'], runtime.calls
+
+    assert serve(['x-a', 'x-b'], True) == (200, ['x-a', 'x-b', 'async'])
+    # a failed pure predicate skips the remaining ones, and async predicates aren't awaited
+    assert serve(['x-b'], True) == (404, ['x-a'])
+    assert serve(['x-a', 'x-b'], False) == (404, ['x-a', 'x-b', 'async'])
+
+
+def test_responses_carry_pre_encoded_headers():
+    response = response_text(404, 'Not Found')
+    assert (response.status, response.body) == (404, b'Not Found')
+    assert response.headers is TEXT_HEADERS == ((b'content-type', b'text/plain; charset=utf-8'),)
+    assert content_type_header('application/json') == ((b'content-type', b'application/json'),)
+
+    view_metas = make_views(('list', (HttpMethod.GET,)))
+    renderer = view_metas[0].renderer
+    status, headers, body = request(view_metas, 'GET')
+    assert (status, headers, body) == (200, dict(renderer.headers), b'list')
+
+
+def test_redirects_send_location():
+    status, headers, body = request(make_views(('redirect', (HttpMethod.GET,))), 'GET')
+    assert (status, body) == (302, b'')
+    assert headers == {b'content-type': b'text/plain; charset=utf-8', b'location': b'/items/1'}
+
+
+def test_async_views_behind_sync_decorators_are_awaited():
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, context):
+            return view(request, context)
+        return wrapper
+
+    async def view(request, context):
+        return 'decorated'
+
+    configurator = ViewsConfigurator(app=None)
+    configurator.add_default_view_predicates()
+    view_item = configurator.add_view(view, route_name='items', request_method=(HttpMethod.GET,),
+                                      decorator=decorator)
+    view_item.renderer = StringRendererFactory('string')
+    assert request([view_item], 'GET')[::2] == (200, b'decorated')
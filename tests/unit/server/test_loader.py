@@ -0,0 +1,64 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from solo.apps.accounts.model import User
+from solo.services import SQLService
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def mappings(self):
+        return self.rows
+
+
+class FakeEngine:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    @asynccontextmanager
+    async def connect(self):
+        yield self
+
+    async def execute(self, query, params):
+        keys = params['keys']
+        self.queries.append(keys)
+        return FakeResult([row for row in self.rows if row['id'] in keys])
+
+
+def test_concurrent_gets_are_batched():
+    engine = FakeEngine([{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}])
+
+    async def scenario():
+        users = await asyncio.gather(*[SQLService(engine, User).get(User.id, i) for i in (1, '2', 1, 3)])
+        assert [u and u.name for u in users] == ['a', 'b', 'a', None]
+        assert engine.queries == [[1, 2, 3]]
+
+        identity_map = {}
+        service = SQLService(engine, User, identity_map=identity_map)
+        user = await service.get(User.id, 1)
+        assert await service.get(User.id, '1') is user
+        assert len(engine.queries) == 2
+
+        # e.g. /users/abc
+        assert await service.get(User.id, 'abc') is None
+        assert len(engine.queries) == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_get_does_not_fail_others():
+    engine = FakeEngine([{'id': 1, 'name': 'a'}])
+
+    async def scenario():
+        first = asyncio.ensure_future(SQLService(engine, User).get(User.id, 1))
+        second = asyncio.ensure_future(SQLService(engine, User).get(User.id, 1))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert (await second).name == 'a'
+        assert first.cancelled()
+        assert engine.queries == [[1]]
+
+    asyncio.run(scenario())
@@ -0,0 +1,86 @@
+import asyncio
+from collections import namedtuple
+from contextlib import asynccontextmanager
+
+from sqlalchemy.dialects.postgresql import psycopg
+
+from solo.apps.accounts.model import AuthProvider
+from solo.apps.accounts.providers.base_oauth2 import ProfileIntegration, ThirdPartyProfile
+from solo.apps.accounts.service import AuthService
+
+
+UserRow = namedtuple('UserRow', 'id name')
+
+
+class FakeTransaction:
+    def __init__(self, log):
+        self.log = log
+
+    async def commit(self):
+        self.log.append('commit')
+
+    async def rollback(self):
+        self.log.append('rollback')
+
+
+class FakeResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeEngine:
+    """ Returns prepared result rows of the login statement, one per execution. """
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.log = []
+
+    @asynccontextmanager
+    async def connect(self):
+        yield self
+
+    async def begin(self):
+        return FakeTransaction(self.log)
+
+    async def execute(self, query, params):
+        self.log.append(params)
+        return FakeResult(self.rows.pop(0))
+
+
+def integration(uid='42'):
+    return ProfileIntegration(provider=AuthProvider.GITHUB, access_token='token',
+                              profile=ThirdPartyProfile(id=uid, display_name='Alice'))
+
+
+def test_login_statement_creates_or_reuses_the_user():
+    sql = str(AuthService._login_query().compile(dialect=psycopg.dialect()))
+    # a new user is inserted only if there is no auth entry of the integration
+    assert 'WITH new_user AS \n(INSERT INTO users (name) SELECT' in sql
+    assert 'WHERE NOT (EXISTS (SELECT auth.user_id \nFROM auth' in sql
+    # the auth entry links either the new user or the existing one, and its token is refreshed
+    assert 'user_id) VALUES (%(provider)s, %(provider_uid)s::VARCHAR, %(access_token)s::VARCHAR, ' \
+           'coalesce((SELECT new_user.id \nFROM new_user), (SELECT auth.user_id' in sql
+    assert 'ON CONFLICT ON CONSTRAINT uniq_provider_provider_uid ' \
+           'DO UPDATE SET access_token = excluded.access_token RETURNING auth.user_id' in sql
+    # the new user isn't visible in users within the statement, so both are selected
+    assert 'FROM new_user \nWHERE new_user.id = (SELECT upserted.user_id' in sql
+    assert 'UNION ALL SELECT users.id, users.name \nFROM users JOIN upserted ON users.id = upserted.user_id' in sql
+
+
+def test_login_returns_the_selected_user_in_one_statement():
+    engine = FakeEngine(UserRow(7, 'Alice'))
+    user = asyncio.run(AuthService(engine).user_from_integration(integration()))
+    assert (user.id, user.name) == (7, 'Alice')
+    assert engine.log == [
+        {'provider': AuthProvider.GITHUB, 'provider_uid': '42', 'access_token': 'token', 'name': 'Alice'},
+        'commit',
+    ]
+
+
+def test_login_retries_after_a_concurrent_first_login():
+    engine = FakeEngine(None, UserRow(7, 'Alice'))
+    user = asyncio.run(AuthService(engine).user_from_integration(integration()))
+    assert user.id == 7
+    assert [e for e in engine.log if isinstance(e, str)] == ['rollback', 'commit']
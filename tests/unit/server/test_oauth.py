@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import httpx
+
+from solo.apps.accounts.providers.base_oauth2 import HttpClientSettings
+from solo.apps.accounts.providers.facebook import FacebookProvider
+from solo.server.request import Request
+from solo.vendor.old_session.old_session import Session
+
+from .test_request import make_scope
+
+
+def facebook_api(request: httpx.Request) -> httpx.Response:
+    """ Stub of Facebook endpoints used by the login flow. """
+    if request.url.path.endswith('/oauth/access_token'):
+        assert request.url.params['code'] == 'the-code'
+        return httpx.Response(200, json={'access_token': 'token'})
+    assert request.url.params['access_token'] == 'token'
+    return httpx.Response(200, json={'id': 42, 'name': 'Alice'})
+
+
+def login_request(state='st'):
+    request = Request(make_scope(query_string=f'state={state}&code=the-code'.encode()))
+    session = Session('sid', data={'created': int(time.time()), 'session': {'oauth.state': 'st'}}, new=False)
+    return request, session
+
+
+def test_logins_share_a_client():
+    provider = FacebookProvider('id', 'secret', ['email'], redirect_uri='http://localhost/cb',
+                                http_settings=HttpClientSettings(transport=httpx.MockTransport(facebook_api)))
+
+    async def scenario():
+        integration = await provider.callback(*login_request())
+        assert (integration.access_token, integration.profile.id, integration.profile.display_name) == \
+            ('token', '42', 'Alice')
+        client = provider.http
+        await provider.callback(*login_request())
+        assert provider.http is client
+
+        await provider.aclose()
+        assert client.is_closed
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from solo.apps.accounts.model import Group
+from solo.config.app import JsonBackend
+from solo.configurator.config.rendering import JsonApiRendererFactory
+from solo.server.codec import json_codec
+from solo.server.model import Base
+from solo.server.request import Request
+from solo.server.statuses import InvalidCursor
+from solo.services import SQLService, Page
+from solo.services.pagination import encode_cursor
+
+from .test_bulk_writes import SyncEngine
+from .test_request import make_scope
+
+
+class Event(Base):
+    __tablename__ = 'test_pagination_events'
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    created = sa.Column(sa.DateTime, nullable=False)
+
+
+@pytest.fixture
+def stdlib_json():
+    backend = json_codec.backend
+    json_codec.use(JsonBackend.STDLIB)
+    yield
+    json_codec.use(backend)
+
+
+def test_pages_follow_cursors():
+    engine = sa.create_engine('sqlite://')
+    Group.__table__.create(engine)
+    with engine.begin() as c:
+        c.execute(Group.__table__.insert(), [{'id': i, 'name': f'group {i % 3}', 'permissions': []}
+                                             for i in range(1, 8)])
+    service = SQLService(SyncEngine(engine), Group)
+
+    async def pages(**kw):
+        seen, after = [], None
+        while True:
+            page = await service.page(size=3, after=after, **kw)
+            seen.append([(g.name, g.id) for g in page.items])
+            after = page.next_cursor
+            if after is None:
+                return seen
+
+    by_id = asyncio.run(pages(order_by=Group.id, records=True))
+    assert [[i for _, i in p] for p in by_id] == [[1, 2, 3], [4, 5, 6], [7]]
+
+    by_name = asyncio.run(pages(order_by=(Group.name, Group.id), fields=[Group.name]))
+    assert sum(by_name, []) == sorted((f'group {i % 3}', i) for i in range(1, 8))
+
+    for cursor in [encode_cursor([1, 2]), encode_cursor(['1']), encode_cursor([True]), 'not a cursor']:
+        with pytest.raises(InvalidCursor):
+            asyncio.run(service.page(Group.id, 3, after=cursor))
+
+    page = asyncio.run(service.page(Group.id, 3, search_field=Group.name))
+    assert page == Page([], None)
+
+
+def test_timestamp_cursors(stdlib_json):
+    engine = sa.create_engine('sqlite://')
+    Event.__table__.create(engine)
+    start = datetime.datetime(2020, 1, 1)
+    with engine.begin() as c:
+        c.execute(Event.__table__.insert(), [{'id': i, 'created': start + datetime.timedelta(hours=i % 3)}
+                                             for i in range(1, 6)])
+    service = SQLService(SyncEngine(engine), Event)
+
+    async def scenario():
+        first = await service.page((Event.created, Event.id), 3)
+        second = await service.page((Event.created, Event.id), 3, after=first.next_cursor)
+        assert [e.id for e in first.items + second.items] == [3, 1, 4, 2, 5]
+        assert second.next_cursor is None
+        with pytest.raises(InvalidCursor):
+            await service.page((Event.created, Event.id), 3, after=encode_cursor(['yesterday', 1]))
+
+    asyncio.run(scenario())
+
+
+def test_jsonapi_renderer_links_next_page():
+    request = Request(make_scope(path='/groups', query_string=b'page%5Bsize%5D=2&page%5Bafter%5D=old'))
+    render = JsonApiRendererFactory('jsonapi')
+
+    body = json_codec.loads(render(request, Page([{'id': '1'}], 'next')).body)
+    assert body['data'] == [{'id': '1'}]
+    assert body['links'] == {'next': '/groups?page%5Bsize%5D=2&page%5Bafter%5D=next'}
+
+    assert json_codec.loads(render(request, Page([])).body)['links'] == {'next': None}
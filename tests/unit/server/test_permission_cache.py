@@ -0,0 +1,94 @@
+import asyncio
+
+import sqlalchemy as sa
+
+from solo.apps.accounts.model import Group, User, users_groups_association
+from solo.apps.accounts.permissions import PermissionCache
+from solo.apps.accounts.service import UserService
+from solo.server.cache import TTLCache
+from solo.server.model import Base
+
+from .test_bulk_writes import SyncEngine
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def test_ttl_cache_expires_entries():
+    now = [0.0]
+    cache = TTLCache(2, ttl=10, timer=lambda: now[0])
+    cache.put('a', 1)
+    now[0] = 5
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    now[0] = 11
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert 'a' not in cache
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_permission_cache_tiers_and_invalidation():
+    loads = []
+
+    async def load(user_id, permissions):
+        loads.append(user_id)
+        return permissions
+
+    async def scenario():
+        redis = FakeRedis()
+        cache = PermissionCache(shared=True)
+        first = await cache.get(1, lambda: load(1, ['a', 'b']), redis=redis)
+        assert first == {'a', 'b'}
+        assert await cache.get(1, lambda: load(1, ['x']), redis=redis) is first
+        # Equal permission sets are interned
+        assert await cache.get(2, lambda: load(2, ['b', 'a']), redis=redis) is first
+
+        # Another worker reads the shared tier
+        other = PermissionCache(shared=True)
+        assert await other.get(1, lambda: load(1, ['x']), redis=redis) == first
+        assert loads == [1, 2]
+
+        await cache.invalidate([1], redis=redis)
+        assert await other.get(1, lambda: load(1, ['x']), redis=redis) == first
+        assert await cache.get(1, lambda: load(1, ['c']), redis=redis) == {'c'}
+        assert loads == [1, 2, 1]
+
+    asyncio.run(scenario())
+
+
+def test_group_changes_invalidate_permissions():
+    engine = sa.create_engine('sqlite://')
+    Base.metadata.create_all(engine, tables=[User.__table__, Group.__table__, users_groups_association])
+    with engine.begin() as c:
+        c.execute(User.__table__.insert(), {'id': 1, 'name': 'user'})
+        c.execute(Group.__table__.insert(), {'id': 1, 'name': 'editors', 'permissions': ['edit']})
+
+    async def scenario():
+        redis = FakeRedis()
+        service = UserService(SyncEngine(engine), redis=redis, cache=PermissionCache(shared=True))
+        user = User(id=1, name='user')
+        assert (await service.permissions(user)).permissions == set()
+
+        await service.add_to_group(1, 1)
+        assert (await service.permissions(user)).permissions == {'edit'}
+
+        await service.set_group_permissions(1, ['edit', 'publish'])
+        assert (await service.permissions(user)).permissions == {'edit', 'publish'}
+
+        await service.remove_from_group(1, 1)
+        assert (await service.permissions(user)).permissions == set()
+
+    asyncio.run(scenario())
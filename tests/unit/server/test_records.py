@@ -0,0 +1,42 @@
+import asyncio
+
+import sqlalchemy as sa
+
+from solo.apps.accounts.model import Group
+from solo.server.model import record_type
+from solo.services import SQLService
+
+from .test_bulk_writes import SyncEngine
+
+
+def test_records_match_entities():
+    Record = record_type(Group)
+    assert record_type(Group) is Record
+    assert Record._fields == ('id', 'name', 'description', 'permissions')
+
+    row = (1, 'admins', '', ['admin'])
+    record = Record._make(row)
+    entity = Group(**dict(zip(Record._fields, row)))
+    assert record.as_dict() == entity.as_dict()
+    assert record.as_dict(exclude={'permissions'}) == entity.as_dict(exclude={'permissions'})
+    assert record.as_dict('name', 'permissions|json') == entity.as_dict('name', 'permissions|json')
+
+    Names = record_type(Group, ['id', 'name'])
+    assert Names is not Record
+    assert Names._make((1, 'admins')).name == 'admins'
+
+
+def test_empty_fields_select_all_columns():
+    engine = sa.create_engine('sqlite://')
+    Group.__table__.create(engine)
+    with engine.begin() as c:
+        c.execute(Group.__table__.insert(), {'id': 1, 'name': 'admins', 'permissions': ['admin']})
+    service = SQLService(SyncEngine(engine), Group)
+
+    async def scenario():
+        [record] = await service.get_many(Group.id, [1], fields=[], records=True)
+        assert record == (1, 'admins', '', ['admin'])
+        page = await service.page(Group.id, 10, fields=[])
+        assert page.items[0].as_dict() == record.as_dict()
+
+    asyncio.run(scenario())
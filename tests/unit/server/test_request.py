@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from solo.server.definitions import HttpMethod
+from solo.server.request import Request, Headers
+from solo.server.statuses import BadRequest, RequestEntityTooLarge
+
+
+def make_scope(**kw):
+    scope = {
+        'type': 'http',
+        'scheme': 'http',
+        'root_path': '',
+        'server': ('127.0.0.1', 8000),
+        'http_version': '1.1',
+        'method': 'GET',
+        'path': '/',
+        'query_string': b'',
+        'headers': [],
+    }
+    scope.update(kw)
+    return scope
+
+
+def make_receive(*chunks):
+    messages = [{'type': 'http.request', 'body': c, 'more_body': True} for c in chunks]
+    messages.append({'type': 'http.request', 'body': b'', 'more_body': False})
+    messages = iter(messages)
+
+    async def receive():
+        return next(messages)
+    return receive
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_headers_are_case_insensitive_multidict():
+    headers = Headers([(b'content-type', b'text/plain'), (b'X-Forwarded-For', b'a'), (b'x-forwarded-for', b'b')])
+    assert headers['Content-Type'] == 'text/plain'
+    assert headers.get('x-forwarded-for') == 'a'
+    assert headers.getall('X-FORWARDED-FOR') == ['a', 'b']
+    assert headers.getall('cookie') is None
+    assert 'CONTENT-TYPE' in headers
+    assert len(headers) == 2
+
+
+def test_request_parses_lazily():
+    scope = make_scope(path='/users', query_string=b'a=1&a=2&b=')
+    request = Request(scope, method=HttpMethod.GET, url_params={'id': '1'})
+    assert request._headers is None
+    assert request._qs_params is None
+    assert request.qs_params == {'a': ['1', '2'], 'b': ['']}
+    assert request.qs_params is request.qs_params
+    assert request.path == '/users'
+    assert request.headers.get('host') is None
+
+
+def test_request_state():
+    request = Request(make_scope())
+    assert request.get('user') is None
+    request['user'] = 1
+    assert 'user' in request
+    assert request['user'] == 1
+
+
+def test_request_body_is_streamed_in_chunks():
+    request = Request(make_scope(), receive=make_receive(b'{"a":', b' 1}'))
+    assert run(request.json()) == {'a': 1}
+    # buffered body can be read again
+    assert run(request.read()) == b'{"a": 1}'
+
+
+def test_request_body_limits():
+    request = Request(make_scope(), receive=make_receive(b'x' * 10, b'x' * 10), max_body_size=15)
+    with pytest.raises(RequestEntityTooLarge):
+        run(request.read())
+
+    request = Request(make_scope(headers=[(b'content-length', b'100')]), receive=make_receive(), max_body_size=15)
+    with pytest.raises(RequestEntityTooLarge):
+        run(request.read())
+
+    request = Request(make_scope(), receive=make_receive(b'{'))
+    with pytest.raises(BadRequest):
+        run(request.json())
+
+
+def test_request_incremental_parsers():
+    request = Request(make_scope(), receive=make_receive(b'{"a": 1}\n{"a"', b': 2}\n\n{"a": 3}'))
+
+    async def collect():
+        return [x async for x in request.iter_json_lines()]
+    assert run(collect()) == [{'a': 1}, {'a': 2}, {'a': 3}]
+
+    request = Request(make_scope(headers=[(b'content-type', b'application/x-www-form-urlencoded; charset=utf-8')]),
+                      receive=make_receive(b'a=1&b=hello+', b'world&a=%32'))
+    assert run(request.form()) == {'a': ['1', '2'], 'b': ['hello world']}
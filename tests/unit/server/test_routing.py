@@ -0,0 +1,67 @@
+import pytest
+import routes
+
+from solo.configurator.config.sums import SumType
+from solo.configurator.url import complete_url_rules
+from solo.server.routing import Router
+
+
+class Provider(SumType):
+    GITHUB: str = 'github'
+    FACEBOOK: str = 'facebook'
+
+
+ROUTES = [
+    ('/', {}),
+    ('/api/login/{provider}', {'provider': Provider}),
+    ('/api/login/{provider}/callback', {'provider': Provider}),
+    ('/api/users', {}),
+    ('/api/users/{userId:\\d+}', {}),
+    ('/api/users/{userId:\\d+}/groups/{groupId}', {}),
+    ('/files/{name}.json', {}),
+]
+
+
+@pytest.fixture
+def routers():
+    router = Router()
+    mapper = routes.Mapper()
+    for pattern, rules in ROUTES:
+        router.add(pattern, rules, pattern)
+        mapper.connect(pattern, pattern, requirements=complete_url_rules(rules), controller=pattern)
+    return router, mapper
+
+
+@pytest.mark.parametrize('path', [
+    '/',
+    '/api/login/github',
+    '/api/login/facebook/callback',
+    '/api/login/twitter',
+    '/api/users',
+    '/api/users/',
+    '/api/users/42',
+    '/api/users/me',
+    '/api/users/42/groups/admins',
+    '/files/report.v2.json',
+    '/files/report.xml',
+    '//',
+    '/unknown',
+])
+def test_router_matches_like_mapper(routers, path):
+    router, mapper = routers
+    assert router.match(path) == mapper.match(path)
+
+
+def test_static_segments_take_precedence():
+    router = Router()
+    router.add('/users/{userId}', {}, 'details')
+    router.add('/users/me', {}, 'me')
+    assert router.match('/users/me') == {'controller': 'me'}
+    assert router.match('/users/5') == {'controller': 'details', 'userId': '5'}
+
+
+def test_router_backtracks_from_static_branch():
+    router = Router()
+    router.add('/users/me/settings', {}, 'settings')
+    router.add('/users/{userId}/groups', {}, 'groups')
+    assert router.match('/users/me/groups') == {'controller': 'groups', 'userId': 'me'}
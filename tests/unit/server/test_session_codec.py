@@ -0,0 +1,47 @@
+import pytest
+
+from solo.server.sessions.codec import BinarySessionCodec, JsonSessionCodec
+
+
+SESSION = {
+    'created': 1700000000,
+    'session': {
+        '__user__': 42,
+        'oauth.state': 'c3d1b0a9e2f84d5f',
+        'flags': [True, False, None],
+        'nested': {'score': 1.5, 'big': 2 ** 70, 'huge': -10 ** 300, 'neg': -2 ** 40, 'text': 'ю' * 300},
+    },
+}
+
+
+def test_binary_codec_roundtrip():
+    codec = BinarySessionCodec()
+    assert codec.decode(codec.encode(SESSION)) == SESSION
+    assert codec.decode(codec.encode({})) == {}
+
+
+def test_codecs_read_each_other():
+    binary = BinarySessionCodec()
+    json = JsonSessionCodec()
+    data = {'created': 1, 'session': {'a': [1, 'b']}}
+    assert binary.decode(json.encode(data)) == data
+    assert json.decode(binary.encode(data)) == data
+    assert len(binary.encode(data)) < len(json.encode(data))
+
+
+@pytest.mark.parametrize('raw', [
+    b'\xb5\x02',
+    # a truncated dict
+    b'\xb5\x01\x00\x00\x00\x01\x0a',
+    b'\xb5\x01\x00\x00\x00\x01\xff',
+    # a dict with a list key
+    b'\xb5\x01\x00\x00\x00\x01\x0a\x00\x00\x00\x01\x09\x00\x00\x00\x00\x00',
+])
+def test_malformed_payloads_raise_value_error(raw):
+    with pytest.raises(ValueError):
+        BinarySessionCodec().decode(raw)
+
+
+def test_binary_codec_rejects_values_json_cannot_store():
+    with pytest.raises(TypeError):
+        BinarySessionCodec().encode({'created': 1, 'session': {'raw': b'\x00'}})
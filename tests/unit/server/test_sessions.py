@@ -0,0 +1,340 @@
+import asyncio
+import time
+from http.cookies import SimpleCookie
+from types import SimpleNamespace
+
+import pytest
+
+from solo.server.request import Request
+from solo.server.runtime.dependencies import DEPENDENCIES
+from solo.server.sessions.cookie import CookieSessionStore
+from solo.vendor.old_session.old_session import Session, LazySession, SessionStore, get_session, STORAGE_KEY
+
+from .test_request import make_scope
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self, raise_on_error=True):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.messages = asyncio.Queue()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        for subscribers in self.redis.subscribers.values():
+            subscribers.discard(self)
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.setdefault(channel, set()).add(self)
+        self.messages.put_nowait({'type': 'subscribe', 'data': 1})
+
+    async def listen(self):
+        while True:
+            message = await self.messages.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttl = {}
+        self.deadlines = {}
+        self.round_trips = 0
+        self.subscribers = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def publish(self, channel, message):
+        subscribers = self.subscribers.get(channel, ())
+        for pubsub in subscribers:
+            pubsub.messages.put_nowait({'type': 'message', 'data': message.encode()})
+        return len(subscribers)
+
+    def disconnect(self):
+        for subscribers in self.subscribers.values():
+            for pubsub in subscribers:
+                pubsub.messages.put_nowait(ConnectionError('Connection closed by server.'))
+
+    def _get(self, key):
+        deadline = self.deadlines.get(key)
+        if deadline is not None and time.time() > deadline:
+            self.data.pop(key, None)
+        return self.data.get(key)
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self._get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttl[key] = ex
+        self.deadlines[key] = None if ex is None else time.time() + ex
+        return True
+
+    def expire(self, key, seconds):
+        if self._get(key) is None:
+            return False
+        self.ttl[key] = seconds
+        self.deadlines[key] = time.time() + seconds
+        return True
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+def make_request(store, sid=None):
+    headers = [(b'cookie', f'sid={sid}'.encode())] if sid else []
+    request = Request(make_scope(headers=headers))
+    request[STORAGE_KEY] = store
+    return request
+
+
+@pytest.fixture
+def store():
+    return SessionStore(FakeRedis(), cookie_name='sid', max_age=60, key_factory=lambda: 'new')
+
+
+def test_new_session_is_saved_with_cookie(store):
+    async def main():
+        request = make_request(store)
+        session = store.lazy_session(request)
+        session['a'] = 1
+        return await store.save_session(request, session)
+    headers = asyncio.run(main())
+
+    assert store._redis.round_trips == 1
+    assert b'sid=new' in headers[0][1]
+    assert store._redis.ttl == {'sid_new': 60}
+
+
+def test_session_is_fetched_on_first_read_only(store):
+    store._redis.data['sid_abc'] = b'{"created": %d, "session": {"a": 1, "b": 2}}' % time.time()
+
+    async def main():
+        request = make_request(store, 'abc')
+        session = store.lazy_session(request)
+        # blind writes don't need a round trip
+        session['c'] = 3
+        del session['b']
+        assert store._redis.round_trips == 0
+        assert (await get_session(request)) is session
+        assert dict(session) == {'a': 1, 'c': 3}
+        await store.save_session(request, session)
+    asyncio.run(main())
+    assert store._redis.round_trips == 2
+
+
+def test_unchanged_session_ttl_is_refreshed(store):
+    store._redis.data['sid_abc'] = b'{"created": %d, "session": {"a": 1}}' % time.time()
+
+    async def main():
+        request = make_request(store, 'abc')
+        session = await store.load_session(request)
+        assert session['a'] == 1
+        await store.save_session(request, session)
+    asyncio.run(main())
+    assert store._redis.ttl == {'sid_abc': 60}
+
+
+@pytest.mark.parametrize('cookie_sessions', [False, True])
+def test_touched_sessions_outlive_max_age(monkeypatch, cookie_sessions):
+    now = [time.time()]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    store = SessionStore(FakeRedis(), cookie_name='sid', max_age=60, key_factory=lambda: 'new')
+    if cookie_sessions:
+        store = CookieSessionStore(store, secret='secret')
+
+    async def visit(cookie, **values):
+        request = make_request(store, cookie)
+        session = await store.load_session(request)
+        data = dict(session)
+        session.update(values)
+        headers = await store.save_session(request, session)
+        return data, headers and SimpleCookie(headers[0][1].decode('latin-1'))['sid'].value
+
+    async def main():
+        _, cookie = await visit(None, a=1)
+        first = cookie
+        for elapsed in (30, 60, 90):
+            now[0] += 30
+            data, cookie = await visit(cookie)
+            assert data == {'a': 1}, elapsed
+        # sessions that aren't touched for max_age expire
+        now[0] += 61
+        assert (await visit(cookie))[0] == {}
+        assert (await visit(first))[0] == {}
+    asyncio.run(main())
+
+
+def test_writes_of_the_same_tick_share_a_pipeline(store):
+    async def save(n):
+        request = make_request(store)
+        session = store.lazy_session(request)
+        session['n'] = n
+        await store.save_session(request, session)
+
+    async def main():
+        await asyncio.gather(*[save(n) for n in range(10)])
+    asyncio.run(main())
+    assert store._redis.round_trips == 1
+
+
+def test_session_dependency_is_loaded(store):
+    store._redis.data['sid_abc'] = b'{"created": %d, "session": {"a": 1}}' % time.time()
+    runtime = SimpleNamespace(session_storage=store)
+
+    async def main():
+        request = make_request(store, 'abc')
+        lazy = DEPENDENCIES[LazySession].get(runtime, request)
+        assert not lazy.loaded and store._redis.round_trips == 0
+        session = await DEPENDENCIES[Session].get(runtime, request)
+        assert session is lazy and session['a'] == 1
+    asyncio.run(main())
+
+
+def test_unloaded_session_cannot_be_read(store):
+    request = make_request(store, 'abc')
+    session = store.lazy_session(request)
+    with pytest.raises(RuntimeError):
+        session.get('a')
+
+
+async def settle():
+    """ Let listeners of invalidation channels process their messages. """
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_cached_sessions_are_invalidated_by_other_workers():
+    redis = FakeRedis()
+    worker1 = SessionStore(redis, cookie_name='sid', cache_size=10, key_factory=lambda: 'abc')
+    worker2 = SessionStore(redis, cookie_name='sid', cache_size=10)
+
+    async def write(store, value):
+        request = make_request(store, 'abc' if 'sid_abc' in redis.data else None)
+        session = store.lazy_session(request)
+        session['value'] = value
+        await store.save_session(request, session)
+
+    async def read(store):
+        session = await store.load_session(make_request(store, 'abc'))
+        return session['value']
+
+    async def main():
+        await write(worker1, [1])
+        # sessions are not cached until the worker subscribes to invalidations
+        assert await read(worker2) == [1]
+        await settle()
+        assert await read(worker2) == [1]
+        round_trips = redis.round_trips
+        # cached sessions are reused without round trips,
+        # and changes of nested values in one request don't leak into the cache
+        (await read(worker2)).append(2)
+        assert await read(worker2) == [1]
+        assert redis.round_trips == round_trips
+
+        await write(worker1, [2])
+        await settle()
+        assert await read(worker2) == [2]
+
+        # invalidations may be lost while the channel is down
+        redis.disconnect()
+        await settle()
+        redis.data['sid_abc'] = worker1._encoder({'created': int(time.time()), 'session': {'value': [3]}})
+        assert await read(worker2) == [3]
+        await worker1.close()
+        await worker2.close()
+    asyncio.run(main())
+
+
+def test_sessions_invalidated_while_fetched_are_not_cached():
+    redis = FakeRedis()
+    worker1 = SessionStore(redis, cookie_name='sid', cache_size=10, key_factory=lambda: 'abc')
+    worker2 = SessionStore(redis, cookie_name='sid', cache_size=10)
+    fetch = redis.get
+
+    async def main():
+        session = await worker1.new_session()
+        session['value'] = 1
+        await worker1.save_session(make_request(worker1), session)
+        await worker2.fetch('abc')
+        await settle()
+
+        async def get_and_write(key):
+            # another worker writes the session while the stale copy is on the way
+            data = await fetch(key)
+            await worker1.store('abc', {'created': int(time.time()), 'session': {'value': 2}}, None)
+            await settle()
+            return data
+
+        redis.get = get_and_write
+        assert (await worker2.fetch('abc'))['session'] == {'value': 1}
+        redis.get = fetch
+        assert (await worker2.fetch('abc'))['session'] == {'value': 2}
+        await worker1.close()
+        await worker2.close()
+    asyncio.run(main())
+
+
+def test_cookie_sessions_skip_redis_unless_oversized():
+    redis = FakeRedis()
+    store = CookieSessionStore(SessionStore(redis, cookie_name='sid', key_factory=lambda: 'big'),
+                               secret='secret', max_cookie_size=200)
+
+    async def save(cookie, **values):
+        request = make_request(store, cookie)
+        session = store.lazy_session(request)
+        for k, v in values.items():
+            session[k] = v
+        headers = await store.save_session(request, session)
+        return SimpleCookie(headers[0][1].decode('latin-1'))['sid'].value
+
+    async def load(cookie):
+        return dict(await store.load_session(make_request(store, cookie)))
+
+    async def main():
+        cookie = await save(None, user=1)
+        assert cookie.startswith('s.')
+        assert await load(cookie) == {'user': 1}
+        # tampered cookies are ignored
+        assert await load(cookie[:-2] + 'xx') == {}
+
+        cookie = await save(cookie, blob='x' * 300)
+        assert cookie == 'r.big'
+        assert await load(cookie) == {'user': 1, 'blob': 'x' * 300}
+
+        cookie = await save(cookie, blob='')
+        assert cookie.startswith('s.')
+        assert 'sid_big' not in redis.data
+    asyncio.run(main())
+    # set, get, and get + delete when the session moves back into the cookie
+    assert redis.round_trips == 4
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from solo.apps.accounts.model import User
+from solo.server.handler.http_handler import send_body_stream
+from solo.server.request import Request
+from solo.server.response import encode_ndjson, encode_json_array, stream_json
+from solo.services import SQLService
+
+from .test_request import make_scope
+
+
+async def produce(chunks, closed):
+    try:
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(0)
+    finally:
+        closed.append(True)
+
+
+def test_body_stream_is_sent_in_chunks():
+    sent = []
+    closed = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def main():
+        await send_body_stream(Request(make_scope()), produce([b'a', b'', b'b'], closed), send)
+    asyncio.run(main())
+
+    assert [(m['body'], m['more_body']) for m in sent] == [(b'a', True), (b'b', True), (b'', False)]
+    assert closed == [True]
+
+
+def test_body_stream_stops_on_disconnect():
+    sent = []
+    closed = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    async def main():
+        request = Request(make_scope(), receive=receive)
+        await send_body_stream(request, produce([b'a'] * 100, closed), send)
+    asyncio.run(main())
+
+    assert len(sent) < 100
+    assert all(m['more_body'] for m in sent)
+    assert closed == [True]
+
+
+class FakeStreamingEngine:
+    """ Serves rows in partitions of ``yield_per`` rows, like a server-side cursor. """
+    def __init__(self, rows):
+        self.rows = rows
+
+    @asynccontextmanager
+    async def connect(self):
+        yield self
+
+    @asynccontextmanager
+    async def stream(self, query, params, execution_options):
+        size = execution_options['yield_per']
+        rows = self.rows
+
+        class Result:
+            def mappings(self):
+                return self
+
+            async def partitions(self):
+                for start in range(0, len(rows), size):
+                    yield rows[start:start + size]
+        yield Result()
+
+
+def test_records_are_streamed_as_json():
+    engine = FakeStreamingEngine([{'id': i, 'name': f'u{i}'} for i in range(5)])
+
+    async def collect(body):
+        return [chunk async for chunk in body]
+
+    async def main():
+        service = SQLService(engine, User)
+        ndjson = await collect(encode_ndjson(service.stream(batch_size=2), chunk_size=30))
+        assert len(ndjson) > 1
+        lines = b''.join(ndjson).splitlines()
+        assert [json.loads(line) for line in lines] == engine.rows
+
+        array = stream_json(service.stream(batch_size=2))
+        assert json.loads(b''.join(await collect(array.body))) == engine.rows
+        entities = await collect(encode_ndjson(service.stream(entities=True)))
+        assert [json.loads(line) for line in b''.join(entities).splitlines()] == engine.rows
+        empty = SQLService(FakeStreamingEngine([]), User).stream()
+        assert json.loads(b''.join(await collect(encode_json_array(empty)))) == []
+
+    asyncio.run(main())
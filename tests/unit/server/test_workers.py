@@ -0,0 +1,51 @@
+import gc
+import os
+import signal
+import time
+from types import SimpleNamespace
+
+from solo.server import workers
+
+
+def test_supervisor_restarts_crashed_workers_and_stops(monkeypatch, tmp_path):
+    log = tmp_path / 'workers.log'
+    configured = []
+
+    def configure_app(config, with_pools=True):
+        configured.append(with_pools)
+        return 'app', 'registry'
+
+    def run_worker(config, app, registry, shared_socket, reuse_port):
+        assert (app, registry) == ('app', 'registry')
+        num = os.environ['WORKER']
+        with open(log, 'a') as f:
+            f.write(num + '\n')
+        if num == '0':
+            starts = log.read_text().split().count('0')
+            if starts == 1:
+                raise RuntimeError('crash')
+            # the restarted worker stops the supervisor
+            os.kill(os.getppid(), signal.SIGTERM)
+        time.sleep(10)
+
+    spawn = workers.Supervisor.spawn
+
+    def spawn_with_number(self, num):
+        os.environ['WORKER'] = str(num)
+        spawn(self, num)
+
+    monkeypatch.setattr(workers, 'configure_app', configure_app)
+    monkeypatch.setattr(workers, 'run_worker', run_worker)
+    monkeypatch.setattr(workers, 'RESTART_DELAY', 0)
+    monkeypatch.setattr(workers.Supervisor, 'spawn', spawn_with_number)
+    monkeypatch.setenv('WORKER', '')
+    handlers = signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM)
+    try:
+        assert workers.Supervisor(SimpleNamespace(), 2).run() == 0
+    finally:
+        signal.signal(signal.SIGINT, handlers[0])
+        signal.signal(signal.SIGTERM, handlers[1])
+        gc.unfreeze()
+
+    assert configured == [False]
+    assert sorted(log.read_text().split()) == ['0', '0', '1']